@@ -0,0 +1,267 @@
+#! /usr/bin/env python
+#-*- coding: utf-8 -*-
+'''
+VERSION: 1.0 of 2026-10-17
+AUTHOR: Rafferty River.
+LICENSE: GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY.
+
+DESCRIPTION & USAGE:
+This module holds the Scribus helpers shared by the PhotoBook Tools
+scripts. It is not a script to run by itself.
+
+Scope of a run: the selected items, the whole document or a page range.
+All image frames of the scope are gathered in one pass up front (items in
+groups included), without changing the selection; the items that are
+skipped are counted for one summary at the end of the run.
+
+Batch mode (DocumentBatch): during a run the redraw is off and the unit
+is set once; the document is marked changed and redrawn once at the end.
+
+fillFrame scales and places the image of a frame to fill it (or fit it in
+the frame), from the image file header (see PhotoBookImageInfo.py).
+openDocumentImageIndex keeps those headers in an index next to the
+document (see PhotoBookImageIndex.py), for the next runs.
+
+Presets: PhotoBookLayoutMaker and PhotoBookImageCropResize can run without
+their dialog, with the options of a section of their .cfg file (the
+[DEFAULT] values fill in what a section leaves out), see readPreset and
+presetArgument.
+'''
+##################################################
+# imports
+import sys, os, time
+from configparser import ConfigParser
+import scribus
+
+from PhotoBookImageInfo import imageInfo, scaleToFrame, fitImage
+from PhotoBookImageIndex import openImageIndex
+
+SCOPES = ['Selection', 'Whole document', 'Page range']
+
+##################################################
+def parsePageRange(text, nbrPages):
+    """ Return the list of page numbers (1..nbrPages) of a text like
+    '3-10', '5', '1-4, 9' or 'all'. Raises ValueError for a bad range."""
+    text = text.strip().lower()
+    if text in ('', 'all'):
+        return list(range(1, nbrPages + 1))
+    pages = []
+    for part in text.split(','):
+        if '-' in part:
+            first, last = [int(p) for p in part.split('-', 1)]
+        else:
+            first = last = int(part)
+        if not 1 <= first <= last <= nbrPages:
+            raise ValueError('Pages must be within 1-%d.' % nbrPages)
+        for page in range(first, last + 1):
+            if page not in pages:
+                pages.append(page)
+    return pages
+
+def groupItems(group):
+    """ Return the names of the items of a group, or None if this Scribus
+    version cannot list them (getGroupItems needs Scribus 1.6)."""
+    try:
+        items = scribus.getGroupItems(group)
+    except (AttributeError, TypeError):
+        return None
+    return [item[0] if isinstance(item, (tuple, list)) else item for item in items]
+
+class FrameScan:
+    """ The image frames of a scope and the items that were skipped.
+    With emptyFrames, the empty image frames are kept instead of the
+    frames with an image."""
+
+    def __init__(self, emptyFrames=False):
+        """ Setup basic things """
+        self.emptyFrames = emptyFrames
+        self.imageFrames = []
+        self.skipped = {}    # reason -> number of items
+        self.pageOf = {}     # image frame -> page number (not for a selection)
+        self.page = None     # page being scanned
+
+    def skip(self, reason, count=1):
+        """ Count a skipped item."""
+        self.skipped[reason] = self.skipped.get(reason, 0) + count
+
+    def addItem(self, item):
+        """ Add an item: image frames with an image are kept, groups are
+        searched (recursively), anything else is counted as skipped."""
+        objectType = scribus.getObjectType(item)
+        if objectType == 'Group':
+            members = groupItems(item)
+            if members is None:
+                self.skip('groups (ungroup them first)')
+            else:
+                for member in members:
+                    self.addItem(member)
+        elif objectType == 'ImageFrame':
+            if (scribus.getImageFile(item) == "") != self.emptyFrames:
+                self.skip('image frames that are not empty' if self.emptyFrames
+                    else 'empty image frames')
+            else:
+                self.imageFrames.append(item)
+                if self.page is not None:
+                    self.pageOf[item] = self.page
+        else:
+            self.skip('items that are no image frame')
+
+    def addSelection(self):
+        """ Add the selected items."""
+        items = [scribus.getSelectedObject(i) for i in range(scribus.selectionCount())]
+        for item in items:
+            self.addItem(item)
+
+    def addPages(self, pages):
+        """ Add the items on the pages (page numbers from 1). The current
+        page is restored afterwards; the selection is not changed."""
+        current = scribus.currentPage()
+        try:
+            for page in pages:
+                scribus.gotoPage(page)
+                self.page = page
+                for item in scribus.getPageItems():
+                    self.addItem(item[0])
+        finally:
+            self.page = None
+            scribus.gotoPage(current)
+
+class DocumentBatch:
+    """ Context for changing many items at once:
+
+        with DocumentBatch(scribus.UNIT_POINTS) as batch:
+            ... change items ...
+            batch.changed()
+
+    Redraw is off and the document unit is set (if given) on entry; on
+    exit (also after an error) the unit is restored, the document is
+    marked changed (if changed() was called), redraw is turned on and the
+    document is redrawn once. seconds is the time spent in the batch."""
+
+    def __init__(self, unit=None):
+        """ Setup basic things """
+        self.unit = unit
+        self.isChanged = False
+        self.seconds = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        self.restoreUnit = scribus.getUnit()
+        if self.unit is not None:
+            scribus.setUnit(self.unit)
+        scribus.setRedraw(False)
+        return self
+
+    def changed(self):
+        """ Mark the document changed (once, at the end of the batch)."""
+        self.isChanged = True
+
+    def __exit__(self, excType, excValue, traceback):
+        try:
+            scribus.setUnit(self.restoreUnit)
+            if self.isChanged:
+                scribus.docChanged(True)
+        finally:
+            scribus.setRedraw(True)
+            scribus.redrawAll()
+            self.seconds = time.perf_counter() - self.start
+        return False
+
+def collectImageFrames(scope='Selection', pageRange='all', emptyFrames=False):
+    """ Return a FrameScan with the image frames of a scope
+    (see SCOPES; pageRange is only used for 'Page range'), or with the
+    empty image frames."""
+    scan = FrameScan(emptyFrames)
+    if scope == 'Whole document':
+        scan.addPages(range(1, scribus.pageCount() + 1))
+    elif scope == 'Page range':
+        scan.addPages(parsePageRange(pageRange, scribus.pageCount()))
+    else:
+        scan.addSelection()
+    return scan
+
+def fillFrame(imageFrame, mode='fill', timer=None):
+    """ Scale and place the image of an image frame: mode 'fill', 'fit' or
+    'focal' (see PhotoBookImageInfo.fitImage). Takes one scale and one
+    offset call, with the image size read from the file header; an image
+    Pillow cannot read (e.g. PDF, EPS) is measured by Scribus instead.
+    The document unit must be points (see DocumentBatch). With a
+    StageTimer, the time is added to the stages 'header' and 'scribus'."""
+    start = time.perf_counter()
+    frameSize = scribus.getSize(imageFrame)
+    imageFile = scribus.getImageFile(imageFrame)
+    headerStart = time.perf_counter()
+    try:
+        info = imageInfo(imageFile)
+        headerEnd = time.perf_counter()
+        stretch = scaleToFrame(frameSize, info)
+        focus = info.focus
+    except Exception:    # not readable by Pillow: let Scribus measure the image
+        headerEnd = time.perf_counter()
+        scribus.setScaleImageToFrame(True, False, imageFrame)
+        scribus.setScaleImageToFrame(False, False, imageFrame)
+        stretch = scribus.getImageScale(imageFrame)
+        focus = None
+    scale, offset = fitImage(frameSize, stretch, mode, focus)
+    scribus.setImageScale(scale, scale, imageFrame)
+    scribus.setImageOffset(offset[0], offset[1], imageFrame)
+    if timer is not None:
+        timer.add(imageFrame, 'header', headerEnd - headerStart)
+        timer.add(imageFrame, 'scribus', time.perf_counter() - start
+            - (headerEnd - headerStart))
+
+def readPreset(configFile, preset):
+    """ Return the options (dict of texts) of a preset: a section of a
+    .cfg file, with the [DEFAULT] values for what it leaves out; preset
+    'DEFAULT' gives the defaults only. Raises ValueError if there is no
+    such section."""
+    config = ConfigParser()
+    config.read(configFile)
+    if preset == 'DEFAULT':
+        return dict(config.defaults())
+    if not config.has_section(preset):
+        raise ValueError('No preset [%s] in %s.' % (preset, os.path.basename(configFile)))
+    return dict(config.items(preset))
+
+def presetArgument(argv=None):
+    """ Return the preset given on the command line of the script
+    ('--preset NAME', or 'DEFAULT' for '--headless'), or None (run with
+    the dialog)."""
+    argv = sys.argv[1:] if argv is None else argv
+    if '--preset' in argv and argv.index('--preset') + 1 < len(argv):
+        return argv[argv.index('--preset') + 1]
+    if '--headless' in argv:
+        return 'DEFAULT'
+    return None
+
+def openDocumentImageIndex():
+    """ Let imageInfo use the image index in the folder of the document.
+    Returns the ImageIndex (call its close at the end of the run), or None
+    if the document is not saved yet (or there is no sqlite3)."""
+    docName = scribus.getDocName()
+    if not docName or not os.path.isfile(docName):
+        return None
+    return openImageIndex(os.path.dirname(os.path.abspath(docName)))
+
+def reportSummary(title, done, scan, errors=(), notes=()):
+    """ Show one message box at the end of a run, if items were skipped
+    or failed or there are notes (statistics); else only a status message."""
+    lines = ['%d image frame(s) done.' % done]
+    for reason in sorted(scan.skipped):
+        lines.append('Skipped %d %s.' % (scan.skipped[reason], reason))
+    errors = list(errors)
+    if errors:
+        lines.append('%d image(s) skipped (processing error):' % len(errors))
+        lines.extend(errors[:10])
+        if len(errors) > 10:
+            lines.append('... and %d more.' % (len(errors) - 10))
+    if len(lines) == 1 and not notes:
+        scribus.statusMessage(lines[0])
+    elif len(lines) == 1:
+        scribus.messageBox(title, '\n'.join(lines + list(notes)),
+            scribus.ICON_INFORMATION, scribus.BUTTON_OK)
+    else:
+        scribus.messageBox(title, '\n'.join(lines + list(notes)),
+            scribus.ICON_WARNING, scribus.BUTTON_OK)
@@ -0,0 +1,921 @@
+#! /usr/bin/env python
+#-*- coding: utf-8 -*-
+'''
+VERSION: 1.0 of 2026-10-17
+AUTHOR: Rafferty River.
+LICENSE: GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY.
+
+DESCRIPTION & USAGE:
+This module is the Scribus-independent part of the script
+'PhotoBookImageCropResize.py': the crop box calculation and the
+Pillow crop, resize, color conversion and save of one image.
+It is not a script to run by itself.
+
+JPEG files are written with the encoder settings of a JpegProfile
+(quality, progressive, optimize, chroma subsampling). With a target size
+per image (kB) or in bits per pixel, the quality is searched in memory
+(encodeToTarget) so the file just fits.
+
+Each image takes one of three paths (choosePath): 'resample' when the
+frame needs fewer pixels than the crop box has (the image is reduced to
+the resolution), else 'crop' at native resolution (cropped and converted,
+not enlarged), or 'copy' when the frame shows the whole image in the
+format and color mode of the new file: the file is copied as is, without
+decoding or re-encoding it (outputSize gives the new image size). A
+cropped only image is saved with its effective resolution in the frame.
+
+With a CMYK profile (IccConversion), RGB images are converted to CMYK
+with LittleCMS (PIL.ImageCms) instead of Pillow's plain convert('CMYK'),
+from the profile embedded in the image (or the chosen RGB profile, sRGB by
+default) with a rendering intent; the CMYK profile is embedded in the new
+file. Building a transform takes far longer than applying it, so every
+transform is built once per process and kept (colorTransform); a pool
+that forks inherits the ones built before it starts (prepareTransforms).
+PIL.ImageCms and the process pool modules take long to import: they are
+imported when first needed (loadImageCms, processJobs with workers).
+
+Because it never imports the scribus module, its functions can
+run in the worker processes of a process pool (parallel mode of
+PhotoBookImageCropResize) and outside Scribus.
+
+The options of Crop and Resize that are handled here:
+- 'Quality' Fast shrinks big originals cheaply before the final
+  resampling (JPEG draft decoding, see cropResizeFast for figures);
+- with more than 1 'Parallel workers' the images are processed in a
+  process pool, one process per worker, with the same result (processJobs);
+- the frames showing the same image are processed one after the other,
+  so the image is decoded only once ('Image cache' in MB, see ImageCache);
+- images that need more than 'Memory per image' (MB, 0 = no limit) when
+  decoded, e.g. big scans, are decoded partially or in bands where the
+  file format allows it (cropResizeLowMemory).
+
+IMPORTANT REMARK: this module needs the Pillow (PIL) package
+to be installed in (Scribus) Python (https://python-pillow.org).
+Pillow is imported on first use (PhotoBookImageInfo.loadPillow), so the
+geometry (cropBox, outputSize) is available without it.
+'''
+##################################################
+# imports
+import sys, os, io, math, time, hashlib, shutil
+from collections import OrderedDict
+
+ImageCms = None    # PIL.ImageCms, imported on first use (see loadImageCms)
+_imageCmsTried = False
+
+from PhotoBookImageInfo import readImageInfo, loadPillow
+
+# resample filters (names of the PIL.Image filters: Pillow is imported on
+# first use, see loadPillow)
+RESAMPLE_FILTERS = ('BICUBIC', 'BILINEAR', 'LANCZOS')
+
+# 'Fast' quality: the image is first reduced cheaply to at least this many
+# times the target size (JPEG draft decoding, Image.reduce), then resampled.
+FAST_REDUCING_GAP = 2.0
+
+# default memory budget of the decoded image cache (ImageCache)
+DEFAULT_CACHE_MB = 512
+
+# default memory ceiling per source image (decoded); bigger images take the
+# low memory path (cropResizeLowMemory). 0 = no ceiling.
+DEFAULT_MAX_IMAGE_MB = 1024
+
+# filter support (in source pixels, when not shrinking) of the resample filters
+RESAMPLE_SUPPORT = {
+    'BILINEAR': 1.0,
+    'BICUBIC': 2.0,
+    'LANCZOS': 3.0,
+}
+
+# JPEG chroma subsampling: name -> Pillow value ('Default': 4:2:0 for
+# RGB, as Pillow chooses)
+JPEG_SUBSAMPLING = {'Default': -1, '4:4:4': 0, '4:2:2': 1, '4:2:0': 2}
+
+# ICC rendering intents (LittleCMS values)
+RENDERING_INTENTS = {
+    'Perceptual': 0,
+    'Relative colorimetric': 1,
+    'Saturation': 2,
+    'Absolute colorimetric': 3,
+}
+
+# paths of an image (see choosePath), with their text for the run summary
+PATH_RESAMPLE = 'resample'
+PATH_CROP = 'crop'
+PATH_COPY = 'copy'
+PATH_LABELS = OrderedDict([(PATH_RESAMPLE, 'resampled'),
+    (PATH_CROP, 'cropped at native resolution'), (PATH_COPY, 'copied as is')])
+
+# EXIF tag of the orientation (a copied file keeps it, a new file has none)
+EXIF_ORIENTATION = 0x0112
+
+# JPEG target size: lowest quality tried (a file that does not fit at this
+# quality is written at this quality)
+JPEG_MIN_TARGET_QUALITY = 30
+
+##################################################
+class JpegProfile:
+    """ Encoder settings of the JPEG files. The defaults are those of
+    Pillow. With targetKB (kB per image) or targetBpp (bits per pixel) the
+    quality is searched, with quality as the highest."""
+
+    def __init__(self, quality=75, progressive=False, optimize=False, subsampling='Default',
+        targetKB=0, targetBpp=0.0):
+        """ Setup basic things """
+        self.quality = int(quality)              # 1..100
+        self.progressive = bool(progressive)
+        self.optimize = bool(optimize)           # optimal Huffman tables (smaller, slower)
+        self.subsampling = subsampling           # see JPEG_SUBSAMPLING
+        self.targetKB = int(targetKB)            # 0 = no target
+        self.targetBpp = float(targetBpp)        # 0 = no target
+
+    def settings(self):
+        """ Return the settings as a dict (for the manifest)."""
+        return {
+            'quality': self.quality,
+            'progressive': self.progressive,
+            'optimize': self.optimize,
+            'subsampling': self.subsampling,
+            'targetKB': self.targetKB,
+            'targetBpp': self.targetBpp,
+        }
+
+    def options(self, quality=None):
+        """ Return the Image.save options (at another quality, if given)."""
+        return {
+            'quality': self.quality if quality is None else quality,
+            'progressive': self.progressive,
+            'optimize': self.optimize,
+            'subsampling': JPEG_SUBSAMPLING[self.subsampling],
+        }
+
+    def targetBytes(self, size):
+        """ Return the target file size of an image of size (pixels), or 0."""
+        if self.targetKB:
+            return self.targetKB * 1024
+        return int(self.targetBpp * size[0] * size[1] / 8)
+
+def parseJpegTarget(text):
+    """ Return (targetKB, targetBpp) of a text like '800kB', '1.5bpp',
+    '0' or ''. Raises ValueError for a bad target."""
+    text = text.strip().lower().replace(' ', '')
+    if text in ('', '0'):
+        return 0, 0.0
+    if text.endswith('bpp'):
+        bpp = float(text[:-3])
+        if not 0 < bpp <= 24:
+            raise ValueError('Bits per pixel must be within 0-24.')
+        return 0, bpp
+    for unit in ('kb', 'k'):
+        if text.endswith(unit):
+            text = text[:-len(unit)]
+            break
+    kB = int(text)
+    if kB < 1:
+        raise ValueError('Target size must be at least 1 kB.')
+    return kB, 0.0
+
+##################################################
+def loadImageCms():
+    """ Import PIL.ImageCms (on first use). Returns it, or None if Pillow
+    is built without LittleCMS."""
+    global ImageCms, _imageCmsTried
+    if not _imageCmsTried:
+        try:
+            from PIL import ImageCms as imageCms
+            ImageCms = imageCms
+        except ImportError:
+            pass
+        _imageCmsTried = True
+    return ImageCms
+
+class IccConversion:
+    """ ICC color conversion to CMYK. Without cmykProfile (an .icc file),
+    Pillow's plain convert('CMYK') is used. rgbProfile is the profile of
+    RGB images without embedded profile (or if useEmbedded is off); empty
+    means sRGB."""
+
+    def __init__(self, cmykProfile='', rgbProfile='', intent='Perceptual', useEmbedded=True):
+        """ Setup basic things """
+        self.cmykProfile = cmykProfile
+        self.rgbProfile = rgbProfile
+        self.intent = intent                      # see RENDERING_INTENTS
+        self.useEmbedded = bool(useEmbedded)
+
+    def settings(self):
+        """ Return the settings as a dict (for the manifest)."""
+        return {
+            'cmykProfile': os.path.abspath(self.cmykProfile),
+            'rgbProfile': os.path.abspath(self.rgbProfile) if self.rgbProfile else 'sRGB',
+            'intent': self.intent,
+            'useEmbedded': self.useEmbedded,
+        }
+
+    def check(self):
+        """ Raise ValueError (with a message for the user) if the
+        profiles cannot be used."""
+        if not self.cmykProfile:
+            return
+        if loadImageCms() is None:
+            raise ValueError('This Pillow has no color management (ImageCms).')
+        if self.intent not in RENDERING_INTENTS:
+            raise ValueError('Rendering intent must be one of: '
+                + ', '.join(RENDERING_INTENTS) + '.')
+        for path, colorSpace in ((self.cmykProfile, 'CMYK'), (self.rgbProfile, 'RGB')):
+            if not path:
+                continue
+            try:
+                found = _profile(path).profile.xcolor_space.strip()
+            except (OSError, ImageCms.PyCMSError):
+                raise ValueError('Cannot read profile %s.' % os.path.basename(path))
+            if found != colorSpace:
+                raise ValueError('%s is not a profile for %s.' % (os.path.basename(path),
+                    colorSpace))
+
+_profiles = {}      # path, 'sRGB' or sha1 of an embedded profile -> ImageCmsProfile
+_transforms = {}    # (source key, CMYK profile, intent) -> transform, or None
+
+def _profile(key, data=None):
+    """ Return the (cached) profile of a file, of 'sRGB' or of the
+    embedded profile data."""
+    profile = _profiles.get(key)
+    if profile is None:
+        loadImageCms()
+        if data is not None:
+            profile = ImageCms.ImageCmsProfile(io.BytesIO(data))
+        elif key == 'sRGB':
+            profile = ImageCms.ImageCmsProfile(ImageCms.createProfile('sRGB'))
+        else:
+            profile = ImageCms.ImageCmsProfile(key)
+        _profiles[key] = profile
+    return profile
+
+def colorTransform(icc, embedded=None):
+    """ Return the RGB -> CMYK transform of an IccConversion, from the
+    embedded profile (data) of an image if given and usable, else from
+    icc.rgbProfile. Transforms are kept for the life of the process."""
+    loadImageCms()
+    if embedded and icc.useEmbedded:
+        sourceKey = hashlib.sha1(embedded).hexdigest()
+        key = (sourceKey, icc.cmykProfile, icc.intent)
+        if key not in _transforms:
+            try:
+                _transforms[key] = ImageCms.buildTransform(_profile(sourceKey, embedded),
+                    _profile(icc.cmykProfile), 'RGB', 'CMYK', RENDERING_INTENTS[icc.intent])
+            except (OSError, ImageCms.PyCMSError):
+                _transforms[key] = None    # e.g. not an RGB profile: use icc.rgbProfile
+        if _transforms[key] is not None:
+            return _transforms[key]
+    sourceKey = icc.rgbProfile or 'sRGB'
+    key = (sourceKey, icc.cmykProfile, icc.intent)
+    if key not in _transforms:
+        _transforms[key] = ImageCms.buildTransform(_profile(sourceKey),
+            _profile(icc.cmykProfile), 'RGB', 'CMYK', RENDERING_INTENTS[icc.intent])
+    return _transforms[key]
+
+def convertToCmyk(image, icc, embedded=None):
+    """ Return an image converted to CMYK with the ICC profiles of an
+    IccConversion (embedded: profile data of the source image, or None)."""
+    if image.mode != 'RGB':
+        if image.mode not in ('RGBA', 'RGBX', 'P', 'PA'):
+            embedded = None    # e.g. a greyscale profile
+        image = image.convert('RGB')
+    transform = colorTransform(icc, embedded)
+    return ImageCms.applyTransform(image, transform)
+
+def prepareTransforms(jobs):
+    """ Build the transforms from the chosen RGB profiles of the jobs in
+    this process (the ones from embedded profiles are built on first use).
+    A profile that fails here fails again in its jobs, which report it."""
+    for job in jobs:
+        if job.mode == 'CMYK' and job.icc.cmykProfile:
+            try:
+                colorTransform(job.icc)
+            except (OSError, ImageCms.PyCMSError):
+                pass
+
+##################################################
+class CropJob:
+    """ Everything needed to crop and resize the image of one frame.
+    All values are read from Scribus beforehand, so a job can be sent
+    to another process."""
+
+    def __init__(self, imageFrame, imgFile, newImageFile, frameSizeInches,
+        frameSizePoints, imageOffset, imageScale, resolution=300, mode='RGB',
+        resample='BICUBIC', quality='Best', maxImageMB=DEFAULT_MAX_IMAGE_MB, jpeg=None,
+        icc=None):
+        """ Setup basic things """
+        self.imageFrame = imageFrame
+        self.imgFile = imgFile
+        self.newImageFile = newImageFile
+        self.frameSizeInches = frameSizeInches    # (width, height) in inches
+        self.frameSizePoints = frameSizePoints    # (width, height) in points
+        self.imageOffset = imageOffset            # Scribus imageX/YOffset
+        self.imageScale = imageScale              # Scribus imageX/YScale
+        self.resolution = int(resolution)
+        self.mode = mode
+        self.resample = resample
+        self.quality = quality                    # 'Best' or 'Fast'
+        self.maxImageMB = int(maxImageMB)         # 0 = no ceiling
+        self.jpeg = jpeg or JpegProfile()         # for .jpg files
+        self.icc = icc or IccConversion()         # for mode 'CMYK'
+        # set by processJob
+        self.imageSize = None
+        self.box = None
+        self.newSize = None
+        self.path = None                          # PATH_RESAMPLE, PATH_CROP or PATH_COPY
+        self.newInfo = None                       # ImageInfo of newImageFile
+        self.timings = {}                         # stage -> seconds (see PhotoBookTiming)
+
+    def settings(self):
+        """ Return the settings that change the output file (besides the crop)."""
+        settings = {
+            'resolution': self.resolution,
+            'mode': self.mode,
+            'fileFormat': os.path.splitext(self.newImageFile)[1].lower(),
+            'resample': self.resample,
+            'quality': self.quality,
+        }
+        # the default profile writes what older versions wrote: their
+        # manifest entries stay up to date
+        if (settings['fileFormat'] == '.jpg'
+            and self.jpeg.settings() != JpegProfile().settings()):
+            settings['jpeg'] = self.jpeg.settings()
+        if self.mode == 'CMYK' and self.icc.cmykProfile:
+            settings['icc'] = self.icc.settings()
+        return settings
+
+##################################################
+def cropBox(imageSize, frameSizePoints, imageOffset, imageScale):
+    """ Return the crop box (left, top, right, bottom) of the image part
+    that is visible in the frame."""
+    imageSizeX, imageSizeY = imageSize
+    frameSizeX, frameSizeY = frameSizePoints
+    imageXOffset, imageYOffset = imageOffset
+    imageXScale, imageYScale = imageScale
+
+    left = int(imageXOffset * -1)
+    top = int(imageYOffset * -1)
+    right = int(left + (frameSizeX / imageXScale))
+    bottom = int(top + (frameSizeY / imageYScale))
+
+    # Limit crop to image area
+    # (avoid black areas due to crop bigger than image)
+    if right > imageSizeX:
+        right = imageSizeX
+    if bottom > imageSizeY:
+        bottom = imageSizeY
+    if imageXOffset > 0:
+        left = 0
+    if imageYOffset > 0:
+        top = 0
+    return (left, top, right, bottom)
+
+def targetSize(box, frameSizeInches, resolution):
+    """ Return the new image (width, height) in pixels for a crop box:
+    the frame size at the given resolution, fitted proportionally."""
+    left, top, right, bottom = box
+    frameSizeX, frameSizeY = frameSizeInches
+    newWidth = int(frameSizeX * resolution)
+    newHeight = int(frameSizeY * resolution)
+
+    proportionX = newWidth / (right-left)
+    proportionY = newHeight / (bottom-top)
+    if proportionX > proportionY:
+        newHeight = int(newWidth * (bottom-top) /(right-left))
+    else:
+        newWidth = int(newHeight * (right-left) / (bottom-top))
+    return (newWidth, newHeight)
+
+def outputSize(box, frameSizeInches, resolution):
+    """ Return the new image (width, height) in pixels for a crop box: its
+    targetSize, or the size of the box itself if the frame needs at least
+    as many pixels (the image is not enlarged)."""
+    left, top, right, bottom = box
+    newSize = targetSize(box, frameSizeInches, resolution)
+    # proportional: one direction tells (the other may differ by rounding)
+    if newSize[0] >= right - left or newSize[1] >= bottom - top:
+        return (right - left, bottom - top)
+    return newSize
+
+def choosePath(job, image):
+    """ Return the path of a CropJob (crop box and new size filled in) for
+    its opened, not necessarily loaded, source image: PATH_RESAMPLE if it
+    is reduced, else PATH_COPY if the file can be used as is (whole image,
+    same file format and color mode, no EXIF orientation, no JPEG target),
+    else PATH_CROP."""
+    left, top, right, bottom = job.box
+    if job.newSize != (right - left, bottom - top):
+        return PATH_RESAMPLE
+    ext = os.path.splitext(job.newImageFile)[1].lower()
+    if (job.box != (0, 0) + image.size
+        or image.format != loadPillow().registered_extensions().get(ext)
+        or image.mode != job.mode
+        or image.getexif().get(EXIF_ORIENTATION, 1) != 1
+        or (ext == '.jpg' and job.jpeg.targetBytes(job.newSize))):
+        return PATH_CROP
+    return PATH_COPY
+
+def pathSummary(paths):
+    """ Return the number of images per path ({path: count}) as text."""
+    return 'Images: %s.' % ', '.join('%d %s' % (paths.get(path, 0), label)
+        for path, label in PATH_LABELS.items())
+
+def cropResizeFast(image, box, newSize, resample, mode):
+    """ Crop and resize an image that is not loaded yet, reducing it cheaply
+    before the final resample: JPEG files are decoded at 1/2, 1/4 or 1/8 scale
+    (draft mode), other files are shrunk with Image.reduce (reducing_gap).
+    For a greyscale or B&W target mode the image is converted to 'L' before
+    resizing (by the JPEG decoder itself, if possible).
+
+    Maximum difference to the 'Best' quality path (full decode, crop,
+    resize), measured on 24 MP JPEG and PNG files reduced 3-20x with all
+    three resample filters: the mean absolute difference per channel is
+    below 1 level (of 255), 99.9% of the pixels differ by at most 5 levels
+    and single pixels along sharp edges by at most 12 levels."""
+    greyscale = mode in ('L', '1')
+    left, top, right, bottom = box
+    imageSizeX, imageSizeY = image.size
+    if image.format == 'JPEG':
+        scale = min((right - left) / newSize[0], (bottom - top) / newSize[1])
+        requestedSize = (max(1, int(imageSizeX / scale * FAST_REDUCING_GAP)),
+            max(1, int(imageSizeY / scale * FAST_REDUCING_GAP)))
+        if image.draft('L' if greyscale else None, requestedSize) is not None:
+            factorX = imageSizeX / image.size[0]
+            factorY = imageSizeY / image.size[1]
+            left, right = left / factorX, right / factorX
+            top, bottom = top / factorY, bottom / factorY
+
+    # crop whole pixels, keep the fraction for the resample box
+    cropLeft, cropTop = int(math.floor(left)), int(math.floor(top))
+    cropRight = min(int(math.ceil(right)), image.size[0])
+    cropBottom = min(int(math.ceil(bottom)), image.size[1])
+    newImage = image.crop((cropLeft, cropTop, cropRight, cropBottom))
+    if greyscale and newImage.mode in ('RGB', 'RGBA', 'CMYK', 'YCbCr', 'P'):
+        newImage = newImage.convert('L')
+    return newImage.resize(newSize, resample,
+        box=(left - cropLeft, top - cropTop,
+            min(right, cropRight) - cropLeft, min(bottom, cropBottom) - cropTop),
+        reducing_gap=FAST_REDUCING_GAP)
+
+##################################################
+# low memory processing of very big source images
+
+def _tile(template, codec, extents, offset, args):
+    """ Return a tile descriptor of the same type as template
+    (a named tuple in recent Pillow versions, a tuple before)."""
+    if hasattr(template, '_replace'):
+        return type(template)(codec, extents, offset, args)
+    return (codec, extents, offset, args)
+
+def _rawStride(mode, rawmode, width):
+    """ Return the number of bytes of one row of raw (uncompressed) data,
+    by feeding the raw decoder rows of increasing bit depth."""
+    Image = loadPillow()
+    for bits in (1, 2, 4, 8, 12, 16, 24, 32, 48, 64, 96, 128):
+        stride = (bits * width + 7) // 8
+        decoder = Image._getdecoder(mode, 'raw', (rawmode, 0, 1))
+        decoder.setimage(Image.new(mode, (width, 1)).im, (0, 0, width, 1))
+        if decoder.decode(b'\0' * stride)[0] < 0:    # row complete
+            return stride
+    raise ValueError('Unknown raw mode ' + rawmode)
+
+def rowAddressable(image):
+    """ True if any rows of a not yet loaded image can be decoded without
+    the rows above them: raw (uncompressed) TIFF strips or tiles, BMP, PPM."""
+    if len(image.tile) == 0:
+        return False
+    for tile in image.tile:
+        args = tile[3] if isinstance(tile[3], tuple) else (tile[3],)
+        if tile[0] != 'raw' or (len(args) > 2 and args[2] != 1):
+            return False    # compressed, or stored bottom-up
+    return True
+
+def loadRows(image, top, bottom):
+    """ Decode only the rows top..bottom of a not yet loaded image, if its
+    file layout allows it: raw data is read from row top on, non-interlaced
+    PNG data up to row bottom. Returns the source row of the first row of
+    the image (top or 0), or None if a full decode is needed (nothing done).
+    Reading the other rows of the image is not possible afterwards."""
+    width = image.size[0]
+    if rowAddressable(image):
+        tiles = []
+        for tile in image.tile:
+            codec, (x0, y0, x1, y1), offset, args = tile
+            if y1 <= top or y0 >= bottom:
+                continue
+            args = args if isinstance(args, tuple) else (args,)
+            rawmode = args[0]
+            stride = args[1] if len(args) > 1 else 0
+            if stride == 0:
+                stride = _rawStride(image.mode, rawmode, x1 - x0)
+            rowTop, rowBottom = max(y0, top), min(y1, bottom)
+            tiles.append(_tile(tile, codec, (x0, rowTop - top, x1, rowBottom - top),
+                offset + (rowTop - y0) * stride, (rawmode, stride, 1)))
+        image._size = (width, bottom - top)
+        image.tile = tiles
+        image.load()
+        return top
+    if (image.format == 'PNG' and len(image.tile) == 1
+        and not image.info.get('interlace')):
+        # the decoder stops as soon as the (smaller) image is filled
+        tile = image.tile[0]
+        image._size = (width, bottom)
+        image.tile = [_tile(tile, tile[0], (0, 0, width, bottom), tile[2], tile[3])]
+        image.load()
+        return 0
+    return None
+
+def streamCropResize(imgFile, box, newSize, resample, maxBytes):
+    """ Crop and resize a row addressable image (see rowAddressable) in
+    horizontal bands, each decoding at most about maxBytes of source rows.
+    Each band is resampled with the filter support of the rows around it,
+    so the result is visually identical to resizing the whole crop at once:
+    Pillow rounds the vertical pass per band, so a few pixels (below 0.01%
+    of the values, measured on noise) differ by 1 level (of 255)."""
+    Image = loadPillow()
+    left, top, right, bottom = box
+    newWidth, newHeight = newSize
+    image = Image.open(imgFile)
+    rowBytes = max(1, imageBytes(image) // image.size[1])
+    image.close()
+    scaleY = (bottom - top) / newHeight
+    support = dict((getattr(Image, name), value)
+        for name, value in RESAMPLE_SUPPORT.items()).get(resample, 3.0)
+    margin = int(math.ceil(support * max(scaleY, 1.0))) + 1
+    bandRows = max(1, int((maxBytes // rowBytes - 2 * margin) / scaleY))
+
+    newImage = None
+    for bandTop in range(0, newHeight, bandRows):
+        bandBottom = min(bandTop + bandRows, newHeight)
+        y0 = top + bandTop * scaleY
+        y1 = top + bandBottom * scaleY
+        rowTop = max(top, int(math.floor(y0)) - margin)
+        rowBottom = min(bottom, int(math.ceil(y1)) + margin)
+        band = Image.open(imgFile)
+        loadRows(band, rowTop, rowBottom)
+        rows = band.crop((left, 0, right, rowBottom - rowTop))
+        band.close()
+        part = rows.resize((newWidth, bandBottom - bandTop), resample,
+            box=(0, y0 - rowTop, right - left, y1 - rowTop))
+        del rows
+        if newImage is None:
+            newImage = Image.new(part.mode, newSize)
+            if part.mode == 'P':
+                newImage.putpalette(part.getpalette())
+        newImage.paste(part, (0, bandTop))
+    return newImage
+
+def cropResizeLowMemory(imgFile, image, box, newSize, resample, mode, maxBytes):
+    """ Crop and resize a not yet loaded source image that takes more than
+    maxBytes of memory when decoded, decoding as little as the file allows:
+    - JPEG: decoded at 1/2, 1/4 or 1/8 scale (as with 'Fast' quality),
+    - raw (uncompressed) TIFF, BMP, PPM: only the rows of the crop, and in
+      bands of at most maxBytes if the crop itself is bigger (streamed),
+    - non-interlaced PNG: the rows down to the bottom of the crop.
+    Other files (e.g. compressed TIFF) are decoded completely.
+    Decoding only the rows of the crop gives the same result as a full
+    decode; streamed bands differ by at most 1 level (see
+    streamCropResize), JPEG files as with 'Fast' quality."""
+    left, top, right, bottom = box
+    if image.format == 'JPEG':
+        return cropResizeFast(image, box, newSize, resample, mode)
+    if rowAddressable(image):
+        rowBytes = imageBytes(image) // image.size[1]
+        if (bottom - top) * rowBytes > maxBytes:
+            image.close()
+            return streamCropResize(imgFile, box, newSize, resample, maxBytes)
+    firstRow = loadRows(image, top, bottom)
+    if firstRow is None:
+        firstRow = 0
+    newImage = image.crop((left, top - firstRow, right, bottom - firstRow))
+    image.close()    # release the source right away
+    return newImage.resize(newSize, resample)
+
+def processJob(job, cache=None):
+    """ Crop, resize, convert and save the image of a CropJob, or only
+    crop and convert it, or copy its file (job.path, see choosePath).
+    The decoded source image is taken from (and kept in) an ImageCache,
+    if given. Source images bigger than job.maxImageMB (when decoded) take
+    the low memory path (cropResizeLowMemory). Intermediate images are
+    released as soon as possible. Errors are raised to the caller.
+    Returns the job, with the image size, crop box, new size and path
+    filled in, and the seconds of each stage in job.timings (the 'Fast'
+    and low memory paths decode, crop and resize in one stage)."""
+    Image = loadPillow()
+    if Image is None:
+        raise OSError('Pillow (PIL) is not installed')
+    timings = job.timings = {}
+    lapStart = [time.perf_counter()]
+    def lap(stage):
+        now = time.perf_counter()
+        timings[stage] = timings.get(stage, 0.0) + now - lapStart[0]
+        lapStart[0] = now
+
+    image = cache.get(job.imgFile) if cache is not None else None
+    keep = image is not None    # the image belongs to the cache: do not close it
+    if image is None:
+        image = Image.open(job.imgFile)
+    embedded = image.info.get('icc_profile')
+    lap('open')
+    try:
+        box = cropBox(image.size, job.frameSizePoints, job.imageOffset, job.imageScale)
+        newWidth, newHeight = outputSize(box, job.frameSizeInches, job.resolution)
+        job.imageSize, job.box, job.newSize = image.size, box, (newWidth, newHeight)
+        job.path = choosePath(job, image)
+        if job.path == PATH_COPY:
+            shutil.copyfile(job.imgFile, job.newImageFile)
+            lap('copy')
+            job.newInfo = readImageInfo(job.newImageFile)
+            lap('header')
+            return job
+        resample = getattr(Image, job.resample if job.resample in RESAMPLE_FILTERS else 'BILINEAR')
+        maxBytes = job.maxImageMB * 1024 * 1024
+        lowMemory = not keep and maxBytes > 0 and imageBytes(image) > maxBytes
+
+        # 'Fast' JPEG draft decoding is cheaper than keeping the full image
+        if (cache is not None and not keep and not lowMemory
+            and not (job.quality == 'Fast' and image.format == 'JPEG')):
+            image.load()
+            keep = cache.put(job.imgFile, image)
+
+        if lowMemory:
+            newImage = cropResizeLowMemory(job.imgFile, image, box, (newWidth,newHeight),
+                resample, job.mode, maxBytes)
+            lap('decode+crop+resize')
+        elif job.path == PATH_CROP:
+            image.load()
+            lap('decode')
+            newImage = image.crop(box)    # no resampling, 'Fast' or 'Best'
+            if not keep:
+                image.close()
+            lap('crop')
+        elif job.quality == 'Fast':
+            newImage = cropResizeFast(image, box, (newWidth,newHeight), resample, job.mode)
+            lap('decode+crop+resize')
+        else:
+            image.load()    # what crop would do: timed on its own
+            lap('decode')
+
+            # Cropping
+            newImage = image.crop(box)
+            if not keep:
+                image.close()    # release the source right away
+            lap('crop')
+
+            # Resize
+            newImage = newImage.resize((newWidth,newHeight), resample)
+            lap('resize')
+    finally:
+        if not keep:
+            image.close()
+
+    # Color space conversion
+    if newImage.mode != job.mode:
+        if job.mode == 'CMYK' and job.icc.cmykProfile:
+            newImage = convertToCmyk(newImage, job.icc, embedded)
+        else:
+            newImage = newImage.convert(job.mode)
+    lap('convert')
+
+    data = encodeImage(newImage, job)
+    newImage.close()
+    lap('encode')
+    with open(job.newImageFile, 'wb') as newFile:
+        newFile.write(data)
+    lap('write')
+    job.newInfo = readImageInfo(job.newImageFile)    # header only, just written
+    lap('header')
+    return job
+
+def encodeImage(image, job):
+    """ Return the new image of a CropJob as file data (bytes), in the
+    format of job.newImageFile. JPEG files get the encoder settings of
+    job.jpeg (at the quality that fits its target, if any). An ICC
+    converted image gets its CMYK profile embedded. The new file has the
+    resolution, or the effective resolution of a cropped only image."""
+    fileOptions = {'dpi': (job.resolution, job.resolution)}
+    if job.path == PATH_CROP:
+        # Scribus imageX/YScale: points of the page per image pixel
+        fileOptions['dpi'] = (int(round(72.0 / abs(job.imageScale[0]))),
+            int(round(72.0 / abs(job.imageScale[1]))))
+    if image.mode == 'CMYK' and job.icc.cmykProfile:
+        fileOptions['icc_profile'] = _profile(job.icc.cmykProfile).tobytes()
+    ext = os.path.splitext(job.newImageFile)[1].lower()
+    if ext != '.jpg':
+        output = io.BytesIO()
+        image.save(output, loadPillow().registered_extensions()[ext], **fileOptions)
+        return output.getvalue()
+    targetBytes = job.jpeg.targetBytes(image.size)
+    if not targetBytes:
+        return encodeJpeg(image, job.jpeg.options(), fileOptions)
+    return encodeToTarget(image, job.jpeg, targetBytes, fileOptions)
+
+def encodeJpeg(image, options, fileOptions):
+    """ Return the JPEG file of an image as bytes (in memory)."""
+    output = io.BytesIO()
+    image.save(output, 'JPEG', **dict(fileOptions, **options))
+    return output.getvalue()
+
+def encodeToTarget(image, profile, targetBytes, fileOptions):
+    """ Return the JPEG file (bytes) of an image at the highest quality
+    (JPEG_MIN_TARGET_QUALITY .. profile.quality) that is not bigger than
+    targetBytes, else at the lowest quality. Bisection on the quality
+    (the file size grows with it): about 6 encodes in memory."""
+    low, high = JPEG_MIN_TARGET_QUALITY, max(JPEG_MIN_TARGET_QUALITY, profile.quality)
+    best = lowest = None
+    while low <= high:
+        quality = (low + high) // 2
+        data = encodeJpeg(image, profile.options(quality), fileOptions)
+        if len(data) <= targetBytes:
+            best = data
+            low = quality + 1
+        else:
+            if quality == JPEG_MIN_TARGET_QUALITY:
+                lowest = data
+            high = quality - 1
+    return best or lowest
+
+##################################################
+# decoded image cache
+
+def imageBytes(image):
+    """ Return the memory size of a decoded image (Pillow keeps 4 bytes
+    per pixel for images with more than 1 band)."""
+    if len(image.getbands()) > 1 or image.mode in ('I', 'F'):
+        bytesPerPixel = 4
+    elif image.mode.startswith('I;16'):
+        bytesPerPixel = 2
+    else:
+        bytesPerPixel = 1
+    return image.size[0] * image.size[1] * bytesPerPixel
+
+class ImageCache:
+    """ Least recently used cache of decoded source images, limited to
+    maxBytes. Shared by the jobs of one run, so a source image placed in
+    several frames is decoded only once."""
+
+    def __init__(self, maxBytes=DEFAULT_CACHE_MB * 1024 * 1024):
+        """ Setup basic things """
+        self.maxBytes = maxBytes
+        self.images = OrderedDict()    # path -> decoded image
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, path):
+        """ Return the decoded image of a file, or None."""
+        key = os.path.normcase(os.path.abspath(path))
+        image = self.images.get(key)
+        if image is None:
+            self.misses += 1
+            return None
+        self.images.move_to_end(key)
+        self.hits += 1
+        return image
+
+    def put(self, path, image):
+        """ Keep a decoded image, evicting the least recently used ones
+        to stay within the memory budget. Returns False if the image is
+        bigger than the budget (and not kept)."""
+        size = imageBytes(image)
+        if size > self.maxBytes:
+            return False
+        key = os.path.normcase(os.path.abspath(path))
+        if key in self.images:
+            self.nbytes -= imageBytes(self.images.pop(key))
+        self.images[key] = image
+        self.nbytes += size
+        while self.nbytes > self.maxBytes:
+            oldKey, oldImage = self.images.popitem(last=False)
+            self.nbytes -= imageBytes(oldImage)
+            self.evictions += 1
+        return key in self.images
+
+    def clear(self):
+        """ Release all images."""
+        self.images.clear()
+        self.nbytes = 0
+
+    def stats(self):
+        """ Return (hits, misses, evictions)."""
+        return (self.hits, self.misses, self.evictions)
+
+    def addStats(self, stats):
+        """ Add the statistics of another cache (of a worker process)."""
+        self.hits += stats[0]
+        self.misses += stats[1]
+        self.evictions += stats[2]
+
+    def summary(self):
+        """ Return the statistics as text."""
+        return ('Image cache: %d hit(s), %d miss(es), %d eviction(s).'
+            % (self.hits, self.misses, self.evictions))
+
+##################################################
+# parallel processing
+
+def _poolContext():
+    """ Return the multiprocessing context for the process pool.
+    Inside Scribus, sys.executable is Scribus itself and not Python,
+    so spawned workers have to be pointed at the Python interpreter
+    of the embedded runtime."""
+    import multiprocessing
+    context = multiprocessing.get_context()
+    if context.get_start_method() == 'fork':
+        return context
+    if 'python' in os.path.basename(sys.executable).lower():
+        return context
+    for candidate in (os.path.join(sys.exec_prefix, 'python.exe'),
+            os.path.join(sys.exec_prefix, 'bin', 'python3'),
+            os.path.join(os.path.dirname(sys.executable), 'python.exe')):
+        if os.path.isfile(candidate):
+            context.set_executable(candidate)
+            break
+    return context
+
+def _runJob(job, cache=None):
+    """ Process one job in this process, returning (job, error)."""
+    try:
+        return processJob(job, cache), None
+    except Exception as err:
+        return job, err
+
+def groupBySource(jobs):
+    """ Return the jobs as lists of jobs with the same source file, in the
+    order of the first job of each source file."""
+    groups = OrderedDict()
+    for job in jobs:
+        groups.setdefault(os.path.normcase(os.path.abspath(job.imgFile)), []).append(job)
+    return list(groups.values())
+
+def processJobGroup(jobs, cacheBytes=0):
+    """ Process the jobs of one source file (in a worker process), decoding
+    the source only once. Returns ([(job, error)], cache statistics)."""
+    cache = ImageCache(cacheBytes)
+    results = [_runJob(job, cache) for job in jobs]
+    return results, cache.stats()
+
+def processJobs(jobs, workers=1, cache=None, cancel=None):
+    """ Process CropJobs and yield (job, error) for each job as it finishes;
+    error is None on success (the job is then the one returned by processJob).
+    Jobs with the same source file are processed one after the other, so an
+    ImageCache decodes each source only once. With more than 1 worker, the
+    jobs of each source file run as one task in a process pool; the results
+    are still yielded in the calling thread, so the caller can relink the
+    frames in Scribus. If the pool cannot be started (or breaks down), the
+    remaining jobs run in this process.
+    When cancel (a threading.Event) is set, no more jobs are started: the
+    job running now (in a pool: the source files being processed) is
+    finished and yielded, the others are left out."""
+    groups = groupBySource(jobs)
+    prepareTransforms(jobs)
+    pool = None
+    if workers > 1 and len(groups) > 1:
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+        from concurrent.futures.process import BrokenProcessPool
+        try:
+            pool = ProcessPoolExecutor(max_workers=min(workers, len(groups)),
+                mp_context=_poolContext())
+        except (OSError, ValueError, NotImplementedError):
+            pool = None
+    if pool is None:
+        for group in groups:
+            for job in group:
+                if cancel is not None and cancel.is_set():
+                    return
+                yield _runJob(job, cache)
+        return
+
+    cacheBytes = cache.maxBytes if cache is not None else 0
+    with pool:
+        futures = {}
+        for group in groups:
+            try:
+                futures[pool.submit(processJobGroup, group, cacheBytes)] = group
+            except BrokenProcessPool:
+                for job in group:
+                    yield _runJob(job, cache)
+        for future in as_completed(futures):
+            if cancel is not None and cancel.is_set():
+                for pending in futures:
+                    pending.cancel()    # only the tasks that did not start
+            if future.cancelled():
+                continue
+            group = futures[future]
+            try:
+                results, stats = future.result()
+            except BrokenProcessPool:
+                for job in group:
+                    yield _runJob(job, cache)
+                continue
+            except Exception as err:
+                for job in group:
+                    yield job, err
+                continue
+            if cache is not None:
+                cache.addStats(stats)
+            for result in results:
+                yield result
@@ -0,0 +1,321 @@
+#! /usr/bin/env python
+#-*- coding: utf-8 -*-
+'''
+VERSION: 1.0 of 2026-10-17
+AUTHOR: Rafferty River.
+LICENSE: GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY.
+
+DESCRIPTION & USAGE:
+This module keeps a record of the "_cropped" files made by the script
+'PhotoBookImageCropResize.py', so a re-run can skip every frame whose
+"_cropped" file is still up to date. It is not a script to run by itself.
+
+The record is a JSON file 'PhotoBookCropManifest.json' in each image
+folder. For every "_cropped" file it holds the source file (path,
+modification time and size), the crop box, the new image size, the path
+it was made by (resampled, cropped only or copied) and the settings used
+(resolution, color mode, file format, resampling, ...).
+A "_cropped" file that is linked again is mapped back to its original,
+so it is never cropped into "_cropped_cropped".
+Frames showing the same crop of an image share its "_cropped" file; every
+other crop of that image in a run gets a file of its own ("_cropped2",
+"_cropped3", ..., see CropOutputs), so one frame never overwrites the
+crop of another, not even of a frame outside the scope of the run.
+Several runs may save the manifest of a folder at the same time (e.g. the
+shards of PhotoBookSlaBatch): each merges its entries into the file under
+a lock file and writes a temporary file of its own.
+'''
+##################################################
+# imports
+import os, json, math, time, tempfile
+
+from PhotoBookCropEngine import cropBox, outputSize, PATH_RESAMPLE
+
+MANIFEST_FILENAME = 'PhotoBookCropManifest.json'
+MANIFEST_VERSION = 1
+# a lock file older than this many seconds is left over from a failed run
+MANIFEST_LOCK_SECONDS = 30
+
+##################################################
+def fileStat(path):
+    """ Return [modification time in ns, size] of a file, or None."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+def normPath(path):
+    """ Return the key used for a file path in the manifest."""
+    return os.path.normcase(os.path.abspath(path))
+
+def originalGeometry(entry, imageOffset, imageScale):
+    """ Translate the image offset and scale of a frame showing a "_cropped"
+    file into the offset and scale of the same view on its original."""
+    left, top, right, bottom = entry['box']
+    newWidth, newHeight = entry['newSize']
+    ratioX = (right - left) / newWidth    # original pixels per cropped pixel
+    ratioY = (bottom - top) / newHeight
+    return ((imageOffset[0] * ratioX - left, imageOffset[1] * ratioY - top),
+        (imageScale[0] / ratioX, imageScale[1] / ratioY))
+
+def croppedGeometry(entry, imageOffset, imageScale):
+    """ Inverse of originalGeometry: translate the image offset and scale of
+    a frame showing an original into the same view on its "_cropped" file."""
+    left, top, right, bottom = entry['box']
+    newWidth, newHeight = entry['newSize']
+    ratioX = (right - left) / newWidth
+    ratioY = (bottom - top) / newHeight
+    return (((imageOffset[0] + left) / ratioX, (imageOffset[1] + top) / ratioY),
+        (imageScale[0] * ratioX, imageScale[1] * ratioY))
+
+def sameCrop(crop, other):
+    """ True if a crop (crop box, new size) is the same as another one:
+    the new sizes differ by at most 1 pixel, the crop boxes by at most one
+    pixel of the other new image (a view mapped back from a "_cropped"
+    file is rounded to its pixels, which the new size rounds down)."""
+    (left, top, right, bottom), (newWidth, newHeight) = other
+    tolerance = max(1, int(math.ceil(max((right - left) / max(newWidth, 1),
+        (bottom - top) / max(newHeight, 1)))))
+    return (all(abs(a - b) <= tolerance for a, b in zip(crop[0], other[0]))
+        and all(abs(a - b) <= 1 for a, b in zip(crop[1], other[1])))
+
+def lockFolder(folder):
+    """ Take the manifest lock of a folder: return the path of the lock
+    file (remove it to unlock), or None if the folder cannot be written.
+    Waits while another run holds the lock, up to MANIFEST_LOCK_SECONDS."""
+    lockPath = os.path.join(folder, MANIFEST_FILENAME + '.lock')
+    while True:
+        try:
+            os.close(os.open(lockPath, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return lockPath
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(lockPath) > MANIFEST_LOCK_SECONDS:
+                    os.remove(lockPath)    # stale
+                    continue
+            except OSError:
+                continue    # just unlocked
+            time.sleep(0.05)
+        except OSError:
+            return None
+
+##################################################
+class CropManifest:
+    """ Persistent record of the "_cropped" files, one JSON file per folder."""
+
+    def __init__(self):
+        """ Setup basic things """
+        self.folders = {}      # folder -> {normPath(output): entry}
+        self.changed = set()   # folders to save
+
+    def outputs(self, path):
+        """ Return the entries of the folder of path (loaded on first use)."""
+        folder = os.path.dirname(normPath(path))
+        if folder not in self.folders:
+            outputs = {}
+            try:
+                with open(os.path.join(folder, MANIFEST_FILENAME), 'r') as manifestFile:
+                    data = json.load(manifestFile)
+                if data.get('version') == MANIFEST_VERSION:
+                    outputs = data.get('outputs', {})
+            except (OSError, ValueError):
+                pass
+            self.folders[folder] = outputs
+        return self.folders[folder]
+
+    def lookup(self, newImageFile):
+        """ Return the entry of a "_cropped" file, or None."""
+        return self.outputs(newImageFile).get(normPath(newImageFile))
+
+    def originalOf(self, imgFile):
+        """ Return the entry if imgFile is an unmodified "_cropped" file made
+        from a source that still exists, else None."""
+        entry = self.lookup(imgFile)
+        if entry is None or entry['outputStat'] != fileStat(imgFile):
+            return None
+        if fileStat(entry['source']) is None:
+            return None
+        return entry
+
+    def isUpToDate(self, job):
+        """ True if the "_cropped" file of a CropJob exists and was made from
+        the same source file, crop (see sameCrop) and settings."""
+        entry = self.lookup(job.newImageFile)
+        if entry is None:
+            return False
+        if (normPath(entry['source']) != normPath(job.imgFile)
+            or entry['sourceStat'] != fileStat(job.imgFile)
+            or entry['outputStat'] != fileStat(job.newImageFile)
+            or entry['settings'] != job.settings()):
+            return False
+        # same source file: its image size is known, no need to open it
+        box = cropBox(entry['imageSize'], job.frameSizePoints, job.imageOffset,
+            job.imageScale)
+        newSize = outputSize(box, job.frameSizeInches, job.resolution)
+        return sameCrop((box, newSize), (entry['box'], entry['newSize']))
+
+    def record(self, job):
+        """ Record the "_cropped" file of a processed CropJob."""
+        self.outputs(job.newImageFile)[normPath(job.newImageFile)] = {
+            'source': os.path.abspath(job.imgFile),
+            'sourceStat': fileStat(job.imgFile),
+            'imageSize': list(job.imageSize),
+            'box': list(job.box),
+            'newSize': list(job.newSize),
+            'path': job.path,
+            'settings': job.settings(),
+            'outputStat': fileStat(job.newImageFile),
+        }
+        self.changed.add(os.path.dirname(normPath(job.newImageFile)))
+
+    def pathOf(self, newImageFile):
+        """ Return the path (see PhotoBookCropEngine.choosePath) of a recorded
+        file; files of older versions were all resampled."""
+        entry = self.lookup(newImageFile)
+        if entry is None:
+            return None
+        return entry.get('path') or PATH_RESAMPLE
+
+    def sizeSummary(self, newImageFiles):
+        """ Return the total size of the "_cropped" files and of their source
+        files as text (each file counted once), from their entries."""
+        sources = {}
+        outputs = {}
+        for newImageFile in newImageFiles:
+            entry = self.lookup(newImageFile)
+            if entry is None or entry['outputStat'] is None or entry['sourceStat'] is None:
+                continue
+            outputs[normPath(newImageFile)] = entry['outputStat'][1]
+            sources[normPath(entry['source'])] = entry['sourceStat'][1]
+        before = sum(sources.values())
+        after = sum(outputs.values())
+        return ('Image files: %.1f MB before, %.1f MB after (%d%%).' % (before / 1e6,
+            after / 1e6, round(100.0 * after / before) if before else 100))
+
+    def save(self):
+        """ Write the changed manifest files. Entries written meanwhile by
+        another run (e.g. another shard of PhotoBookSlaBatch) are kept: the
+        file is read, merged and replaced under the lock of its folder.
+        A folder that cannot be written is left without manifest (the next
+        run will crop again)."""
+        for folder in self.changed:
+            lockPath = lockFolder(folder)
+            if lockPath is None:
+                continue
+            try:
+                self.merge(folder)
+            finally:
+                try:
+                    os.remove(lockPath)
+                except OSError:
+                    pass
+        self.changed = set()
+
+    def merge(self, folder):
+        """ Merge the entries of a folder into its manifest file (the caller
+        holds the lock). The new file is written to a temporary file of this
+        run, then put in place at once."""
+        manifestPath = os.path.join(folder, MANIFEST_FILENAME)
+        outputs = self.folders[folder]
+        try:
+            with open(manifestPath, 'r') as manifestFile:
+                data = json.load(manifestFile)
+            if data.get('version') == MANIFEST_VERSION:
+                outputs = dict(data.get('outputs', {}), **outputs)
+        except (OSError, ValueError):
+            pass
+        try:
+            handle, tempPath = tempfile.mkstemp(prefix=MANIFEST_FILENAME, suffix='.tmp',
+                dir=folder)
+        except OSError:
+            return
+        try:
+            with os.fdopen(handle, 'w') as manifestFile:
+                json.dump({'version': MANIFEST_VERSION, 'outputs': outputs},
+                    manifestFile, indent=1)
+            try:    # mkstemp makes a private file: keep the mode of the manifest
+                mode = os.stat(manifestPath).st_mode & 0o777
+            except OSError:
+                mode = 0o644
+            os.chmod(tempPath, mode)
+            os.replace(tempPath, manifestPath)
+        except OSError:
+            try:
+                os.remove(tempPath)
+            except OSError:
+                pass
+
+##################################################
+def linkCounts(paths):
+    """ Return {normPath(path): number of times it is given} of the image
+    files of the frames of a document (see CropOutputs)."""
+    links = {}
+    for path in paths:
+        if path:
+            key = normPath(path)
+            links[key] = links.get(key, 0) + 1
+    return links
+
+class CropOutputs:
+    """ The "_cropped" files of one run: one per distinct crop of an image
+    ("<name>_cropped<ext>", "<name>_cropped2<ext>", ...)."""
+
+    def __init__(self, manifest, links=None):
+        """ Setup basic things (links: {normPath(file): number of frames of
+        the document showing it}, see linkCounts; None: no other frames)"""
+        self.manifest = manifest
+        self.links = links or {}
+        self.crops = {}    # normPath(output) -> (box, newSize) of its crop in this run
+
+    def isVariant(self, path, newImageFile):
+        """ True if path is newImageFile or one of its numbered variants."""
+        name, ext = os.path.splitext(normPath(newImageFile))
+        pathName, pathExt = os.path.splitext(normPath(path))
+        return (pathExt == ext and pathName.startswith(name)
+            and (pathName == name or pathName[len(name):].isdigit()))
+
+    def assign(self, job, imageSize, currentFile=None):
+        """ Set the newImageFile of a CropJob (named "<name>_cropped<ext>")
+        to the file of its crop in this run; imageSize is the size of the
+        stored source image. The first that fits of: the file the frame
+        shows (currentFile), the numbered variants that exist (or are used
+        in this run) and the first free one. A file fits if no other crop
+        of this run uses it and it is not recorded for another crop or
+        source (a file not recorded is asked for by the overwrite dialog,
+        as before). The file the frame shows also fits for another crop,
+        unless other frames of the document show it (e.g. frames outside
+        the scope of the run): their crop is kept. Returns True if the file
+        is new in this run, False if an earlier frame of the run has the
+        same crop."""
+        box = cropBox(imageSize, job.frameSizePoints, job.imageOffset, job.imageScale)
+        crop = (box, outputSize(box, job.frameSizeInches, job.resolution))
+        name, ext = os.path.splitext(job.newImageFile)
+        candidates = [job.newImageFile]
+        while os.path.exists(candidates[-1]) or normPath(candidates[-1]) in self.crops:
+            candidates.append('%s%d%s' % (name, len(candidates) + 1, ext))
+        current = None
+        if currentFile and self.isVariant(currentFile, job.newImageFile):
+            current = normPath(currentFile)
+            candidates.insert(0, currentFile)
+        for candidate in candidates:
+            key = normPath(candidate)
+            job.newImageFile = candidate
+            claimed = self.crops.get(key)
+            if claimed is not None:
+                if sameCrop(claimed, crop):
+                    return False
+                continue
+            if key == current and self.links.get(key, 0) > 1:
+                fits = not os.path.exists(candidate) or self.manifest.isUpToDate(job)
+            else:
+                fits = (key == current or not os.path.exists(candidate)
+                    or self.manifest.lookup(candidate) is None
+                    or self.manifest.isUpToDate(job))
+            if fits:
+                self.crops[key] = crop
+                return True
+        # not reached: the last candidate is free
+        raise ValueError('no file name for the crop of %s' % job.imgFile)
@@ -14,48 +14,80 @@ are not empty, it scales the image proportionally, filling the entire frame
 with your image. This means that some of the image will be cropped by
 the frame in either the horizontal or vertical dimension. Then the scaled
 image will be centered in its frame.
+Items in groups are included. If nothing is selected, the script asks for
+the pages to handle (e.g. 3-10, or all for the whole document).
+Set MODE below to 'fit' to show the whole image in its frame instead, or
+to 'focal' to fill the frame around the subject of the photo (EXIF subject
+area, written by many cameras; else centered).
+
+Scale and offset are calculated from the image size and resolution, read
+from the image file header (with Pillow, see PhotoBookImageInfo.py), so
+each frame takes only one scale and one offset call to Scribus. Images that
+Pillow cannot read (e.g. PDF, EPS) are measured by Scribus instead.
+The headers are kept in an index next to the saved document (see
+PhotoBookImageIndex.py), so the next run does not read them again.
+Frames that fail are listed at the end.
+The time per frame can be written to a report, and the run can be
+profiled (see PhotoBookTiming.py).
 
 This is an adapted version of an old Scribus script from Jeremy Brown.
 """
 ##################################################
 
+import sys, os
 from scribus import *
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from PhotoBookCommon import DocumentBatch, collectImageFrames, fillFrame, \
+    openDocumentImageIndex, reportSummary
+from PhotoBookTiming import StageTimer, Profiler
+
+# 'fill' (image covers the frame), 'fit' (whole image in the frame) or
+# 'focal' (fill, around the EXIF subject area)
+MODE = 'fill'
+
 if haveDoc():
-    nbrSelected = selectionCount()
+    if selectionCount() > 0:
+        scan = collectImageFrames('Selection')
+    else:
+        pageRange = scribus.valueDialog("Fill Frames Centered",
+            "Nothing selected.\nFill the image frames on pages (e.g. 3-10, or all):", "all")
+        if pageRange == "":    # cancelled
+            sys.exit(0)
+        try:
+            scan = collectImageFrames('Page range', pageRange)
+        except ValueError as err:
+            scribus.messageBox("Error: Bad page range", str(err),
+                scribus.ICON_WARNING,scribus.BUTTON_OK)
+            sys.exit(1)
 else:
     scribus.messageBox("Error: No document open",
         "Please, create (or open) a document before running this script ...",
         scribus.ICON_WARNING,scribus.BUTTON_OK)
     sys.exit(1)
     
+objList = scan.imageFrames
+nbrSelected = len(objList)
 scribus.progressTotal(nbrSelected)
-# since there is an issue with units other than points, we switch to points then restore later.
-restore_units = scribus.getUnit()
-scribus.setUnit(0)
-
-objList = []
-for i in range(nbrSelected):
-    objList.append(getSelectedObject(i))
-
-for i in range(nbrSelected):
-    try:
-        scribus.progressSet(i)
-        obj = objList[i]
-        setScaleImageToFrame(True, False, obj)
-        setScaleImageToFrame(False, False, obj)
-        scale = getImageScale(obj)
-        max_scale = max(scale)
-        setImageScale(max_scale, max_scale, obj)
-        # center scaled image in frame:
-        frameX, frameY = getPosition(obj)
-        frameWidth, frameHeight = getSize(obj)
-        setImageOffset((frameWidth * (1 - max_scale / scale[0])) / 2,
-            (frameHeight * (1 - max_scale / scale[1])) / 2, obj)
-        docChanged(1)
-        setRedraw(True)
-    except:
-        nothing = "nothing"
-
-scribus.setUnit(restore_units)
+# since there is an issue with units other than points, we switch to points
+# (restored at the end of the batch).
+errors = []
+timer = StageTimer()
+index = openDocumentImageIndex()    # image headers of earlier runs
+try:
+    with Profiler(), DocumentBatch(UNIT_POINTS) as batch:
+        for i in range(nbrSelected):
+            scribus.progressSet(i)
+            obj = objList[i]
+            try:
+                fillFrame(obj, MODE, timer)
+                batch.changed()
+            except Exception as err:
+                errors.append('%s: %s' % (obj, err))
+finally:
+    if index is not None:
+        index.close()
+timer.writeReport()
+
 scribus.progressReset()
+reportSummary("Fill Frames Centered", nbrSelected - len(errors), scan, errors)
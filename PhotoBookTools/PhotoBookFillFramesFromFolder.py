@@ -0,0 +1,315 @@
+#! /usr/bin/env python
+#-*- coding: utf-8 -*-
+'''
+VERSION: 1.0 of 2026-10-17
+AUTHOR: Rafferty River.
+LICENSE: GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY.
+
+DESCRIPTION & USAGE:
+This script loads the images of a folder into the EMPTY image frames of
+the selection, the whole document or a page range (e.g. the frames made
+by 'PhotoBookLayoutMaker.py'), in reading order: page by page, top to
+bottom, left to right. Then it fills each frame with its image, centered
+(like 'PhotoBookFillFramesCentered.py'; or 'fit' / 'focal').
+
+The images are sorted by capture time (EXIF, else file time) or by file
+name. With 'Match portrait/landscape', a frame takes the first of the next
+few images with the same orientation, so the order is kept as much as
+possible. The headers of the image files are read in a thread pool, which
+is fast for big folders, also on a network drive.
+The time per frame can be written to a report, and the run can be
+profiled (see PhotoBookTiming.py).
+
+IMPORTANT REMARK: this script needs the Pillow (PIL) package
+to be installed in (Scribus) Python (https://python-pillow.org).
+'''
+##################################################
+# imports
+import sys, os
+
+try:
+    from scribus import *
+except ImportError:
+    print("This Python script is written for the Scribus scripting interface.")
+    print("It can only be run from within Scribus.")
+    sys.exit(1)
+
+try:
+    from tkinter import * # python 3 syntax
+    from tkinter import ttk # for ComboBox
+    from tkinter import filedialog
+except ImportError:
+    print("This script requires Python Tkinter properly installed.")
+    messageBox('Script failed',
+               'This script requires Python Tkinter properly installed.',
+               ICON_CRITICAL)
+    sys.exit(1)
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from PhotoBookImageInfo import FIT_MODES, listImageFiles, scanImages, loadPillow
+from PhotoBookCommon import SCOPES, DocumentBatch, collectImageFrames, fillFrame, \
+    openDocumentImageIndex, reportSummary
+from PhotoBookTiming import StageTimer, Profiler
+
+if loadPillow() is None:
+    scribus.messageBox("Script failed",
+        "This script needs the PIL (Pillow) package \n\
+        (compatible to your Python version) to be installed.",
+        scribus.ICON_CRITICAL,scribus.BUTTON_OK)
+    sys.exit(1)
+
+SORT_KEYS = ['Capture time', 'File name']
+
+# 'Match portrait/landscape': number of next images to look in for a match
+MATCH_WINDOW = 8
+
+##################################################
+def orientation(aspect):
+    """ 'landscape', 'portrait' or 'square' (within 5%) of an aspect ratio."""
+    if aspect > 1.05:
+        return 'landscape'
+    elif aspect < 1 / 1.05:
+        return 'portrait'
+    return 'square'
+
+def assignImages(frameAspects, imageAspects, matchOrientation=True, window=MATCH_WINDOW):
+    """ Return the image index for each frame (None when the images run
+    out), in order. With matchOrientation, a frame takes the first of the
+    next window unused images with its orientation (square matches all),
+    else the next image."""
+    unused = list(range(len(imageAspects)))
+    assigned = []
+    for frameAspect in frameAspects:
+        if not unused:
+            assigned.append(None)
+            continue
+        choice = 0
+        if matchOrientation:
+            wanted = orientation(frameAspect)
+            for k in range(min(window, len(unused))):
+                found = orientation(imageAspects[unused[k]])
+                if wanted == found or 'square' in (wanted, found):
+                    choice = k
+                    break
+        assigned.append(unused.pop(choice))
+    return assigned
+
+##################################################
+class ScPhotoBookFillFromFolder:
+    """ PhotoBookFillFramesFromFolder itself."""
+
+    def __init__(self, imageFolder, sortKey='Capture time', matchOrientation=True,
+        mode='fill'):
+        """ Setup basic things """
+        self.imageFolder = imageFolder
+        self.sortKey = sortKey
+        self.matchOrientation = matchOrientation
+        self.mode = mode
+        self.timer = StageTimer()    # seconds per stage per frame
+
+    def readImages(self):
+        """ Return (image files, their ImageInfo, number unreadable), sorted."""
+        imageFiles = listImageFiles(self.imageFolder)
+        infos = scanImages(imageFiles, min(16, 4 * (os.cpu_count() or 1)))
+        readable = [imageFile for imageFile in imageFiles if infos[imageFile] is not None]
+        if self.sortKey == 'Capture time':
+            readable.sort(key=lambda imageFile: (infos[imageFile].sortTime(),
+                os.path.basename(imageFile).lower()))
+        return readable, [infos[imageFile] for imageFile in readable], \
+            len(imageFiles) - len(readable)
+
+    def readingOrder(self, scan):
+        """ Return the frames of a FrameScan by page, top to bottom, left to
+        right, and their sizes (points). The unit must be points."""
+        frames = []
+        for imageFrame in scan.imageFrames:
+            x, y = scribus.getPosition(imageFrame)
+            frames.append((scan.pageOf.get(imageFrame, 0), round(y, 1), round(x, 1),
+                imageFrame, scribus.getSize(imageFrame)))
+        frames.sort(key=lambda frame: frame[:3])
+        return [frame[3] for frame in frames], [frame[4] for frame in frames]
+
+    def handleSelection(self, scope='Selection', pageRange='all'):
+        """ Fill the empty image frames of the scope with the images of the
+        folder. One summary at the end."""
+        if scope == 'Selection' and scribus.selectionCount() == 0:
+            scribus.messageBox('Warning', 'Nothing selected', ICON_WARNING)
+            return
+        try:
+            scan = collectImageFrames(scope, pageRange, emptyFrames=True)
+        except ValueError as err:
+            return str(err)    # bad page range: shown in the dialog
+        try:
+            with self.timer.time('(run)', 'read headers'):
+                imageFiles, infos, unreadable = self.readImages()
+        except OSError as err:
+            return 'Cannot read images folder: %s' % err
+        if not imageFiles:
+            return 'No images (.jpg, .png, .tif) in the images folder.'
+
+        errors = []
+        done = 0
+        with DocumentBatch(UNIT_POINTS) as batch:
+            frames, frameSizes = self.readingOrder(scan)
+            assigned = assignImages([width / height for width, height in frameSizes],
+                [info.aspect() for info in infos], self.matchOrientation)
+            scribus.progressTotal(len(frames))
+            for i in range(len(frames)):
+                scribus.progressSet(i)
+                if assigned[i] is None:
+                    continue
+                try:
+                    with self.timer.time(frames[i], 'loadImage'):
+                        scribus.loadImage(imageFiles[assigned[i]], frames[i])
+                    fillFrame(frames[i], self.mode, self.timer)
+                    batch.changed()
+                    done += 1
+                except Exception as err:
+                    errors.append('%s: %s' % (os.path.basename(imageFiles[assigned[i]]), err))
+        scribus.progressReset()
+
+        notes = []
+        if assigned.count(None):
+            notes.append('%d frame(s) left empty: not enough images.' % assigned.count(None))
+        if len(imageFiles) > len(frames):
+            notes.append('%d image(s) not used: not enough empty frames.'
+                % (len(imageFiles) - len(frames)))
+        if unreadable:
+            notes.append('%d file(s) in the folder could not be read.' % unreadable)
+        reportSummary('Fill Frames from Folder', done, scan, errors, notes)
+        self.timer.writeReport()
+        return
+
+##################################################
+class TkPhotoBookFillFromFolder(Frame):
+    """ GUI interface for PhotoBookFillFramesFromFolder.py with Tkinter"""
+
+    def __init__(self, master=None):
+        """ Setup the dialog """
+        Frame.__init__(self, master)
+        self.grid()
+        self.master.resizable(0, 0)
+        self.master.title('Fill Frames from Folder')
+
+        # define variables
+        self.statusVar = StringVar(self, value='Choose the images folder and press OK.')
+        self.statusLabel = Label(self, fg="red", textvariable=self.statusVar)
+        self.imageFolderLabel = Label(self, text='Images folder: ')
+        self.imageFolderVar = StringVar()
+        self.imageFolderEntry = Entry(self, textvariable=self.imageFolderVar, width=30)
+        self.imageFolderButton = Button(self, text="Browse...", command=self.browseImageFolder)
+        self.sortKeyLabel = Label(self, text='Sort images by: ')
+        self.sortKeyVar = ttk.Combobox(self, values = SORT_KEYS, width=15)
+        self.matchLabel = Label(self, text='Match portrait/landscape: ')
+        self.matchVar = IntVar()
+        self.matchCheck = Checkbutton(self, variable=self.matchVar)
+        self.modeLabel = Label(self, text='Fill mode: ')
+        self.modeVar = ttk.Combobox(self, values = FIT_MODES, width=15)
+        self.scopeLabel = Label(self, text='Empty image frames of: ')
+        self.scopeVar = ttk.Combobox(self, values = SCOPES, width=15)
+        self.pagesLabel = Label(self, text='Pages (e.g. 3-10): ')
+        self.pagesVar = StringVar()
+        self.pagesEntry = Entry(self, textvariable=self.pagesVar, width=9)
+        self.okButton = Button(self, text="OK", width=6, command=self.okButton_pressed)
+        self.cancelButton = Button(self, text="Cancel", command=self.quit)
+
+        # set default values
+        self.sortKeyVar.set('Capture time')
+        self.matchVar.set(1)
+        self.matchCheck.select()
+        self.modeVar.set('fill')
+        self.scopeVar.set('Whole document' if scribus.selectionCount() == 0 else 'Selection')
+        self.pagesVar.set('all')
+
+        # make interface layout
+        self.columnconfigure(0, pad=6)
+        currRow = 0
+        self.statusLabel.grid(column=0, row=currRow, columnspan=3)
+        currRow += 1
+        self.imageFolderLabel.grid(column=0, row=currRow, sticky=S+E)
+        self.imageFolderEntry.grid(column=1, row=currRow, sticky=S+W)
+        self.imageFolderButton.grid(column=2, row=currRow, sticky=S+W, padx=5)
+        currRow += 1
+        self.sortKeyLabel.grid(column=0, row=currRow, sticky=S+E)
+        self.sortKeyVar.grid(column=1, row=currRow, sticky=S+W)
+        currRow += 1
+        self.matchLabel.grid(column=0, row=currRow, sticky=S+E)
+        self.matchCheck.grid(column=1, row=currRow, sticky=S+W)
+        currRow += 1
+        self.modeLabel.grid(column=0, row=currRow, sticky=S+E)
+        self.modeVar.grid(column=1, row=currRow, sticky=S+W)
+        currRow += 1
+        self.scopeLabel.grid(column=0, row=currRow, sticky=S+E)
+        self.scopeVar.grid(column=1, row=currRow, sticky=S+W)
+        currRow += 1
+        self.pagesLabel.grid(column=0, row=currRow, sticky=S+E)
+        self.pagesEntry.grid(column=1, row=currRow, sticky=S+W)
+        currRow += 1
+        self.rowconfigure(currRow, pad=6)
+        self.cancelButton.grid(column=0, row=currRow, sticky=E)
+        self.okButton.grid(column=1, row=currRow, sticky=W)
+
+    def browseImageFolder(self):
+        """ Choose the images folder """
+        folder = filedialog.askdirectory(initialdir=self.imageFolderVar.get() or None,
+            title='Images folder')
+        if folder:
+            self.imageFolderVar.set(folder)
+
+    def okButton_pressed(self):
+        """ Do PhotoBookFillFramesFromFolder """
+        if not os.path.isdir(self.imageFolderVar.get()):
+            self.statusVar.set('Images folder not found.')
+            return
+        if self.sortKeyVar.get() not in SORT_KEYS:
+            self.statusVar.set('Sort images by: ' + ' or '.join(SORT_KEYS) + '.')
+            return
+        if self.modeVar.get() not in FIT_MODES:
+            self.statusVar.set('Fill mode must be one of: ' + ', '.join(FIT_MODES) + '.')
+            return
+        spbff = ScPhotoBookFillFromFolder(self.imageFolderVar.get(), self.sortKeyVar.get(),
+            int(self.matchVar.get()) == 1, self.modeVar.get())
+        self.master.withdraw()
+        with Profiler():
+            err = spbff.handleSelection(self.scopeVar.get(), self.pagesVar.get())
+
+        if err != None:
+            self.master.deiconify()
+            self.statusVar.set(err)
+        else:
+            self.quit()
+
+    def quit(self):
+        self.master.destroy()
+
+##################################################
+# Start program
+
+def main():
+    if scribus.haveDoc() == 0:
+        scribus.messageBox("Script failed",
+            "Please open a Scribus document before running this script.",
+            scribus.ICON_WARNING,scribus.BUTTON_OK)
+        return
+
+    index = openDocumentImageIndex()    # image headers of earlier runs
+    try:
+        scribus.statusMessage('Running script...')
+        scribus.progressReset()
+        unit = scribus.getUnit()
+        root = Tk()
+        app = TkPhotoBookFillFromFolder(root)
+        root.mainloop()
+    finally:
+        if scribus.haveDoc():
+            scribus.redrawAll()
+        scribus.setUnit(unit)
+        if index is not None:
+            index.close()
+        scribus.statusMessage('Done.')
+        scribus.progressReset()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+VERSION: 1.0 of 2026-10-17
+AUTHOR: Rafferty River.
+LICENSE: GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY.
+
+DESCRIPTION & USAGE:
+This script finds the photos that are in the book more than once: the
+same image file in several frames, and images that are (nearly) the
+same photo (another copy, size or format of it, or the next shot of a
+burst). It asks for the pages to check (e.g. 3-10, or all for the whole
+document); items in groups are included. Nothing is changed.
+
+Every linked image gets a perceptual hash, compared through an index
+(see PhotoBookImageHash.py); MAX_DISTANCE below sets how near duplicates
+must be. A frame showing a "_cropped" file or a proxy of Crop and Resize is
+checked with its original image.
+The clusters of duplicates are shown by page and frame name at the end
+and, for a saved document, written to '<document>_duplicates.csv' (one
+row per frame). The time of the stages can be written to a report, and
+the run can be profiled (see PhotoBookTiming.py).
+
+IMPORTANT REMARK: this script needs the Pillow (PIL) package
+to be installed in (Scribus) Python (https://python-pillow.org).
+"""
+##################################################
+# imports
+import sys, os, csv
+from scribus import *
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from PhotoBookCommon import collectImageFrames
+from PhotoBookCropManifest import CropManifest
+from PhotoBookImageHash import hashImages, duplicateClusters
+from PhotoBookImageInfo import loadPillow
+from PhotoBookTiming import StageTimer, Profiler
+
+# bits (of 64) the hashes of near duplicates may differ in (0 = same photo only)
+MAX_DISTANCE = 8
+# clusters listed in the message box (all of them in the .csv file)
+LISTED_CLUSTERS = 15
+
+##################################################
+def findDuplicates(scan, timer):
+    """ Return (clusters, unreadable image files) of the frames of a
+    FrameScan: clusters is a list of (largest distance, [(page, frame,
+    image file)]), the frames of images that are (nearly) the same."""
+    manifest = CropManifest()
+    framesOf = {}    # original image file -> [frames]
+    with timer.time('(run)', 'read frames'):
+        for imageFrame in scan.imageFrames:
+            imgFile = scribus.getImageFile(imageFrame)
+            entry = manifest.originalOf(imgFile)    # a "_cropped" file or a proxy
+            if entry is not None:
+                imgFile = entry['source']
+            framesOf.setdefault(os.path.abspath(imgFile), []).append(imageFrame)
+    with timer.time('(run)', 'hash'):
+        hashes = hashImages(list(framesOf))
+    unreadable = [imgFile for imgFile, bits in hashes.items() if bits is None]
+    with timer.time('(run)', 'compare'):
+        clusters = duplicateClusters(dict((imgFile, bits) for imgFile, bits in hashes.items()
+            if bits is not None), MAX_DISTANCE)
+    # an image file in several frames is a duplicate by itself
+    clustered = set(imgFile for widest, imgFiles in clusters for imgFile in imgFiles)
+    clusters.extend((0, [imgFile]) for imgFile, frames in framesOf.items()
+        if len(frames) > 1 and imgFile not in clustered)
+    result = []
+    for widest, imgFiles in clusters:
+        frames = [(scan.pageOf.get(imageFrame, 0), imageFrame, imgFile)
+            for imgFile in imgFiles for imageFrame in framesOf[imgFile]]
+        result.append((widest, sorted(frames)))
+    result.sort(key=lambda cluster: cluster[1][0])
+    return result, unreadable
+
+def writeDuplicates(path, clusters):
+    """ Write one row per frame of the clusters to a .csv file."""
+    with open(path, 'w', newline='') as reportFile:
+        writer = csv.writer(reportFile)
+        writer.writerow(['cluster', 'distance', 'page', 'frame', 'image'])
+        for n, (widest, frames) in enumerate(clusters):
+            for page, imageFrame, imgFile in frames:
+                writer.writerow([n + 1, widest, page, imageFrame, imgFile])
+
+def clusterText(widest, frames):
+    """ One line for a cluster: its frames by page."""
+    kind = 'Same photo' if widest == 0 else 'Near duplicates (distance %d)' % widest
+    return '%s: %s' % (kind, ', '.join('p. %d %s (%s)' % (page, imageFrame,
+        os.path.basename(imgFile)) for page, imageFrame, imgFile in frames))
+
+##################################################
+# Start program
+
+if not haveDoc():
+    scribus.messageBox("Error: No document open",
+        "Please, create (or open) a document before running this script ...",
+        scribus.ICON_WARNING,scribus.BUTTON_OK)
+    sys.exit(1)
+if loadPillow() is None:
+    scribus.messageBox("Script failed",
+        "This script needs the PIL (Pillow) package \n\
+        (compatible to your Python version) to be installed.",
+        scribus.ICON_CRITICAL,scribus.BUTTON_OK)
+    sys.exit(1)
+
+pageRange = scribus.valueDialog("Find Duplicates",
+    "Find duplicate photos on pages (e.g. 3-10, or all):", "all")
+if pageRange == "":    # cancelled
+    sys.exit(0)
+try:
+    scan = collectImageFrames('Page range', pageRange)
+except ValueError as err:
+    scribus.messageBox("Error: Bad page range", str(err),
+        scribus.ICON_WARNING,scribus.BUTTON_OK)
+    sys.exit(1)
+
+scribus.statusMessage('Finding duplicates...')
+timer = StageTimer()
+with Profiler():
+    clusters, unreadable = findDuplicates(scan, timer)
+timer.writeReport()
+
+lines = ['%d image frame(s) checked: %d cluster(s) of duplicates.' % (len(scan.imageFrames),
+    len(clusters))]
+lines.extend(clusterText(widest, frames) for widest, frames in clusters[:LISTED_CLUSTERS])
+if len(clusters) > LISTED_CLUSTERS:
+    lines.append('... and %d more.' % (len(clusters) - LISTED_CLUSTERS))
+docName = scribus.getDocName()
+if clusters and docName and os.path.isfile(docName):
+    reportPath = os.path.splitext(docName)[0] + '_duplicates.csv'
+    try:
+        writeDuplicates(reportPath, clusters)
+        lines.append('All clusters: %s' % reportPath)
+    except OSError as err:
+        lines.append('Cannot write %s: %s' % (reportPath, err))
+if unreadable:
+    lines.append('%d image(s) could not be read:' % len(unreadable))
+    lines.extend(unreadable[:10])
+scribus.messageBox('Find Duplicates', '\n'.join(lines),
+    ICON_WARNING if clusters or unreadable else ICON_INFORMATION, BUTTON_OK)
+scribus.statusMessage('Done.')
@@ -8,9 +8,33 @@ This program is distributed in the hope that it will be useful,
 but WITHOUT ANY WARRANTY.
 
 DESCRIPTION & USAGE:
-This script loops over every selected object, and for all image
-frames that are not empty, it will crop and resize a COPY of
-the image file and add the suffix "_cropped" to it.
+This script loops over every selected object (or over all objects
+of the whole document or of a page range, items in groups included),
+and for all image frames that are not empty, it will crop and resize
+a COPY of the image file and add the suffix "_cropped" to it.
+Only images with more pixels than the frame needs at the 'Resolution'
+are resampled; the others are cropped at their native resolution or
+copied as is. See PhotoBookCropEngine.py for this and for the options
+('Quality', JPEG, CMYK profiles, workers, memory), and
+PhotoBookCropManifest.py for the re-run that skips the frames that are
+up to date. 'Preflight' only reports what a run would do (see
+PhotoBookPreflight.py); 'Proxies' links the frames to small copies of
+their images for fast editing (see createProxyJob). The dialog (see
+PhotoBookImageCropResizeDialog.py) crops in the background and can stop.
+
+Without the dialog, a preset (a section of 'PhotoBookImageCropResize.cfg',
+e.g. [proof]; what it leaves out comes from [DEFAULT]) crops right away:
+run 'scribus -py PhotoBookImageCropResize.py --preset proof' ('--headless'
+for [DEFAULT], '--proxies' for proxies), or, to bind a preset to a
+shortcut, a small script in this folder:
+
+    import os, sys
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import PhotoBookImageCropResize
+    PhotoBookImageCropResize.main('proof')
+
+The time of each stage per frame can be written to a report, and the
+run can be profiled (see PhotoBookTiming.py).
 
 This is a reworked version of an old Scribus script 
 'Image_crop_resize_and_color_conversion_GUI.py' of 
@@ -22,7 +46,9 @@ to be installed in (Scribus) Python (https://python-pillow.org).
 '''
 ##################################################
 # imports
-import sys, os
+import sys, os, time
+
+START_TIME = time.perf_counter()    # for the time to the first frame
 
 try:
     from scribus import *
@@ -32,34 +58,42 @@ except ImportError:
         scribus.ICON_WARNING,scribus.BUTTON_OK)
     sys.exit(1)
 
-try:
-    from tkinter import * # python 3 syntax
-    #from tkinter import messagebox
-    from tkinter import ttk # for ComboBox
-except ImportError:
-    print("This script requires Python Tkinter properly installed.")
-    messageBox('Script failed',
-               'This script requires Python Tkinter properly installed.',
-               ICON_CRITICAL)
-    sys.exit(1)
-    
-try:
-    # if PIL-package installed but not found, uncomment one of following lines:
-    #sys.path.append('C:\\Users\\Python37\\Lib\\site-packages')  # Windows
-    #sys.path.append('/usr/lib/python3/dist-packages')   # Linux
-    from PIL import Image
-except ImportError:
-    scribus.messageBox("Script failed",
-        "This script needs the PIL (Pillow) package \n\
-        (compatible to your Python version) to be installed.",
-        scribus.ICON_CRITICAL,scribus.BUTTON_OK)
-    sys.exit(1)
+# Scribus-independent crop engine (in the same folder as this script)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from PhotoBookCropEngine import CropJob, ImageCache, JpegProfile, IccConversion, \
+    processJobs, parseJpegTarget, pathSummary, PATH_RESAMPLE, DEFAULT_CACHE_MB, \
+    DEFAULT_MAX_IMAGE_MB, JPEG_SUBSAMPLING
+from PhotoBookCropManifest import CropManifest, CropOutputs, normPath, originalGeometry, \
+    croppedGeometry, linkCounts
+from PhotoBookCommon import DocumentBatch, collectImageFrames, \
+    openDocumentImageIndex, reportSummary, readPreset, presetArgument
+from PhotoBookImageInfo import imageInfo, storeImageInfo
+from PhotoBookTiming import StageTimer, Profiler
+from PhotoBookPreflight import preflightJobs, preflightSummary
+
+CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+    'PhotoBookImageCropResize.cfg')
+# options of a .cfg file without them
+DEFAULT_OPTIONS = {
+    'resolution': '300', 'mode': 'RGB', 'fileformat': '.jpg', 'resample': 'BICUBIC',
+    'quality': 'Best', 'jpegquality': '75', 'progressive': '0', 'optimize': '0',
+    'subsampling': 'Default', 'jpegtarget': '', 'cmykprofile': '', 'rgbprofile': '',
+    'intent': 'Perceptual', 'embedded': '1', 'scope': 'Selection', 'pages': 'all',
+    'workers': '1', 'cachemb': str(DEFAULT_CACHE_MB), 'maximagemb': str(DEFAULT_MAX_IMAGE_MB),
+    'proxyresolution': '96',
+}
+
+# proxies: subfolder of the image folder, JPEG quality
+PROXY_FOLDER = 'PhotoBookProxies'
+PROXY_JPEG_QUALITY = 70
     
 ##################################################
 class ScPhotoBookImageCropResize:
     """ PhotoBookImageCropResize itself."""
 
-    def __init__(self, resolution='300', mode='RGB', fileFormat='.jpg', resample='BICUBIC'):
+    def __init__(self, resolution='300', mode='RGB', fileFormat='.jpg', resample='BICUBIC',
+        workers=1, quality='Best', cacheMB=DEFAULT_CACHE_MB, maxImageMB=DEFAULT_MAX_IMAGE_MB,
+        jpeg=None, icc=None, proxyResolution=96):
         """ Setup basic things """
         self.resolution = resolution
         if mode == 'B&W':
@@ -70,202 +104,421 @@ class ScPhotoBookImageCropResize:
             self.mode = mode
         self.fileFormat = fileFormat
         self.resample = resample
+        self.workers = max(1, int(workers))
+        self.quality = quality
+        self.manifest = CropManifest()
+        self.outputs = CropOutputs(self.manifest)    # "_cropped" file of each crop of the run
+        self.errors = []
+        self.cache = ImageCache(int(cacheMB) * 1024 * 1024)
+        self.maxImageMB = int(maxImageMB)
+        self.jpeg = jpeg or JpegProfile()
+        self.icc = icc or IccConversion()
+        self.newImageFiles = set()    # "_cropped" files of the run (for sizeSummary)
+        self.proxyResolution = int(proxyResolution)
+        self.proxyViews = {}          # image frame -> (imageOffset, imageScale) on its original
+        self.lowResolution = []       # frames that keep their image (see createProxyJob)
+        self.paths = {}               # path (see choosePath) -> number of frames
+        self.timer = StageTimer()     # seconds per stage per frame
+        self.runStart = time.perf_counter()
+
+    def createJob(self, imageFrame):
+        """ Read frame geometry and image path from Scribus into a CropJob.
+        The document unit must be points (see handleImages). A frame showing
+        an up-to-date "_cropped" file is mapped back to the original image."""
+        imgFile = scribus.getImageFile(imageFrame)
+        # frame size in points (for cropping) and in inches (for DPI)
+        frameSizePoints = scribus.getSize(imageFrame)
+        frameSizeInches = (frameSizePoints[0] / 72, frameSizePoints[1] / 72)
+        imageOffset = (scribus.getProperty(imageFrame,'imageXOffset'),
+            scribus.getProperty(imageFrame,'imageYOffset'))
+        imageScale = (scribus.getProperty(imageFrame,'imageXScale'),
+            scribus.getProperty(imageFrame,'imageYScale'))
+        entry = self.manifest.originalOf(imgFile)
+        if entry is not None:
+            imgFile = entry['source']
+            imageOffset, imageScale = originalGeometry(entry, imageOffset, imageScale)
+        name,ext = os.path.splitext(imgFile)
+        newImageFile = (name + '_cropped'+ self.fileFormat)
+        return CropJob(imageFrame, imgFile, newImageFile, frameSizeInches, frameSizePoints,
+            imageOffset, imageScale, self.resolution, self.mode, self.resample, self.quality,
+            self.maxImageMB, self.jpeg, self.icc)
+
+    def createProxyJob(self, imageFrame):
+        """ Return a CropJob for the proxy of the image of a frame: the whole
+        original reduced 2, 4, 8, ... times, to at least the proxy resolution
+        in the frame. Returns None if the image has less than twice the proxy
+        resolution in the frame.
+        The proxies are JPEG files in a subfolder 'PhotoBookProxies' of each
+        image folder, recorded like the "_cropped" files (made only when
+        missing or out of date). The frame shows the same part of the image.
+        Crop and Resize (OK) crops a frame showing a proxy from its original
+        image, so a run before the PDF export swaps in the "_cropped" files."""
+        job = self.createJob(imageFrame)    # the view on the original
+        # Scribus imageX/YScale: points of the page per image pixel
+        effectiveDpi = 72.0 / max(abs(job.imageScale[0]), abs(job.imageScale[1]))
+        factor = 1
+        while effectiveDpi / (factor * 2) >= self.proxyResolution:
+            factor *= 2
+        if factor == 1:
+            return None
+        info = imageInfo(job.imgFile)
+        imageSize = info.size
+        if info.orientation in (5, 6, 7, 8):    # the engine crops the stored image
+            imageSize = (imageSize[1], imageSize[0])
+        newSize = (max(1, imageSize[0] // factor), max(1, imageSize[1] // factor))
+        # a "frame" over the whole image (half a pixel more: cropBox rounds down)
+        frameSizePoints = ((imageSize[0] + 0.5) * abs(job.imageScale[0]),
+            (imageSize[1] + 0.5) * abs(job.imageScale[1]))
+        frameSizeInches = ((newSize[0] + 0.5) / self.proxyResolution,
+            (newSize[1] + 0.5) / self.proxyResolution)
+        folder = os.path.join(os.path.dirname(job.imgFile), PROXY_FOLDER)
+        os.makedirs(folder, exist_ok=True)
+        name = os.path.splitext(os.path.basename(job.imgFile))[0]
+        self.proxyViews[imageFrame] = (job.imageOffset, job.imageScale)
+        return CropJob(imageFrame, job.imgFile,
+            os.path.join(folder, '%s_proxy%d.jpg' % (name, factor)), frameSizeInches,
+            frameSizePoints, (0.0, 0.0), (abs(job.imageScale[0]), abs(job.imageScale[1])),
+            self.proxyResolution, 'RGB', self.resample, 'Fast', self.maxImageMB,
+            JpegProfile(PROXY_JPEG_QUALITY))
+
+    def relink(self, job):
+        """ Load the new image of a job in its frame; a proxy, and an image
+        that was not resampled (it keeps its own resolution), shows the same
+        part of the image as the original did."""
+        scribus.loadImage(job.newImageFile, job.imageFrame)
+        view = self.proxyViews.get(job.imageFrame)
+        if view is None and self.manifest.pathOf(job.newImageFile) != PATH_RESAMPLE:
+            view = (job.imageOffset, job.imageScale)
+        if view is None:
+            return
+        imageOffset, imageScale = croppedGeometry(self.manifest.lookup(job.newImageFile),
+            *view)
+        # loadImage sets the scale of 100%: points per pixel at the image DPI
+        baseScale = (scribus.getProperty(job.imageFrame, 'imageXScale'),
+            scribus.getProperty(job.imageFrame, 'imageYScale'))
+        scribus.setImageScale(imageScale[0] / baseScale[0], imageScale[1] / baseScale[1],
+            job.imageFrame)
+        scribus.setImageOffset(imageOffset[0] * imageScale[0], imageOffset[1] * imageScale[1],
+            job.imageFrame)
+
+    def confirmOverwrite(self, newImageFile):
+        """ Ask before overwriting an existing '_cropped' file
+        (not for the ones made by this script)."""
+        if os.path.exists(newImageFile) and self.manifest.lookup(newImageFile) is None:
+            overwrite = scribus.messageBox('Warning:','Overwrite '+newImageFile+'?',
+                ICON_WARNING, button2=scribus.BUTTON_NO, button1=scribus.BUTTON_YES)
+            if int(overwrite) > 16384:  # BUTTON_NO was clicked
+                return False
+        return True
 
     def handleImage(self, imageFrame):
         """ Crop, resize, convert and save Image function."""
-        imgFile = scribus.getImageFile(imageFrame)
-        try:
-            image = Image.open(imgFile)
-            # Calculate DPI
-            unit = scribus.getUnit()
-            scribus.setUnit(UNIT_INCHES)
-            imageResolution = int(self.resolution)
-            frameSizeX,frameSizeY = scribus.getSize(imageFrame)
-            newWidth = int(frameSizeX * imageResolution)
-            newHeight = int(frameSizeY * imageResolution)
-            scribus.setUnit(UNIT_POINTS)
-
-            # Calculate cropping
-            imageXOffset = scribus.getProperty(imageFrame,'imageXOffset')
-            imageYOffset = scribus.getProperty(imageFrame,'imageYOffset')
-            frameSizeX,frameSizeY = scribus.getSize(imageFrame)
-            imageXScale = scribus.getProperty(imageFrame,'imageXScale')
-            imageYScale = scribus.getProperty(imageFrame,'imageYScale')
-            imageSizeX, imageSizeY = image.size
-
-            # calculate crop box
-            left = int(imageXOffset * -1)
-            top = int(imageYOffset * -1)
-            right = int(left + (frameSizeX / imageXScale))
-            bottom = int(top + (frameSizeY / imageYScale))
-        
-            # Limit crop to image area 
-            # (avoid black areas due to crop bigger than image)
-            if right > imageSizeX: 
-                right = imageSizeX
-            if bottom > imageSizeY: 
-                bottom = imageSizeY
-            if imageXOffset > 0: 
-                left = 0
-            if imageYOffset > 0: 
-                top = 0
-        
-            # Recalculate new image dimensions
-            # to fit proportionaly
-            proportionX = newWidth / (right-left)
-            proportionY = newHeight / (bottom-top)
-            if proportionX > proportionY:
-                newHeight = int(newWidth * (bottom-top) /(right-left))
-            else:
-                newWidth = int(newHeight * (right-left) / (bottom-top))
-
-            # Cropping
-            newImage = image.crop((left,top,right,bottom))
-        
-            # Resize
-            if self.resample == 'BICUBIC':
-                newImage = newImage.resize((newWidth,newHeight),Image.BICUBIC)
-            elif self.resample == 'LANCZOS':
-                newImage = newImage.resize((newWidth,newHeight),Image.LANCZOS)
-            else:
-                newImage = newImage.resize((newWidth,newHeight),Image.BILINEAR)
-        
-            # Color space conversion
-            if newImage.mode != self.mode:
-                newImage = newImage.convert(self.mode)
-
-            # Save new image with suffix '_cropped'
-            scribus.setUnit(unit)  # restore original document unit
-            name,ext = os.path.splitext(imgFile)
-            newImageFile = (name + '_cropped'+ self.fileFormat)
-            if os.path.exists(newImageFile):
-                overwrite = scribus.messageBox('Warning:','Overwrite '+newImageFile+'?',
-                    ICON_WARNING, button2=scribus.BUTTON_NO, button1=scribus.BUTTON_YES)
-                if int(overwrite) > 16384:  # BUTTON_NO was clicked
-                    return
-            newImage.save(newImageFile, dpi=(imageResolution,imageResolution))
-
-            # Reload new image in image frame
-            scribus.loadImage(newImageFile,imageFrame)
-            
-        except:
+        self.errors = []
+        self.handleImages([imageFrame])
+        for imgFile in self.errors:
             scribus.messageBox('Warning:', imgFile + '\n will be skipped (processing error).',
                 ICON_WARNING, BUTTON_OK)
         return
-        
-    def handleSelection(self):
-        """ Handle selected frames."""
-        selectionList = []
-        nbrSelected = scribus.selectionCount()
-        scribus.progressTotal(nbrSelected)
-        if nbrSelected == 0:
+
+    def handleImages(self, imageFrames, proxies=False):
+        """ Crop and resize the images of image frames, in a process pool if
+        there is more than 1 worker. Scribus is only called from this (main)
+        thread: the frames are read up front and relinked as the results
+        come in. Frames with an up-to-date "_cropped" file are only relinked.
+        Images that fail are added to self.errors. The whole run is one
+        DocumentBatch (units in points, one redraw). Returns the number of
+        frames done. With proxies, the frames get proxies instead of
+        "_cropped" files (see createProxyJob)."""
+        with DocumentBatch(UNIT_POINTS) as batch:
+            jobs, done = self.prepareJobs(imageFrames, batch, proxies)
+            scribus.progressTotal(len(jobs))
+            progress = 0
+            try:
+                for job, err in processJobs(jobs, self.workers, self.cache):
+                    progress += 1
+                    scribus.progressSet(progress)
+                    if self.finishJob(job, err, batch):
+                        done += 1
+            finally:
+                self.finishJobs()
+        return done
+
+    def prepareJobs(self, imageFrames, batch, proxies=False, overwrites=None):
+        """ Read the frames into CropJobs (see handleImages); frames with an
+        up-to-date file are relinked right away. Each distinct crop of an
+        image gets a "_cropped" file of its own (see CropOutputs). The
+        frames of a run may be read in parts, with the same overwrites
+        ({"_cropped" file: the answer of the overwrite dialog}). Returns
+        (the jobs to process, the number of frames done)."""
+        jobs = []
+        done = 0
+        if overwrites is None:
+            overwrites = {}
+        timer = self.timer
+        for imageFrame in imageFrames:
+            try:
+                with timer.time(imageFrame, 'read frame'):
+                    if proxies:
+                        job = self.createProxyJob(imageFrame)
+                    else:
+                        job = self.createJob(imageFrame)
+                        self.outputs.assign(job, imageInfo(job.imgFile).storedSize(),
+                            getImageFile(imageFrame))
+            except:
+                self.errors.append(getImageFile(imageFrame))
+                continue
+            if job is None:
+                self.lowResolution.append(imageFrame)
+                continue
+            with timer.time(imageFrame, 'manifest'):
+                upToDate = self.manifest.isUpToDate(job)
+            if upToDate:
+                if normPath(getImageFile(imageFrame)) != normPath(job.newImageFile):
+                    with timer.time(imageFrame, 'loadImage'):
+                        self.relink(job)
+                    batch.changed()
+                self.newImageFiles.add(job.newImageFile)
+                self.countPath(job.imageFrame, self.manifest.pathOf(job.newImageFile))
+                done += 1
+                timer.addSince('(run)', 'first frame', self.runStart)
+            else:
+                with timer.time(imageFrame, 'overwrite dialog'):
+                    if job.newImageFile not in overwrites:
+                        overwrites[job.newImageFile] = (proxies
+                            or self.confirmOverwrite(job.newImageFile))
+                    overwrite = overwrites[job.newImageFile]
+                if overwrite:
+                    jobs.append(job)
+        return jobs, done
+
+    def finishJob(self, job, err, batch):
+        """ Record and relink a processed CropJob (see processJobs); a failed
+        one is added to self.errors. Returns True if the frame is done."""
+        if err is not None:
+            self.errors.append(job.imgFile)
+            return False
+        timer = self.timer
+        timer.addAll(job.imageFrame, job.timings)
+        with timer.time(job.imageFrame, 'manifest'):
+            self.manifest.record(job)
+            storeImageInfo(job.newInfo)    # for fill and layout
+        # Reload new image in image frame
+        with timer.time(job.imageFrame, 'loadImage'):
+            self.relink(job)
+        batch.changed()
+        self.newImageFiles.add(job.newImageFile)
+        self.countPath(job.imageFrame, job.path)
+        timer.addSince('(run)', 'first frame', self.runStart)
+        return True
+
+    def countPath(self, imageFrame, path):
+        """ Count the path (see choosePath) of a frame done, for the summary
+        and the timing report."""
+        self.paths[path] = self.paths.get(path, 0) + 1
+        self.timer.tag(imageFrame, 'path', path)
+
+    def finishJobs(self):
+        """ Save the manifest and free the image cache at the end of a run."""
+        with self.timer.time('(run)', 'manifest'):
+            self.manifest.save()
+        self.cache.clear()
+
+    def collectFrames(self, scope='Selection', pageRange='all'):
+        """ Return (FrameScan, None) of the image frames of the selection,
+        the whole document or a page range (items in groups included), or
+        (None, a problem to show in the dialog, or None if there is nothing
+        to do)."""
+        if scope == 'Selection' and scribus.selectionCount() == 0:
+            scribus.messageBox('Warning', 'Nothing selected', ICON_WARNING)
+            return None, None
+        try:
+            with self.timer.time('(run)', 'collect frames'):
+                scan = collectImageFrames(scope, pageRange)
+                # the frames of the whole document showing each file: the
+                # crop of a frame outside the scope is never overwritten
+                frames = scan if scope == 'Whole document' \
+                    else collectImageFrames('Whole document')
+                links = linkCounts(getImageFile(frame) for frame in frames.imageFrames)
+        except ValueError as err:
+            return None, str(err)    # bad page range: shown in the dialog
+        self.errors = []
+        self.newImageFiles = set()
+        self.lowResolution = []
+        self.paths = {}
+        self.outputs = CropOutputs(self.manifest, links)
+        return scan, None
+
+    def reportRun(self, scan, done, proxies=False, notes=()):
+        """ Show the summary of a run and write the timing report."""
+        if proxies:
+            if self.lowResolution:
+                scan.skip('frames below %d DPI (they keep their image)'
+                    % (2 * self.proxyResolution), len(self.lowResolution))
+            notes = list(notes) + [self.manifest.sizeSummary(self.newImageFiles)]
+            reportSummary('Proxies', done, scan, self.errors, notes)
+        else:
+            notes = list(notes) + [pathSummary(self.paths),
+                self.manifest.sizeSummary(self.newImageFiles), self.cache.summary()]
+            reportSummary('Crop and Resize', done, scan, self.errors, notes)
+        self.timer.writeReport()
+
+    def handleSelection(self, scope='Selection', pageRange='all'):
+        """ Handle the image frames of the selection, the whole document or
+        a page range (items in groups included). One summary at the end."""
+        scan, err = self.collectFrames(scope, pageRange)
+        if scan is None:
+            return err
+        done = self.handleImages(scan.imageFrames)
+        self.reportRun(scan, done)
+        return
+
+    def proxySelection(self, scope='Selection', pageRange='all'):
+        """ Link the image frames of the selection, the whole document or a
+        page range to proxies (see createProxyJob). One summary at the end."""
+        scan, err = self.collectFrames(scope, pageRange)
+        if scan is None:
+            return err
+        done = self.handleImages(scan.imageFrames, proxies=True)
+        self.reportRun(scan, done, proxies=True)
+        return
+
+    def preflightSelection(self, scope='Selection', pageRange='all'):
+        """ Show what Crop and Resize would do with the image frames of the
+        scope, without changing anything (see PhotoBookPreflight.py)."""
+        if scope == 'Selection' and scribus.selectionCount() == 0:
             scribus.messageBox('Warning', 'Nothing selected', ICON_WARNING)
-        else:    # one or more items selected
-            for i in range (0, selectionCount()):
-                scribus.progressSet(i)
-                obj = getSelectedObject(i)
-                selectionList.append(obj)
-                objectType = getObjectType(obj)
-                if objectType == 'Group':
-                    messageBox('Warning', 'Grouped items will be skipped.\nPlease ungroup "'
-                        +obj+'" and try again.', ICON_WARNING)
-                elif (objectType == 'ImageFrame') and (getImageFile(obj) != ""):
-                    self.handleImage(obj)
-                else: # not an image frame -> skip
-                    pass
+            return
+        try:
+            scan = collectImageFrames(scope, pageRange)
+        except ValueError as err:
+            return str(err)    # bad page range: shown in the dialog
+        jobs = []
+        unreadable = []
+        with DocumentBatch(UNIT_POINTS):
+            for imageFrame in scan.imageFrames:
+                try:
+                    jobs.append(self.createJob(imageFrame))
+                except:
+                    unreadable.append(getImageFile(imageFrame))
+        results = preflightJobs(jobs)
+        lines = preflightSummary(results, int(self.resolution))
+        for reason in sorted(scan.skipped):
+            lines.append('Skipped %d %s.' % (scan.skipped[reason], reason))
+        if unreadable:
+            lines.append('%d frame(s) could not be read:' % len(unreadable))
+            lines.extend(unreadable[:10])
+        flagged = unreadable or [result for result in results if result.flag != 'ok']
+        scribus.messageBox('Preflight', '\n'.join(lines),
+            ICON_WARNING if flagged else ICON_INFORMATION, BUTTON_OK)
         return
 
-##################################################
-class TkPhotoBookImageCropResize(Frame):
-    """ GUI interface for PhotoBookImageCropResize.py with Tkinter"""
-
-    def __init__(self, master=None):
-        """ Setup the dialog """
-        Frame.__init__(self, master)
-        self.grid()
-        self.master.resizable(0, 0)
-        self.master.title('Crop and Resize')
-
-        # define variables
-        self.statusVar = StringVar(self, value='Enter Options and press OK.')
-        self.statusLabel = Label(self, fg="red", textvariable=self.statusVar)
-        self.resolutionLabel = Label(self, text='Resolution: ')
-        self.resolutionVar = ttk.Combobox(self, values = ['72','75','96','144','150',
-           '200','288','300','600','1200'], width=9)
-        self.modeLabel = Label(self, text='Color mode: ')
-        self.modeVar = ttk.Combobox(self, values = ['RGB','CMYK','B&W','Grey scale'], width=9)
-        self.fileFormatLabel = Label(self, text='File format: ')
-        self.fileFormatVar = ttk.Combobox(self, values = ['.jpg','.png','.tif'], width=9)
-        self.resampleLabel = Label(self, text='Resampling: ')
-        self.resampleVar = ttk.Combobox(self, values = ['BICUBIC','BILINEAR','LANCZOS'], width=9)
-        self.okButton = Button(self, text="OK", width=6, command=self.okButton_pressed)
-        self.cancelButton = Button(self, text="Cancel", command=self.quit)
-
-        # set default values
-        self.resolutionVar.set('300')
-        self.modeVar.set('RGB')
-        self.fileFormatVar.set('.jpg')
-        self.resampleVar.set('BICUBIC')
-        
-        # make interface layout
-        self.columnconfigure(0, pad=6)
-        currRow = 0
-        self.statusLabel.grid(column=0, row=currRow, columnspan=2)
-        currRow += 1
-        self.resolutionLabel.grid(column=0, row=currRow, sticky=S+E)
-        self.resolutionVar.grid(column=1, row=currRow, sticky=S+W)
-        currRow += 1
-        self.modeLabel.grid(column=0, row=currRow, sticky=S+E)
-        self.modeVar.grid(column=1, row=currRow, sticky=S+W)
-        currRow += 1
-        self.fileFormatLabel.grid(column=0, row=currRow, sticky=S+E)
-        self.fileFormatVar.grid(column=1, row=currRow, sticky=S+W)
-        currRow += 1
-        self.resampleLabel.grid(column=0, row=currRow, sticky=S+E)
-        self.resampleVar.grid(column=1, row=currRow, sticky=S+W)
-        currRow += 1
-        self.rowconfigure(currRow, pad=6)
-        self.cancelButton.grid(column=0, row=currRow, sticky=E)
-        self.okButton.grid(column=1, row=currRow, sticky=W) 
-
-    def okButton_pressed(self):
-        """ Do PhotoBookImageCropResize """
-        
-        spbicr = ScPhotoBookImageCropResize(self.resolutionVar.get(),
-            self.modeVar.get(), self.fileFormatVar.get(), self.resampleVar.get())
-        self.master.withdraw()
-        err = spbicr.handleSelection()
-
-        if err != None:
-            self.master.deiconify()
-            self.statusVar.set(err)
-        else:
-            self.quit()
+def createCropResize(values):
+    """ Return (ScPhotoBookImageCropResize, None) for the options (dict of
+    texts, with the keys of 'PhotoBookImageCropResize.cfg'), or (None, the
+    problem as text)."""
+    if not values['resolution'].isdigit() or int(values['resolution']) == 0:
+        return None, 'Resolution must be an integer > 0.'
+    if not values['workers'].isdigit() or int(values['workers']) == 0:
+        return None, 'Parallel workers must be an integer > 0.'
+    if not values['cachemb'].isdigit():
+        return None, 'Image cache must be an integer (MB).'
+    if not values['maximagemb'].isdigit():
+        return None, 'Memory per image must be an integer (MB, 0 = no limit).'
+    if not values['proxyresolution'].isdigit() or int(values['proxyresolution']) == 0:
+        return None, 'Proxy resolution must be an integer > 0.'
+    if not values['jpegquality'].isdigit() or not 1 <= int(values['jpegquality']) <= 100:
+        return None, 'JPEG quality must be an integer from 1 to 100.'
+    if values['subsampling'] not in JPEG_SUBSAMPLING:
+        return None, 'Subsampling must be one of: ' + ', '.join(JPEG_SUBSAMPLING) + '.'
+    try:
+        targetKB, targetBpp = parseJpegTarget(values['jpegtarget'])
+    except ValueError:
+        return None, 'JPEG target: e.g. 800kB, 1.5bpp or empty.'
+    jpeg = JpegProfile(int(values['jpegquality']), values['progressive'] == '1',
+        values['optimize'] == '1', values['subsampling'], targetKB, targetBpp)
+    icc = IccConversion(values['cmykprofile'].strip(), values['rgbprofile'].strip(),
+        values['intent'], values['embedded'] == '1')
+    try:
+        icc.check()
+    except ValueError as err:
+        return None, str(err)
+    return ScPhotoBookImageCropResize(values['resolution'], values['mode'],
+        values['fileformat'], values['resample'], int(values['workers']), values['quality'],
+        int(values['cachemb']), int(values['maximagemb']), jpeg, icc,
+        int(values['proxyresolution'])), None
 
-    def quit(self):
-        self.master.destroy()
+def runPreset(preset, proxies=False):
+    """ Crop and resize (or make proxies) with a preset of
+    'PhotoBookImageCropResize.cfg', without the dialog; a problem is shown
+    in a message box."""
+    try:
+        values = dict(DEFAULT_OPTIONS, **readPreset(CONFIG_FILE, preset))
+    except ValueError as problem:
+        values, err = None, str(problem)
+    if values is not None:
+        spbicr, err = createCropResize(values)
+        if spbicr is not None:
+            spbicr.timer.add('(run)', 'startup', spbicr.runStart - START_TIME)
+            with Profiler():
+                if proxies:
+                    err = spbicr.proxySelection(values['scope'], values['pages'])
+                else:
+                    err = spbicr.handleSelection(values['scope'], values['pages'])
+    if err is not None:
+        scribus.messageBox('Crop and Resize', err, ICON_WARNING, BUTTON_OK)
 
+##################################################
 ##################################################
 # Start program
 
-def main():
+def runDialog():
+    """ Run with the dialog (see PhotoBookImageCropResizeDialog.py): tkinter
+    is only imported here, a preset run does not need it."""
+    try:
+        from tkinter import Tk
+    except ImportError:
+        print("This script requires Python Tkinter properly installed.")
+        messageBox('Script failed',
+                   'This script requires Python Tkinter properly installed.',
+                   ICON_CRITICAL)
+        return
+    from PhotoBookImageCropResizeDialog import TkPhotoBookImageCropResize
+    values = dict(DEFAULT_OPTIONS, **readPreset(CONFIG_FILE, 'DEFAULT'))
+    root = Tk()
+    app = TkPhotoBookImageCropResize(root, values, createCropResize, START_TIME)
+    root.mainloop()
+
+def main(preset=None, proxies=None):
+    """ Run with the dialog, or without it with a preset (a section of
+    'PhotoBookImageCropResize.cfg', see presetArgument); with proxies (or
+    '--proxies' on the command line) make proxies instead of cropping."""
     if scribus.haveDoc() == 0:
         scribus.messageBox("Script failed",
             "Please open a Scribus document before running this script.",
             scribus.ICON_WARNING,scribus.BUTTON_OK)
         return
     
+    index = openDocumentImageIndex()    # image headers of earlier runs
     try:
         scribus.statusMessage('Running script...')
         scribus.progressReset()
         unit = scribus.getUnit()
-        root = Tk()
-        app = TkPhotoBookImageCropResize(root)
-        root.mainloop()
+        if proxies is None:
+            proxies = '--proxies' in sys.argv[1:]
+        if preset is None:
+            preset = presetArgument()
+        if preset is None and proxies:
+            preset = 'DEFAULT'
+        if preset is None:
+            runDialog()
+        else:
+            runPreset(preset, proxies)
     finally:
         if scribus.haveDoc():
             scribus.redrawAll()
         scribus.setUnit(unit)
+        if index is not None:
+            index.close()
         scribus.statusMessage('Done.')
         scribus.progressReset()
 
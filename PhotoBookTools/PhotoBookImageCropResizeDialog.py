@@ -0,0 +1,452 @@
+#! /usr/bin/env python
+#-*- coding: utf-8 -*-
+'''
+VERSION: 1.0 of 2026-10-17
+AUTHOR: Rafferty River.
+LICENSE: GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY.
+
+DESCRIPTION & USAGE:
+This module is the Tk dialog of 'PhotoBookImageCropResize.py', which
+imports it only when it shows the dialog: a run with a preset does not
+import tkinter. It is not a script to run by itself.
+The dialog starts with the options of [DEFAULT] of
+'PhotoBookImageCropResize.cfg'. OK and 'Proxies' process the images in
+a background thread (CropRun): the dialog shows the frames done, the
+frames per second and the time left, and its 'Stop' button ends the run
+after the current frame (with parallel workers: after the images being
+processed), keeping the frames done so far; closing the window does the
+same. Scribus itself is only called from the Tk thread, in short steps
+(Tk after() callbacks), so the dialog keeps going while the frames are
+read and relinked.
+The timing report gives the time from the start of the script to the
+dialog ('startup'), in the dialog ('dialog') and from then to the first
+frame done ('first frame').
+'''
+##################################################
+# imports
+import os, time, threading, queue
+from contextlib import ExitStack
+
+import scribus
+from tkinter import * # python 3 syntax
+from tkinter import ttk # for ComboBox
+from tkinter import filedialog
+
+from PhotoBookCropEngine import processJobs, JPEG_SUBSAMPLING, RENDERING_INTENTS
+from PhotoBookCommon import SCOPES, DocumentBatch
+from PhotoBookTiming import Profiler
+
+# milliseconds between progress updates during a run
+POLL_MS = 200
+# frames read per step of a run (between two steps the dialog handles its events)
+READ_FRAMES = 10
+
+##################################################
+class CropRun:
+    """ A run of the dialog (Crop and Resize or proxies): the images are
+    processed in a background thread, while the Tk (main) thread reads the
+    frames and relinks them as the results come in, in steps scheduled
+    with after(ms, callback) (of the dialog), so the dialog can show the
+    progress and stop the run (cancel) in between."""
+
+    def __init__(self, spbicr, scan, proxies=False):
+        """ Setup basic things """
+        self.spbicr = spbicr
+        self.scan = scan
+        self.proxies = proxies
+        self.results = queue.Queue()        # (job, error), then None at the end
+        self.cancelEvent = threading.Event()
+        self.jobs = []
+        self.overwrites = {}                # see prepareJobs
+        self.read = 0                       # frames read
+        self.done = 0                       # frames done
+        self.processed = 0                  # jobs back from the thread
+        self.startTime = None               # when the thread started
+        self.scope = None                   # batch and profile of the run, see start
+
+    def start(self, after, showProgress, finished):
+        """ Start the run: read the frames (relinking the up-to-date ones)
+        READ_FRAMES at a time, then process the images in the background
+        and relink the frames as they are done, every POLL_MS. The whole
+        run is one DocumentBatch, profiled (PHOTOBOOK_PROFILE: this thread
+        here, the background thread in work). showProgress(text) shows the
+        progress; at the end the summary is shown and finished() called."""
+        self.after = after
+        self.showProgress = showProgress
+        self.finished = finished
+        with ExitStack() as scope:    # closed in finish (also after an error)
+            scope.enter_context(Profiler())
+            self.batch = scope.enter_context(DocumentBatch(scribus.UNIT_POINTS))
+            self.scope = scope.pop_all()
+        self.after(0, self.readFrames)
+
+    def readFrames(self):
+        """ Read the next frames (Tk thread); start the background thread
+        after the last."""
+        try:
+            imageFrames = self.scan.imageFrames
+            if not self.cancelEvent.is_set():
+                jobs, done = self.spbicr.prepareJobs(
+                    imageFrames[self.read:self.read + READ_FRAMES],
+                    self.batch, self.proxies, self.overwrites)
+                self.jobs += jobs
+                self.done += done
+                self.read = min(self.read + READ_FRAMES, len(imageFrames))
+            if self.cancelEvent.is_set():
+                self.finish()
+            elif self.read < len(imageFrames):
+                self.showProgress('Reading the frames: %d of %d...'
+                    % (self.read, len(imageFrames)))
+                self.after(0, self.readFrames)
+            else:
+                scribus.progressTotal(len(self.jobs))
+                self.startTime = time.perf_counter()
+                thread = threading.Thread(target=self.work, daemon=True)
+                thread.start()
+                self.showProgress(self.progressText())
+                self.after(POLL_MS, self.poll)
+        except:
+            self.finish()    # the error is reported by Tk
+            raise
+
+    def poll(self):
+        """ Relink the frames of the results so far (Tk thread); finish
+        after the last."""
+        try:
+            if self.relink(self.batch):
+                self.showProgress(self.progressText())
+                self.after(POLL_MS, self.poll)
+            else:
+                self.finish()
+        except:
+            self.finish()    # the error is reported by Tk
+            raise
+
+    def finish(self):
+        """ End the run (once): stop the thread (if still going, e.g. after
+        an error), save the manifest, end the batch and the profile, show
+        the summary and call finished()."""
+        if self.scope is None:
+            return
+        self.cancelEvent.set()
+        try:
+            try:
+                self.spbicr.finishJobs()
+            finally:
+                scope, self.scope = self.scope, None
+                scope.close()
+            notes = []
+            notDone = len(self.scan.imageFrames) - self.read + len(self.jobs) - self.processed
+            if notDone:
+                notes.append('Stopped: %d frame(s) not done.' % notDone)
+            self.spbicr.reportRun(self.scan, self.done, self.proxies, notes)
+        finally:
+            self.finished()
+
+    def work(self):
+        """ Process the jobs (background thread: no Scribus calls here),
+        profiled to a file of its own (see PhotoBookTiming.Profiler)."""
+        try:
+            with Profiler(part='worker'):
+                for result in processJobs(self.jobs, self.spbicr.workers, self.spbicr.cache,
+                    self.cancelEvent):
+                    self.results.put(result)
+        except Exception as err:    # e.g. out of memory: the frames done are kept
+            self.spbicr.errors.append(str(err))
+        finally:
+            self.results.put(None)
+
+    def cancel(self):
+        """ Stop after the current frame."""
+        self.cancelEvent.set()
+
+    def relink(self, batch):
+        """ Relink the frames of the results so far (Tk thread). Returns
+        False when all are in."""
+        while True:
+            try:
+                result = self.results.get_nowait()
+            except queue.Empty:
+                return True
+            if result is None:
+                return False
+            self.processed += 1
+            scribus.progressSet(self.processed)
+            if self.spbicr.finishJob(result[0], result[1], batch):
+                self.done += 1
+
+    def progressText(self):
+        """ Frames done, frames per second and time left, for the dialog."""
+        if self.startTime is None:
+            return 'Reading the frames, stopping...'
+        seconds = time.perf_counter() - self.startTime
+        rate = self.processed / seconds if seconds > 0 else 0.0
+        text = '%d of %d frame(s) done' % (self.processed, len(self.jobs))
+        if self.cancelEvent.is_set():
+            return text + ', stopping after the current frame...'
+        if rate > 0:
+            left = int((len(self.jobs) - self.processed) / rate)
+            text += ', %.1f per second, %d:%02d left' % (rate, left // 60, left % 60)
+        return text + '.'
+
+##################################################
+class TkPhotoBookImageCropResize(Frame):
+    """ GUI interface for PhotoBookImageCropResize.py with Tkinter"""
+
+    def __init__(self, master, values, createCropResize, startTime):
+        """ Setup the dialog: values are the options it starts with,
+        createCropResize and startTime (the start of the script, for the
+        timing report) come from PhotoBookImageCropResize.py """
+        Frame.__init__(self, master)
+        self.createCropResize = createCropResize
+        self.startTime = startTime
+        self.grid()
+        self.master.resizable(0, 0)
+        self.master.title('Crop and Resize')
+
+        # define variables
+        self.statusVar = StringVar(self, value='Enter Options and press OK.')
+        self.statusLabel = Label(self, fg="red", textvariable=self.statusVar)
+        self.resolutionLabel = Label(self, text='Resolution: ')
+        self.resolutionVar = ttk.Combobox(self, values = ['72','75','96','144','150',
+           '200','288','300','600','1200'], width=9)
+        self.modeLabel = Label(self, text='Color mode: ')
+        self.modeVar = ttk.Combobox(self, values = ['RGB','CMYK','B&W','Grey scale'], width=9)
+        self.fileFormatLabel = Label(self, text='File format: ')
+        self.fileFormatVar = ttk.Combobox(self, values = ['.jpg','.png','.tif'], width=9)
+        self.resampleLabel = Label(self, text='Resampling: ')
+        self.resampleVar = ttk.Combobox(self, values = ['BICUBIC','BILINEAR','LANCZOS'], width=9)
+        self.qualityLabel = Label(self, text='Quality: ')
+        self.qualityVar = ttk.Combobox(self, values = ['Best','Fast'], width=9)
+        self.jpegQualityLabel = Label(self, text='JPEG quality: ')
+        self.jpegQualityVar = StringVar()
+        self.jpegQualityEntry = Entry(self, textvariable=self.jpegQualityVar, width=9)
+        self.progressiveLabel = Label(self, text='Progressive: ')
+        self.progressiveVar = IntVar()
+        self.progressiveCheck = Checkbutton(self, variable=self.progressiveVar)
+        self.optimizeLabel = Label(self, text='Optimize: ')
+        self.optimizeVar = IntVar()
+        self.optimizeCheck = Checkbutton(self, variable=self.optimizeVar)
+        self.subsamplingLabel = Label(self, text='Subsampling: ')
+        self.subsamplingVar = ttk.Combobox(self, values = list(JPEG_SUBSAMPLING), width=9)
+        self.jpegTargetLabel = Label(self, text='JPEG target: ')
+        self.jpegTargetVar = StringVar()
+        self.jpegTargetEntry = Entry(self, textvariable=self.jpegTargetVar, width=9)
+        self.cmykProfileLabel = Label(self, text='CMYK profile: ')
+        self.cmykProfileVar = StringVar()
+        self.cmykProfileEntry = Entry(self, textvariable=self.cmykProfileVar, width=20)
+        self.cmykProfileButton = Button(self, text="Browse...",
+            command=lambda: self.browseProfile(self.cmykProfileVar, 'CMYK profile'))
+        self.rgbProfileLabel = Label(self, text='RGB profile: ')
+        self.rgbProfileVar = StringVar()
+        self.rgbProfileEntry = Entry(self, textvariable=self.rgbProfileVar, width=20)
+        self.rgbProfileButton = Button(self, text="Browse...",
+            command=lambda: self.browseProfile(self.rgbProfileVar, 'RGB profile'))
+        self.intentLabel = Label(self, text='Rendering intent: ')
+        self.intentVar = ttk.Combobox(self, values = list(RENDERING_INTENTS), width=18)
+        self.embeddedLabel = Label(self, text='Use embedded profiles: ')
+        self.embeddedVar = IntVar()
+        self.embeddedCheck = Checkbutton(self, variable=self.embeddedVar)
+        self.scopeLabel = Label(self, text='Image frames of: ')
+        self.scopeVar = ttk.Combobox(self, values = SCOPES, width=15)
+        self.pagesLabel = Label(self, text='Pages (e.g. 3-10): ')
+        self.pagesVar = StringVar()
+        self.pagesEntry = Entry(self, textvariable=self.pagesVar, width=9)
+        self.cacheLabel = Label(self, text='Image cache (MB): ')
+        self.cacheVar = StringVar()
+        self.cacheEntry = Entry(self, textvariable=self.cacheVar, width=9)
+        self.maxImageLabel = Label(self, text='Memory per image (MB): ')
+        self.maxImageVar = StringVar()
+        self.maxImageEntry = Entry(self, textvariable=self.maxImageVar, width=9)
+        self.workersLabel = Label(self, text='Parallel workers: ')
+        self.workersVar = ttk.Combobox(self, values = [str(n) for n in
+            range(1, (os.cpu_count() or 1) + 1)], width=9)
+        self.proxyResolutionLabel = Label(self, text='Proxy resolution: ')
+        self.proxyResolutionVar = ttk.Combobox(self, values = ['72','96','150'], width=9)
+        self.okButton = Button(self, text="OK", width=6, command=self.okButton_pressed)
+        self.proxiesButton = Button(self, text="Proxies", command=self.proxiesButton_pressed)
+        self.preflightButton = Button(self, text="Preflight",
+            command=self.preflightButton_pressed)
+        self.cancelButton = Button(self, text="Cancel", command=self.cancelButton_pressed)
+        self.master.protocol('WM_DELETE_WINDOW', self.cancelButton_pressed)
+        self.run = None    # CropRun while the images are processed
+
+        # set default values (from 'PhotoBookImageCropResize.cfg')
+        self.resolutionVar.set(values['resolution'])
+        self.modeVar.set(values['mode'])
+        self.fileFormatVar.set(values['fileformat'])
+        self.resampleVar.set(values['resample'])
+        self.qualityVar.set(values['quality'])
+        self.jpegQualityVar.set(values['jpegquality'])
+        self.progressiveVar.set(1 if values['progressive'] == '1' else 0)
+        self.optimizeVar.set(1 if values['optimize'] == '1' else 0)
+        self.subsamplingVar.set(values['subsampling'])
+        self.jpegTargetVar.set(values['jpegtarget'])
+        self.cmykProfileVar.set(values['cmykprofile'])
+        self.rgbProfileVar.set(values['rgbprofile'])
+        self.intentVar.set(values['intent'])
+        self.embeddedVar.set(1 if values['embedded'] == '1' else 0)
+        self.scopeVar.set(values['scope'])
+        self.pagesVar.set(values['pages'])
+        self.workersVar.set(values['workers'])
+        self.cacheVar.set(values['cachemb'])
+        self.maxImageVar.set(values['maximagemb'])
+        self.proxyResolutionVar.set(values['proxyresolution'])
+        
+        # make interface layout
+        self.columnconfigure(0, pad=6)
+        currRow = 0
+        self.statusLabel.grid(column=0, row=currRow, columnspan=3)
+        currRow += 1
+        self.resolutionLabel.grid(column=0, row=currRow, sticky=S+E)
+        self.resolutionVar.grid(column=1, row=currRow, sticky=S+W)
+        currRow += 1
+        self.modeLabel.grid(column=0, row=currRow, sticky=S+E)
+        self.modeVar.grid(column=1, row=currRow, sticky=S+W)
+        currRow += 1
+        self.cmykProfileLabel.grid(column=0, row=currRow, sticky=S+E)
+        self.cmykProfileEntry.grid(column=1, row=currRow, sticky=S+W)
+        self.cmykProfileButton.grid(column=2, row=currRow, sticky=S+W, padx=5)
+        currRow += 1
+        self.rgbProfileLabel.grid(column=0, row=currRow, sticky=S+E)
+        self.rgbProfileEntry.grid(column=1, row=currRow, sticky=S+W)
+        self.rgbProfileButton.grid(column=2, row=currRow, sticky=S+W, padx=5)
+        currRow += 1
+        self.intentLabel.grid(column=0, row=currRow, sticky=S+E)
+        self.intentVar.grid(column=1, row=currRow, sticky=S+W)
+        currRow += 1
+        self.embeddedLabel.grid(column=0, row=currRow, sticky=S+E)
+        self.embeddedCheck.grid(column=1, row=currRow, sticky=S+W)
+        currRow += 1
+        self.fileFormatLabel.grid(column=0, row=currRow, sticky=S+E)
+        self.fileFormatVar.grid(column=1, row=currRow, sticky=S+W)
+        currRow += 1
+        self.resampleLabel.grid(column=0, row=currRow, sticky=S+E)
+        self.resampleVar.grid(column=1, row=currRow, sticky=S+W)
+        currRow += 1
+        self.jpegQualityLabel.grid(column=0, row=currRow, sticky=S+E)
+        self.jpegQualityEntry.grid(column=1, row=currRow, sticky=S+W)
+        currRow += 1
+        self.progressiveLabel.grid(column=0, row=currRow, sticky=S+E)
+        self.progressiveCheck.grid(column=1, row=currRow, sticky=S+W)
+        currRow += 1
+        self.optimizeLabel.grid(column=0, row=currRow, sticky=S+E)
+        self.optimizeCheck.grid(column=1, row=currRow, sticky=S+W)
+        currRow += 1
+        self.subsamplingLabel.grid(column=0, row=currRow, sticky=S+E)
+        self.subsamplingVar.grid(column=1, row=currRow, sticky=S+W)
+        currRow += 1
+        self.jpegTargetLabel.grid(column=0, row=currRow, sticky=S+E)
+        self.jpegTargetEntry.grid(column=1, row=currRow, sticky=S+W)
+        currRow += 1
+        self.scopeLabel.grid(column=0, row=currRow, sticky=S+E)
+        self.scopeVar.grid(column=1, row=currRow, sticky=S+W)
+        currRow += 1
+        self.pagesLabel.grid(column=0, row=currRow, sticky=S+E)
+        self.pagesEntry.grid(column=1, row=currRow, sticky=S+W)
+        currRow += 1
+        self.qualityLabel.grid(column=0, row=currRow, sticky=S+E)
+        self.qualityVar.grid(column=1, row=currRow, sticky=S+W)
+        currRow += 1
+        self.workersLabel.grid(column=0, row=currRow, sticky=S+E)
+        self.workersVar.grid(column=1, row=currRow, sticky=S+W)
+        currRow += 1
+        self.cacheLabel.grid(column=0, row=currRow, sticky=S+E)
+        self.cacheEntry.grid(column=1, row=currRow, sticky=S+W)
+        currRow += 1
+        self.maxImageLabel.grid(column=0, row=currRow, sticky=S+E)
+        self.maxImageEntry.grid(column=1, row=currRow, sticky=S+W)
+        currRow += 1
+        self.proxyResolutionLabel.grid(column=0, row=currRow, sticky=S+E)
+        self.proxyResolutionVar.grid(column=1, row=currRow, sticky=S+W)
+        self.proxiesButton.grid(column=2, row=currRow, sticky=W, padx=5)
+        currRow += 1
+        self.rowconfigure(currRow, pad=6)
+        self.cancelButton.grid(column=0, row=currRow, sticky=E)
+        self.okButton.grid(column=1, row=currRow, sticky=W) 
+        self.preflightButton.grid(column=2, row=currRow, sticky=W, padx=5)
+        self.openTime = time.perf_counter()    # for the timing report
+
+    def browseProfile(self, var, title):
+        """ Choose an ICC profile file """
+        path = filedialog.askopenfilename(title=title,
+            filetypes=[('ICC profiles', '*.icc *.icm'), ('All files', '*')])
+        if path:
+            var.set(path)
+
+    def dialogValues(self):
+        """ Return the options of the dialog (texts, with the keys of
+        'PhotoBookImageCropResize.cfg')."""
+        return {
+            'resolution': self.resolutionVar.get(),
+            'mode': self.modeVar.get(),
+            'fileformat': self.fileFormatVar.get(),
+            'resample': self.resampleVar.get(),
+            'quality': self.qualityVar.get(),
+            'jpegquality': self.jpegQualityVar.get(),
+            'progressive': str(self.progressiveVar.get()),
+            'optimize': str(self.optimizeVar.get()),
+            'subsampling': self.subsamplingVar.get(),
+            'jpegtarget': self.jpegTargetVar.get(),
+            'cmykprofile': self.cmykProfileVar.get(),
+            'rgbprofile': self.rgbProfileVar.get(),
+            'intent': self.intentVar.get(),
+            'embedded': str(self.embeddedVar.get()),
+            'scope': self.scopeVar.get(),
+            'pages': self.pagesVar.get(),
+            'workers': self.workersVar.get(),
+            'cachemb': self.cacheVar.get(),
+            'maximagemb': self.maxImageVar.get(),
+            'proxyresolution': self.proxyResolutionVar.get(),
+        }
+
+    def preflightButton_pressed(self):
+        """ Show the preflight; the dialog stays open """
+        spbicr, err = self.createCropResize(self.dialogValues())
+        if spbicr is None:
+            self.statusVar.set(err)
+            return
+        err = spbicr.preflightSelection(self.scopeVar.get(), self.pagesVar.get())
+        self.statusVar.set(err or 'Preflight done: enter Options and press OK.')
+
+    def proxiesButton_pressed(self):
+        """ Link the frames to proxies """
+        self.startRun(proxies=True)
+
+    def okButton_pressed(self):
+        """ Do PhotoBookImageCropResize """
+        self.startRun()
+
+    def startRun(self, proxies=False):
+        """ Start a run in the background (see CropRun) """
+        spbicr, err = self.createCropResize(self.dialogValues())
+        if spbicr is None:
+            self.statusVar.set(err)
+            return
+        spbicr.timer.add('(run)', 'startup', self.openTime - self.startTime)
+        spbicr.timer.add('(run)', 'dialog', spbicr.runStart - self.openTime)
+        scan, err = spbicr.collectFrames(self.scopeVar.get(), self.pagesVar.get())
+        if scan is None:
+            if err != None:
+                self.statusVar.set(err)
+            return
+        self.run = CropRun(spbicr, scan, proxies)
+        for button in (self.okButton, self.proxiesButton, self.preflightButton):
+            button.configure(state=DISABLED)
+        self.cancelButton.configure(text='Stop')
+        self.statusVar.set('Reading the frames...')
+        self.run.start(self.after, self.statusVar.set, self.quit)
+
+    def cancelButton_pressed(self):
+        """ Stop the run (also when the window is closed), or else close
+        the dialog """
+        if self.run is not None:
+            self.run.cancel()
+            self.statusVar.set(self.run.progressText())
+        else:
+            self.quit()
+
+    def quit(self):
+        self.master.destroy()
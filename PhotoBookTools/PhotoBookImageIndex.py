@@ -0,0 +1,307 @@
+#! /usr/bin/env python
+#-*- coding: utf-8 -*-
+'''
+VERSION: 1.0 of 2026-10-17
+AUTHOR: Rafferty River.
+LICENSE: GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY.
+
+DESCRIPTION & USAGE:
+This module keeps what the PhotoBook Tools know about image files (see
+PhotoBookImageInfo.py: pixel size, resolution, mode, EXIF orientation,
+focal point, capture time and file size) in a SQLite file
+'PhotoBookImageIndex.sqlite' next to the Scribus document, so a file is
+only opened again when it has changed. The scripts use it through
+PhotoBookImageInfo.imageInfo (see PhotoBookCommon.openDocumentImageIndex).
+
+An entry holds the modification time (ns) and size of the file when it
+was read; on every lookup the file is checked (os.stat) against them, so
+an image that is changed or replaced is read again. The index is filled
+lazily: the files are read when a tool first needs them, and the new
+entries are written at the end of the run (close).
+
+It is also a command line tool (Python 3, no Scribus needed):
+
+    python PhotoBookImageIndex.py PROJECT refresh FOLDER|FILE ...
+    python PhotoBookImageIndex.py PROJECT invalidate [FOLDER|FILE ...]
+    python PhotoBookImageIndex.py PROJECT prune
+    python PhotoBookImageIndex.py PROJECT stats
+
+PROJECT is the folder of the document (or the index file itself).
+'refresh' reads all image files given (folders: not their subfolders),
+also the ones that look unchanged (e.g. on a network drive with coarse
+file times); 'invalidate' forgets the files given (nothing given: all);
+'prune' forgets the files that are gone or changed.
+
+Without the sqlite3 module (some Python builds lack it) there is no
+index; the tools then only keep the image data in memory.
+'''
+##################################################
+# imports
+import sys, os, argparse, threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import sqlite3
+except ImportError:
+    sqlite3 = None
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from PhotoBookImageInfo import ImageInfo, readImageInfo, listImageFiles, useImageIndex, \
+    stopImageIndex
+
+INDEX_FILENAME = 'PhotoBookImageIndex.sqlite'
+INDEX_VERSION = 1
+
+_COLUMNS = ['path', 'mtime_ns', 'file_size', 'width', 'height', 'dpi_x', 'dpi_y', 'mode',
+    'orientation', 'focus_x', 'focus_y', 'capture_time']
+
+##################################################
+def normPath(path):
+    """ Return the key used for a file path in the index."""
+    return os.path.normcase(os.path.abspath(path))
+
+def _row(key, st, info):
+    focus = info.focus or (None, None)
+    return (key, st.st_mtime_ns, st.st_size, info.size[0], info.size[1], info.dpi[0],
+        info.dpi[1], info.mode, info.orientation, focus[0], focus[1], info.captureTime)
+
+def _info(path, row):
+    focus = None if row[9] is None else (row[9], row[10])
+    return ImageInfo(path, (row[3], row[4]), (row[5], row[6]), row[8], focus, row[11],
+        row[7], row[2])
+
+##################################################
+class ImageIndex:
+    """ Persistent index of ImageInfo, one SQLite file per project.
+    Safe to use from several threads (see PhotoBookImageInfo.scanImages)."""
+
+    def __init__(self, indexFile):
+        """ Setup basic things (the file is opened on first use) """
+        self.indexFile = indexFile
+        self.connection = None
+        self.rows = None       # normPath -> row, all entries (loaded on first use)
+        self.pending = {}      # normPath -> row, to write
+        self.lock = threading.Lock()
+
+    def load(self):
+        """ Open the index file (made if needed) and read all entries. An
+        index file that cannot be read is started anew."""
+        with self.lock:
+            if self.rows is not None:
+                return
+            rows = {}    # self.rows is set when complete: other threads do not lock
+            try:
+                self.connection = self.connect()
+            except sqlite3.OperationalError:
+                self.connection = None    # e.g. locked or read-only: memory only
+                self.rows = rows
+                return
+            except sqlite3.DatabaseError:    # not an index file (any more)
+                try:
+                    os.remove(self.indexFile)
+                    self.connection = self.connect()
+                except (OSError, sqlite3.Error):
+                    self.connection = None    # no index: memory only
+                    self.rows = rows
+                    return
+            for row in self.connection.execute('SELECT %s FROM images' % ', '.join(_COLUMNS)):
+                rows[row[0]] = row
+            self.rows = rows
+
+    def connect(self):
+        """ Return a connection to the index file, with the images table
+        of this INDEX_VERSION."""
+        connection = sqlite3.connect(self.indexFile, timeout=10, check_same_thread=False)
+        try:
+            version = connection.execute('PRAGMA user_version').fetchone()[0]
+            if version != INDEX_VERSION:
+                with connection:
+                    connection.execute('DROP TABLE IF EXISTS images')
+                    connection.execute('CREATE TABLE images (path TEXT PRIMARY KEY, '
+                        'mtime_ns INTEGER, file_size INTEGER, width INTEGER, height INTEGER, '
+                        'dpi_x REAL, dpi_y REAL, mode TEXT, orientation INTEGER, '
+                        'focus_x REAL, focus_y REAL, capture_time TEXT)')
+                    connection.execute('PRAGMA user_version = %d' % INDEX_VERSION)
+            connection.execute('SELECT path FROM images LIMIT 1').fetchall()
+        except sqlite3.Error:
+            connection.close()
+            raise
+        return connection
+
+    def lookup(self, path, st):
+        """ Return the ImageInfo of path if the index has it for this
+        os.stat result (same modification time and size), else None."""
+        if self.rows is None:
+            self.load()
+        row = self.rows.get(normPath(path))
+        if row is None or row[1] != st.st_mtime_ns or row[2] != st.st_size:
+            return None
+        return _info(path, row)
+
+    def store(self, info, st):
+        """ Add (or replace) the ImageInfo of a file, read after os.stat
+        gave st; written by save."""
+        if self.rows is None:
+            self.load()
+        key = normPath(info.path)
+        row = _row(key, st, info)
+        with self.lock:
+            self.rows[key] = row
+            self.pending[key] = row
+
+    def forget(self, keys):
+        """ Remove entries (normPath keys) from the index file right away."""
+        keys = list(keys)
+        with self.lock:
+            for key in keys:
+                self.rows.pop(key, None)
+                self.pending.pop(key, None)
+            if self.connection is not None and keys:
+                with self.connection:
+                    self.connection.executemany('DELETE FROM images WHERE path = ?',
+                        [(key,) for key in keys])
+
+    def save(self):
+        """ Write the new entries to the index file, in one transaction.
+        Another process may have written the same file: the last one wins."""
+        with self.lock:
+            if self.connection is None or not self.pending:
+                self.pending.clear()
+                return
+            rows = list(self.pending.values())
+            self.pending.clear()
+            try:
+                with self.connection:
+                    self.connection.executemany('INSERT OR REPLACE INTO images (%s) '
+                        'VALUES (%s)' % (', '.join(_COLUMNS), ', '.join('?' * len(_COLUMNS))),
+                        rows)
+            except sqlite3.Error:
+                pass    # e.g. read-only folder: the index is only a cache
+
+    def close(self):
+        """ Save, close the index file and stop using it for imageInfo."""
+        self.save()
+        stopImageIndex(self)
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+        self.rows = None
+
+    ##################################################
+    # commands
+
+    def refresh(self, paths, workers=8):
+        """ Read the header of all image files in paths (folders: their
+        image files), whether they changed or not. Files that cannot be read
+        are forgotten. Returns (number read, number unreadable)."""
+        if self.rows is None:
+            self.load()
+        files = []
+        for path in paths:
+            files.extend(listImageFiles(path) if os.path.isdir(path) else [path])
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            results = list(pool.map(_readStat, files))
+        unreadable = [normPath(path) for path, (info, st) in zip(files, results) if info is None]
+        for info, st in results:
+            if info is not None:
+                self.store(info, st)
+        self.forget(unreadable)
+        self.save()
+        return len(files) - len(unreadable), len(unreadable)
+
+    def invalidate(self, paths=None):
+        """ Forget the files in paths (a folder: all files in it and in its
+        subfolders); paths None: forget all. Returns the number forgotten."""
+        if self.rows is None:
+            self.load()
+        if paths is None:
+            keys = list(self.rows)
+        else:
+            keys = set()
+            for path in paths:
+                key = normPath(path)
+                prefix = key.rstrip(os.sep) + os.sep
+                keys.update(k for k in self.rows if k == key or k.startswith(prefix))
+        self.forget(keys)
+        return len(keys)
+
+    def prune(self):
+        """ Forget the files that are gone or have changed since they were
+        read. Returns the number forgotten."""
+        if self.rows is None:
+            self.load()
+        keys = []
+        for key, row in list(self.rows.items()):
+            try:
+                st = os.stat(key)
+            except OSError:
+                keys.append(key)
+                continue
+            if row[1] != st.st_mtime_ns or row[2] != st.st_size:
+                keys.append(key)
+        self.forget(keys)
+        return len(keys)
+
+def _readStat(path):
+    """ Return (ImageInfo, os.stat result) of a file, or (None, None).
+    The file is checked before it is read: if it changes in between, the
+    entry is older than the file and it is read again on the next lookup."""
+    try:
+        st = os.stat(path)
+        return readImageInfo(path), st
+    except Exception:    # Pillow raises more than OSError for broken files
+        return None, None
+
+def indexFileOf(project):
+    """ Return the index file of a project folder (or the index file itself)."""
+    if os.path.isdir(project):
+        return os.path.join(project, INDEX_FILENAME)
+    return project
+
+def openImageIndex(project):
+    """ Let imageInfo use the index of a project folder (or index file).
+    Returns the ImageIndex (call its close at the end of the run), or None
+    without the sqlite3 module."""
+    if sqlite3 is None:
+        return None
+    index = ImageIndex(indexFileOf(project))
+    useImageIndex(index)
+    return index
+
+##################################################
+# Start program
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Refresh or invalidate the image '
+        'index of the PhotoBook Tools.')
+    parser.add_argument('project', help='folder of the Scribus document (or the index file)')
+    parser.add_argument('command', choices=['refresh', 'invalidate', 'prune', 'stats'])
+    parser.add_argument('paths', nargs='*', help='image files or folders')
+    parser.add_argument('--workers', type=int, default=8, help='threads to read headers')
+    args = parser.parse_args(argv)
+
+    if sqlite3 is None:
+        print('The sqlite3 module is not available in this Python.', file=sys.stderr)
+        return 1
+    if args.command == 'refresh' and not args.paths:
+        parser.error('refresh needs image files or folders')
+    index = ImageIndex(indexFileOf(args.project))
+    try:
+        if args.command == 'refresh':
+            done, unreadable = index.refresh(args.paths, args.workers)
+            print('%d image(s) read, %d unreadable.' % (done, unreadable))
+        elif args.command == 'invalidate':
+            print('%d image(s) forgotten.' % index.invalidate(args.paths or None))
+        elif args.command == 'prune':
+            print('%d image(s) forgotten (gone or changed).' % index.prune())
+        else:
+            index.load()
+            print('%s: %d image(s).' % (index.indexFile, len(index.rows)))
+    finally:
+        index.close()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
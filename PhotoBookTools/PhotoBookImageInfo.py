@@ -0,0 +1,235 @@
+#! /usr/bin/env python
+#-*- coding: utf-8 -*-
+'''
+VERSION: 1.0 of 2026-10-17
+AUTHOR: Rafferty River.
+LICENSE: GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY.
+
+DESCRIPTION & USAGE:
+This module reads what the PhotoBook Tools need to know about an image
+file from its header only (the pixels are not decoded): pixel size,
+resolution (DPI), mode, EXIF orientation, EXIF subject area (focal
+point), capture time and file size.
+The results are cached per file (path, modification time and size), in
+memory and, when a script opened one, in the persistent image index of
+the project (see PhotoBookImageIndex.py).
+It also holds the math to fill or fit an image in a frame.
+It is not a script to run by itself; it does not need Scribus.
+
+The Pillow (PIL) package (https://python-pillow.org) is used to read the
+headers; without it, imageInfo raises OSError. It is imported when the
+first header is read (loadPillow), so a script that reads none (e.g. a grid
+layout) starts faster.
+'''
+##################################################
+# imports
+import os, time
+from concurrent.futures import ThreadPoolExecutor
+
+Image = None    # PIL.Image, imported on first use (see loadPillow)
+_pillowTried = False
+
+FIT_MODES = ['fill', 'fit', 'focal']
+IMAGE_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.tif', '.tiff']
+
+EXIF_IFD = 0x8769
+EXIF_ORIENTATION = 0x0112
+EXIF_DATETIME = 0x0132
+EXIF_DATETIME_ORIGINAL = 0x9003
+EXIF_SUBJECT_AREA = 0x9214
+EXIF_SUBJECT_LOCATION = 0xA214
+
+# a point (x, y as part of the size) of the stored image, as shown for each
+# EXIF orientation
+_ORIENTED_POINT = {
+    1: lambda x, y: (x, y),
+    2: lambda x, y: (1 - x, y),        # mirrored
+    3: lambda x, y: (1 - x, 1 - y),    # turned 180
+    4: lambda x, y: (x, 1 - y),        # mirrored vertically
+    5: lambda x, y: (y, x),            # transposed
+    6: lambda x, y: (1 - y, x),        # turned 90 clockwise
+    7: lambda x, y: (1 - y, 1 - x),    # transversed
+    8: lambda x, y: (y, 1 - x),        # turned 90 counterclockwise
+}
+
+##################################################
+class ImageInfo:
+    """ Header data of an image file. size and focus are as shown
+    (after the EXIF orientation)."""
+
+    def __init__(self, path, size, dpi, orientation=1, focus=None, captureTime=None,
+        mode=None, fileSize=None):
+        """ Setup basic things """
+        self.path = path
+        self.size = size                  # (width, height) in pixels
+        self.dpi = dpi                    # (x, y) dots per inch
+        self.orientation = orientation    # EXIF orientation (1..8)
+        self.focus = focus                # (x, y) as part (0..1) of the size, or None
+        self.captureTime = captureTime    # EXIF 'YYYY:MM:DD HH:MM:SS', or None
+        self.mode = mode                  # Pillow mode ('RGB', 'CMYK', 'L', ...)
+        self.fileSize = fileSize          # in bytes
+
+    def aspect(self):
+        """ Aspect ratio (width/height) as shown by Scribus, which uses the
+        resolution of each direction."""
+        return self.size[0] * self.dpi[1] / (self.size[1] * self.dpi[0])
+
+    def storedSize(self):
+        """ (width, height) of the image as stored in the file (before
+        the EXIF orientation)."""
+        if self.orientation in (5, 6, 7, 8):
+            return (self.size[1], self.size[0])
+        return self.size
+
+    def sortTime(self):
+        """ Capture time, or else the modification time of the file, as
+        'YYYY:MM:DD HH:MM:SS' (to sort photos by time)."""
+        if self.captureTime:
+            return self.captureTime
+        try:
+            return time.strftime('%Y:%m:%d %H:%M:%S', time.localtime(os.path.getmtime(self.path)))
+        except OSError:
+            return ''
+
+def loadPillow():
+    """ Import Pillow (on first use). Returns PIL.Image, or None if Pillow
+    is not installed."""
+    global Image, _pillowTried
+    if not _pillowTried:
+        try:
+            from PIL import Image as pilImage
+            Image = pilImage
+        except ImportError:
+            pass
+        _pillowTried = True
+    return Image
+
+_infoCache = {}      # (path, mtime_ns, size) -> ImageInfo
+_imageIndex = None   # persistent index (see PhotoBookImageIndex.py), or None
+
+def useImageIndex(index):
+    """ Let imageInfo look up and add image files in a persistent index
+    (a PhotoBookImageIndex.ImageIndex; None: memory only)."""
+    global _imageIndex
+    _imageIndex = index
+
+def stopImageIndex(index):
+    """ Stop using an index for imageInfo, if it is the one in use."""
+    if _imageIndex is index:
+        useImageIndex(None)
+
+def imageInfo(path):
+    """ Return the ImageInfo of an image file (cached). Raises OSError if
+    the file cannot be read (or Pillow is not installed). The file is
+    checked (os.stat) before it is read, so an entry is never newer than
+    the file it stands for."""
+    st = os.stat(path)
+    key = (os.path.normcase(os.path.abspath(path)), st.st_mtime_ns, st.st_size)
+    info = _infoCache.get(key)
+    if info is None and _imageIndex is not None:
+        info = _imageIndex.lookup(path, st)
+    if info is None:
+        if loadPillow() is None:
+            raise OSError('Pillow (PIL) is not installed')
+        info = readImageInfo(path)
+        if _imageIndex is not None:
+            _imageIndex.store(info, st)
+    _infoCache[key] = info
+    return info
+
+def storeImageInfo(info):
+    """ Cache (and index) the ImageInfo of a file read elsewhere, e.g.
+    of a file just written."""
+    st = os.stat(info.path)
+    _infoCache[(os.path.normcase(os.path.abspath(info.path)), st.st_mtime_ns,
+        st.st_size)] = info
+    if _imageIndex is not None:
+        _imageIndex.store(info, st)
+
+def scanImages(paths, workers=8):
+    """ Return {path: ImageInfo, or None if unreadable} of many image
+    files, read in a thread pool: reading headers mostly waits for the
+    disk (or the network), so the threads overlap the waiting."""
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        return dict(zip(paths, pool.map(_scanImage, paths)))
+
+def _scanImage(path):
+    try:
+        return imageInfo(path)
+    except Exception:    # Pillow raises more than OSError for broken files
+        return None
+
+def listImageFiles(folder):
+    """ Return the paths of the image files in a folder (not in its
+    subfolders), sorted by name. "_cropped" files are left out."""
+    paths = []
+    for name in sorted(os.listdir(folder), key=lambda name: name.lower()):
+        base, ext = os.path.splitext(name)
+        if ext.lower() in IMAGE_EXTENSIONS and not base.endswith('_cropped'):
+            path = os.path.join(folder, name)
+            if os.path.isfile(path):
+                paths.append(path)
+    return paths
+
+def readImageInfo(path):
+    """ Read the ImageInfo of an image file from its header."""
+    with loadPillow().open(path) as image:
+        width, height = image.size
+        mode = image.mode
+        dpi = image.info.get('dpi') or (72, 72)
+        orientation, focus, captureTime = 1, None, None
+        try:
+            exif = image.getexif()
+            orientation = int(exif.get(EXIF_ORIENTATION, 1))
+            exifIfd = exif.get_ifd(EXIF_IFD)
+            captureTime = exifIfd.get(EXIF_DATETIME_ORIGINAL) or exif.get(EXIF_DATETIME)
+            if captureTime:
+                captureTime = str(captureTime).strip('\x00 ') or None
+            area = exifIfd.get(EXIF_SUBJECT_AREA) or exifIfd.get(EXIF_SUBJECT_LOCATION)
+            if area and len(area) >= 2:
+                focus = (float(area[0]) / width, float(area[1]) / height)
+        except (AttributeError, TypeError, ValueError, OSError):
+            pass    # no (readable) EXIF
+    dpi = (float(dpi[0]) or 72.0, float(dpi[1]) or 72.0)
+    if orientation in (5, 6, 7, 8):    # turned a quarter: width and height swap
+        width, height = height, width
+        dpi = (dpi[1], dpi[0])
+    if focus is not None:
+        x, y = [min(max(v, 0.0), 1.0) for v in focus]
+        focus = _ORIENTED_POINT.get(orientation, _ORIENTED_POINT[1])(x, y)
+    return ImageInfo(path, (width, height), dpi, orientation, focus, captureTime, mode,
+        os.path.getsize(path))
+
+##################################################
+def scaleToFrame(frameSize, info):
+    """ Return the Scribus image scale (x, y; 1.0 = 100%) that stretches
+    the image to the frame (what setScaleImageToFrame(True, False) gives).
+    frameSize in points."""
+    return (frameSize[0] * info.dpi[0] / (72.0 * info.size[0]),
+        frameSize[1] * info.dpi[1] / (72.0 * info.size[1]))
+
+def fitImage(frameSize, stretch, mode='fill', focus=None):
+    """ Return (scale, offset) to show an image in a frame: the Scribus
+    image scale (same for x and y) and image offset (in points).
+    stretch is the scale that stretches the image to the frame (see
+    scaleToFrame), frameSize is in points.
+    mode 'fill': the image covers the frame (cropped), centered;
+    'fit': the whole image is in the frame, centered;
+    'focal': like 'fill', with the focus point ((x, y) as part of the image
+    size) as close to the center of the frame as the image allows."""
+    if mode == 'fit':
+        scale = min(stretch)
+    else:
+        scale = max(stretch)
+    offset = []
+    for frameLength, stretchScale, focusPart in zip(frameSize, stretch, focus or (0.5, 0.5)):
+        imageLength = frameLength * scale / stretchScale    # image size in the frame (points)
+        if mode == 'focal':
+            # focus point at the center, without uncovering the frame
+            offset.append(min(max(frameLength / 2 - focusPart * imageLength,
+                frameLength - imageLength), 0.0))
+        else:
+            offset.append((frameLength - imageLength) / 2)
+    return scale, tuple(offset)
@@ -0,0 +1,373 @@
+#! /usr/bin/env python
+#-*- coding: utf-8 -*-
+'''
+VERSION: 1.0 of 2026-10-17
+AUTHOR: Rafferty River.
+LICENSE: GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY.
+
+DESCRIPTION & USAGE:
+This module is the Scribus-independent geometry of the script
+'PhotoBookLayoutMaker.py': from a rectangle (the selection or the area
+within the page margins) and the options (columns, rows, gap, aspect
+ratio, scaling, alignment, caption height) it calculates the rectangles
+of all new image frames and caption text frames. Nothing is drawn here:
+PhotoBookLayoutMaker applies the result (a LayoutPlan) to the document.
+It is not a script to run by itself.
+
+Any number of rectangles (e.g. one per page) is done in one call. With
+NumPy installed the calculation of many rectangles (NUMPY_MIN_AREAS) is
+vectorized; else the same result is calculated in plain Python. NumPy
+takes far longer to import than a few rectangles take in plain Python,
+so it is only imported when first needed (loadNumpy).
+
+justifiedLayout makes rows of frames with the aspect ratios of a list of
+images (no cropping), the rows all as wide as the layout: the images are
+split in rows by dynamic programming (linear partition), so the rows are
+about equally high and fill the rectangle as much as possible.
+
+paginate spreads a long, ordered list of images over pages, choosing for
+each page one of a few templates (e.g. grids 1x1, 2x1, 2x2), so the images
+are cropped as little as possible, in order. It is a dynamic program over
+the images: its time grows linearly with the length of the book.
+'''
+##################################################
+# imports
+numpy = None    # imported on first use (see loadNumpy)
+_numpyTried = False
+
+# gridLayout of this many rectangles or more: with NumPy (if installed)
+NUMPY_MIN_AREAS = 16
+
+##################################################
+def loadNumpy():
+    """ Import NumPy (on first use). Returns it, or None if not installed."""
+    global numpy, _numpyTried
+    if not _numpyTried:
+        try:
+            import numpy as module
+            numpy = module
+        except ImportError:
+            pass
+        _numpyTried = True
+    return numpy
+
+class LayoutPlan:
+    """ The rectangles (x, y, width, height) of a layout, in document units.
+    frames[k] and captions[k] (None without captions) belong to cell k,
+    areas[k] is the index of the rectangle the cell was made in.
+    Cells are ordered by rectangle, then column, then row. The rows are
+    NumPy arrays (nbrCells x 4) if NumPy was used, else lists."""
+
+    def __init__(self, frames, captions, areas):
+        """ Setup basic things """
+        self.frames = frames
+        self.captions = captions
+        self.areas = areas
+
+    def __len__(self):
+        return len(self.frames)
+
+    def cells(self, area=None):
+        """ Yield (frame, caption) rectangles as tuples of floats, of all
+        cells or of the cells of one rectangle."""
+        frames, captions, areas = self.frames, self.captions, self.areas
+        if not isinstance(frames, list):
+            frames = frames.tolist()
+            captions = None if captions is None else captions.tolist()
+            areas = areas.tolist()
+        for k in range(len(frames)):
+            if area is None or areas[k] == area:
+                yield tuple(frames[k]), None if captions is None else tuple(captions[k])
+
+    def readingOrder(self):
+        """ Return this plan with the cells sorted top to bottom, then left
+        to right."""
+        cells = list(self.cells())
+        order = sorted(range(len(cells)),
+            key=lambda k: (round(cells[k][0][1], 6), round(cells[k][0][0], 6)))
+        return self.subset(order)
+
+    def subset(self, indices):
+        """ Return a plan with the cells of indices (in that order)."""
+        indices = list(indices)
+        if not isinstance(self.frames, list):
+            return LayoutPlan(self.frames[indices],
+                None if self.captions is None else self.captions[indices],
+                self.areas[indices])
+        return LayoutPlan([self.frames[k] for k in indices],
+            None if self.captions is None else [self.captions[k] for k in indices],
+            [self.areas[k] for k in indices])
+
+    def problems(self):
+        """ Return a text for a layout that cannot be drawn, else None."""
+        if len(self.frames) == 0:
+            return 'Nothing to lay out.'
+        if not isinstance(self.frames, list):
+            smallest = float(self.frames[:, 2:].min())
+        else:
+            smallest = min(min(frame[2], frame[3]) for frame in self.frames)
+        if smallest <= 0:
+            return 'Gap or caption too big: no room left for the frames.'
+        return None
+
+def gridLayout(areas, cols, rows, gap=0.0, aspectratio=0.0, scale=1.0,
+    alignh='', alignv='', captionh=0.0):
+    """ Return the LayoutPlan of cols x rows frames in each rectangle of
+    areas ((x, y, width, height), or a list of them).
+    aspectratio is width/height of the frames (0 = biggest frames),
+    scale the part of the rectangle to fill (1.0 = all), alignh 'Left',
+    'Center' or 'Right', alignv 'Top', 'Center' or 'Bottom'. A caption
+    height > 0 puts a caption below each frame, < 0 over its bottom."""
+    if not hasattr(areas[0], '__len__'):    # one rectangle
+        areas = [areas]
+    if len(areas) < NUMPY_MIN_AREAS or loadNumpy() is None:
+        return _gridLayoutPython(areas, cols, rows, gap, aspectratio, scale,
+            alignh, alignv, captionh)
+
+    areas = numpy.asarray(areas, dtype=float).reshape(-1, 4)
+    x, y, width, height = areas.T
+    captionRoom = captionh * rows if captionh > 0 else 0.0
+    frameW = (scale * width - gap * (cols - 1)) / cols
+    frameH = (scale * height - gap * (rows - 1) - captionRoom) / rows
+    if aspectratio != 0:
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            wider = aspectratio < frameW / frameH
+        frameW = numpy.where(wider, frameH * aspectratio, frameW)
+        frameH = numpy.where(wider, frameH, frameW / aspectratio)
+    stepX = frameW + gap
+    stepY = frameH + gap + max(captionh, 0.0)
+    offsetX = x + _alignment(alignh, width - frameW * cols - gap * (cols - 1))
+    offsetY = y + _alignment(alignv, height - (frameH + max(captionh, 0.0)) * rows
+        - gap * (rows - 1))
+
+    # cells: rectangle, column, row (broadcast, then flattened)
+    col = numpy.arange(cols).reshape(1, cols, 1)
+    row = numpy.arange(rows).reshape(1, 1, rows)
+    shape = (len(areas), cols, rows)
+    cellX = numpy.broadcast_to(offsetX[:, None, None] + col * stepX[:, None, None], shape)
+    cellY = numpy.broadcast_to(offsetY[:, None, None] + row * stepY[:, None, None], shape)
+    cellW = numpy.broadcast_to(frameW[:, None, None], shape)
+    cellH = numpy.broadcast_to(frameH[:, None, None], shape)
+    frames = numpy.stack([cellX, cellY, cellW, cellH], axis=-1).reshape(-1, 4)
+    captions = None
+    if captionh != 0:
+        captions = frames.copy()
+        captions[:, 1] += frames[:, 3] + min(captionh, 0.0)
+        captions[:, 3] = abs(captionh)
+    cellAreas = numpy.repeat(numpy.arange(len(areas)), cols * rows)
+    return LayoutPlan(frames, captions, cellAreas)
+
+def _alignment(align, room):
+    """ Offset of the frames within the room left in their rectangle."""
+    if align == 'Center':
+        return room / 2
+    elif align in ('Right', 'Bottom'):
+        return room
+    return room * 0
+
+def _gridLayoutPython(areas, cols, rows, gap, aspectratio, scale, alignh, alignv, captionh):
+    """ gridLayout without NumPy."""
+    frames, captions, cellAreas = [], [], []
+    captionRoom = captionh * rows if captionh > 0 else 0.0
+    for index in range(len(areas)):
+        x, y, width, height = [float(v) for v in areas[index]]
+        frameW = (scale * width - gap * (cols - 1)) / cols
+        frameH = (scale * height - gap * (rows - 1) - captionRoom) / rows
+        if aspectratio != 0:
+            if aspectratio < frameW / frameH:
+                frameW = frameH * aspectratio
+            else:
+                frameH = frameW / aspectratio
+        offsetX = x + _alignment(alignh, width - frameW * cols - gap * (cols - 1))
+        offsetY = y + _alignment(alignv, height - (frameH + max(captionh, 0.0)) * rows
+            - gap * (rows - 1))
+        for i in range(cols):
+            for j in range(rows):
+                frame = (offsetX + i * (frameW + gap),
+                    offsetY + j * (frameH + gap + max(captionh, 0.0)), frameW, frameH)
+                frames.append(frame)
+                captions.append((frame[0], frame[1] + frameH + min(captionh, 0.0),
+                    frameW, abs(float(captionh))))
+                cellAreas.append(index)
+    return LayoutPlan(frames, captions if captionh != 0 else None, cellAreas)
+
+##################################################
+# justified rows
+
+def justifiedLayout(area, aspects, gap=0.0, scale=1.0, alignh='', alignv='', captionh=0.0):
+    """ Return the LayoutPlan of justified rows in a rectangle
+    (x, y, width, height): one frame per aspect ratio (width/height, in
+    order), with that aspect ratio. All rows have the same width; the
+    layout is as big as fits in scale x the rectangle. alignh, alignv and
+    captionh as for gridLayout."""
+    x, y, width, height = [float(v) for v in area]
+    aspects = [float(a) for a in aspects]
+    if not aspects:
+        return _plan([], None, [])
+    maxWidth, maxHeight = scale * width, scale * height
+    captionRoom = max(captionh, 0.0)
+    # about sqrt(rectangle aspect sum / layout aspect) rows of equal height
+    guess = max(1, int(round((sum(aspects) * maxHeight / maxWidth) ** 0.5)))
+    best = None
+    for nbrRows in range(max(1, guess - 2), min(len(aspects), guess + 2) + 1):
+        rowHeight = (maxHeight - gap * (nbrRows - 1) - captionRoom * nbrRows) / nbrRows
+        if rowHeight <= 0:
+            continue
+        rows = linearPartition(aspects, maxWidth, gap, rowHeight)
+        layoutWidth = _fitWidth(rows, aspects, maxWidth, maxHeight, gap, captionRoom)
+        if layoutWidth <= 0:
+            continue
+        # frame area covered at this width
+        covered = sum((layoutWidth - gap * (last - first - 1)) ** 2
+            / _rowAspect(aspects, first, last) for first, last in rows)
+        if best is None or covered > best[0]:
+            best = (covered, rows, layoutWidth)
+    if best is None:
+        return _plan([], None, [])
+
+    covered, rows, layoutWidth = best
+    rowHeights = [(layoutWidth - gap * (last - first - 1)) / _rowAspect(aspects, first, last)
+        for first, last in rows]
+    layoutHeight = sum(rowHeights) + (gap + captionRoom) * len(rows) - gap
+    offsetX = x + _alignment(alignh, width - layoutWidth)
+    offsetY = y + _alignment(alignv, height - layoutHeight)
+    frames, captions = [], []
+    for (first, last), rowHeight in zip(rows, rowHeights):
+        frameX = offsetX
+        for k in range(first, last):
+            frame = (frameX, offsetY, aspects[k] * rowHeight, rowHeight)
+            frames.append(frame)
+            captions.append((frame[0], offsetY + rowHeight + min(captionh, 0.0), frame[2],
+                abs(float(captionh))))
+            frameX += frame[2] + gap
+        offsetY += rowHeight + captionRoom + gap
+    return _plan(frames, captions if captionh != 0 else None, [0] * len(frames))
+
+def linearPartition(aspects, width, gap, rowHeight):
+    """ Split the aspect ratios in rows [(first, last + 1), ...], in order,
+    so the row heights (rows as wide as width) are as close as possible
+    to rowHeight (least squares; a row has 1 image or more).
+    Dynamic programming over the row breaks: O(images x images per row)."""
+    n = len(aspects)
+    cost = [0.0] + [None] * n     # cost[j]: best cost of the first j images
+    start = [0] * (n + 1)         # start[j]: first image of the last row
+    for last in range(1, n + 1):
+        aspectSum = 0.0
+        for first in range(last - 1, -1, -1):
+            aspectSum += aspects[first]
+            height = (width - gap * (last - first - 1)) / aspectSum
+            rowCost = cost[first] + (height - rowHeight) ** 2
+            if cost[last] is None or rowCost < cost[last]:
+                cost[last], start[last] = rowCost, first
+            if height < rowHeight / 2:    # more images only make the row lower
+                break
+    rows = []
+    last = n
+    while last > 0:
+        rows.append((start[last], last))
+        last = start[last]
+    return rows[::-1]
+
+def _rowAspect(aspects, first, last):
+    return sum(aspects[first:last])
+
+def _fitWidth(rows, aspects, maxWidth, maxHeight, gap, captionRoom):
+    """ Width of the rows so their height (with gaps and captions) fits."""
+    # layout height = width x sum(1/A) - gap x sum((m-1)/A) + fixed parts (linear in width)
+    perWidth = sum(1.0 / _rowAspect(aspects, first, last) for first, last in rows)
+    gaps = sum(gap * (last - first - 1) / _rowAspect(aspects, first, last)
+        for first, last in rows)
+    fixed = (gap + captionRoom) * len(rows) - gap
+    return min(maxWidth, (maxHeight - fixed + gaps) / perWidth)
+
+def _plan(frames, captions, areas):
+    """ LayoutPlan of lists of rectangles."""
+    return LayoutPlan(list(frames), None if captions is None else list(captions),
+        list(areas))
+
+##################################################
+# pagination
+
+def parseTemplates(text):
+    """ Return the list of (cols, rows) of a text like '1x1, 2x1, 2x2'.
+    Raises ValueError for a bad text."""
+    templates = []
+    for part in text.replace(',', ' ').split():
+        cols, rows = [int(v) for v in part.lower().split('x')]
+        if cols < 1 or rows < 1:
+            raise ValueError('Columns and rows must be > 0: %s' % part)
+        if (cols, rows) not in templates:
+            templates.append((cols, rows))
+    if not templates:
+        raise ValueError('No page templates.')
+    return templates
+
+def cropLoss(imageAspect, frameAspect):
+    """ Part of an image cut off when it fills a frame (0 = nothing)."""
+    return 1.0 - min(imageAspect / frameAspect, frameAspect / imageAspect)
+
+# default cost of a page in paginate, as crop loss (1 = a whole image lost)
+DEFAULT_PAGE_COST = 0.5
+
+def paginate(aspects, templates, maxPages=None, pageCost=DEFAULT_PAGE_COST):
+    """ Spread images (aspect ratios, in order) over pages. templates is a
+    list of templates, each the list of its cell aspect ratios in reading
+    order. Returns [(template index, first, last + 1), ...], one per page,
+    with the least crop loss (see cropLoss) plus pageCost per page in
+    total. Every page is full, but the last one may have empty cells (each
+    counts as a loss of 1). With maxPages, the cost per page is raised
+    (bisection) until the book has no more than maxPages pages, if it can.
+    Returns None if the templates cannot hold the images (no templates)."""
+    pages = _paginate(aspects, templates, pageCost)
+    if pages is None:
+        return None
+    if maxPages and len(pages) > maxPages:
+        low, high = pageCost, len(aspects) + 1.0    # a page costs more than any loss
+        pages = _paginate(aspects, templates, high)
+        for i in range(20):
+            pageCost = (low + high) / 2
+            trial = _paginate(aspects, templates, pageCost)
+            if len(trial) <= maxPages:
+                high, pages = pageCost, trial
+            else:
+                low = pageCost
+    return pages
+
+def _paginate(aspects, templates, pageCost):
+    """ paginate with a fixed cost per page: dynamic program over the
+    number of images laid out, O(images x cells of all templates). Numbers
+    of images that no series of full pages holds (e.g. 1 without a 1-cell
+    template) are skipped. Returns None if there is no pagination."""
+    n = len(aspects)
+    cost = [0.0] + [None] * n     # cost[j]: best cost of the first j images
+    choice = [None] * (n + 1)     # choice[j]: (template, first image) of the last page
+    for last in range(1, n + 1):
+        for t in range(len(templates)):
+            cells = templates[t]
+            if last == n:
+                used = range(1, min(len(cells), n) + 1)    # last page: may have empty cells
+            elif len(cells) <= last:
+                used = [len(cells)]
+            else:
+                continue
+            for nbrUsed in used:
+                first = last - nbrUsed
+                if cost[first] is None:    # no full pages hold the first images
+                    continue
+                pageLoss = pageCost + len(cells) - nbrUsed
+                for k in range(nbrUsed):
+                    pageLoss += cropLoss(aspects[first + k], cells[k])
+                if cost[last] is None or cost[first] + pageLoss < cost[last]:
+                    cost[last] = cost[first] + pageLoss
+                    choice[last] = (t, first)
+    if cost[n] is None:
+        return None
+    pages = []
+    last = n
+    while last > 0:
+        t, first = choice[last]
+        pages.append((t, first, last))
+        last = first
+    return pages[::-1]
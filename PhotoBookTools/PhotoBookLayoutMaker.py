@@ -13,11 +13,47 @@ DESCRIPTION & USAGE:
 
 PhotoBookLayoutMaker is a script for creating Image Frames in Scribus in
 a fast and flexible way. Many options are available in the interface.
+Layout 'Justified rows' makes one frame for each image in a folder, in
+rows that fill the rectangle, each frame with the aspect ratio of its
+image (read from the image file header, so no cropping is needed), and
+loads the images. Columns, rows and aspect ratio are not used then.
+Layout 'Book' lays out all images of a folder, sorted by capture time, on
+the pages from the current page on (pages are added at the end if
+needed): for each page it chooses one of the page templates (grids, e.g.
+'1x1 2x1 1x2 2x2') so that, in total, the images are cropped as little as
+possible, keeping their order (see PhotoBookLayoutGeometry.paginate).
+Set 'Book pages' to limit the number of pages (0 = no limit).
+Layout 'Spec file' lays out many pages in one run: a spec file (see
+PhotoBookLayoutSpec.py) tells which grid goes on which pages (page ranges,
+odd or even pages), as presets or e.g. '3x2'. The frames fill the page
+margins; the selection and the other options of the dialog are not used.
+The frame positions and sizes are calculated in 'PhotoBookLayoutGeometry.py'
+(without Scribus), then the frames are drawn.
+The time of each stage (per page for 'Book') can be written to a report,
+and the run can be profiled (see PhotoBookTiming.py).
+
+Without the dialog: a preset is a section of 'PhotoBookLayoutMaker.cfg'
+(e.g. [grid 2x2]; what it leaves out comes from [DEFAULT], the values the
+dialog saves). Run 'scribus -py PhotoBookLayoutMaker.py --preset "grid 2x2"'
+('--headless' for [DEFAULT]), or, to bind a preset to a shortcut, a small
+script in this folder:
+
+    import os, sys
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import PhotoBookLayoutMaker
+    PhotoBookLayoutMaker.main('grid 2x2')
+
+tkinter is only imported for the dialog (see PhotoBookLayoutMakerDialog.py),
+Pillow and NumPy only when a layout needs them. The timing
+report (PHOTOBOOK_TIMING) gives the time from the start of the script to
+the dialog ('startup'), in the dialog ('dialog') and from then to the
+first frame drawn ('first frame').
 """
 ##################################################
 # imports
-import sys,  platform, os
-from configparser import ConfigParser
+import sys,  platform, os, time
+
+START_TIME = time.perf_counter()    # for the time to the first frame
 
 try:
     from scribus import *
@@ -35,24 +71,25 @@ if python_version[0:1] != "3":
         ICON_CRITICAL)	
     sys.exit(1)
 
-try:
-    from tkinter import * # python 3 syntax
-    from tkinter import messagebox
-    from tkinter import ttk # for ComboBox
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from PhotoBookLayoutGeometry import gridLayout, justifiedLayout, paginate, parseTemplates
+from PhotoBookCommon import DocumentBatch, openDocumentImageIndex, readPreset, \
+    presetArgument
+from PhotoBookImageInfo import imageInfo, listImageFiles, scaleToFrame, fitImage
+from PhotoBookTiming import StageTimer, Profiler
+from PhotoBookLayoutSpec import LayoutSpec
 
-except ImportError:
-    print("This script requires Python Tkinter properly installed.")
-    messageBox('Script failed',
-               'This script requires Python Tkinter properly installed.',
-               ICON_CRITICAL)
-    sys.exit(1)
+LAYOUTS = ['Grid', 'Justified rows', 'Book', 'Spec file']
+CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'PhotoBookLayoutMaker.cfg')
 
 ##################################################
 class ScPhotoBookLayoutMaker:
     """ PhotoBookLayoutMaker itself."""
 
     def __init__(self, cols=0, rows=0, gap=0.0, aspectratio=0, scale=0.0,
-        alignh="", alignv="", captionh=0.0, removeframe=1, alternateborder=0):
+        alignh="", alignv="", captionh=0.0, removeframe=1, alternateborder=0,
+        layout='Grid', imageFolder='', templates=((1, 1), (2, 1), (1, 2), (2, 2)),
+        bookPages=0, specFile=''):
         """ Setup basic things """
         # params
         self.cols = cols
@@ -65,6 +102,13 @@ class ScPhotoBookLayoutMaker:
         self.captionh = captionh
         self.removeframe = removeframe
         self.alternateborder = alternateborder        
+        self.layout = layout
+        self.imageFolder = imageFolder
+        self.templates = templates    # 'Book': (cols, rows) of the page templates
+        self.bookPages = bookPages    # 'Book': maximum number of pages (0 = no limit)
+        self.specFile = specFile      # 'Spec file': the spec file
+        self.timer = StageTimer()     # seconds per stage ('layout', or per page)
+        self.runStart = time.perf_counter()
         defineColorCMYK("frameFillColor", 0, 0, 0, 64) # default is Light Grey
 
         # create 2 frame border styles (line width is measured in points)
@@ -97,6 +141,10 @@ class ScPhotoBookLayoutMaker:
 
     def createLayout(self):
         """ Draw image frame(s) within a rectangular selection or within page margins."""
+        if self.layout == 'Book':
+            return self.createBook()
+        if self.layout == 'Spec file':
+            return self.createFromSpec()
 
         # current page measures
         pageWidth, pageHeight = getPageNSize(currentPage())
@@ -115,8 +163,8 @@ class ScPhotoBookLayoutMaker:
                 obj = getSelectedObject(i)
                 selectionList.append(obj)
                 if getObjectType(obj) == 'Group':
-                    messageBox('Warning', 'Grouped items are not allowed as source.\nPlease ungroup "'
-                        +obj+'" and try again.', ICON_CRITICAL)
+                    messageBox('Warning', 'Grouped items are not allowed as source.'
+                        + '\nPlease ungroup "' + obj + '" and try again.', ICON_CRITICAL)
                     sys.exit(1)
                 frameX, frameY = getPosition(obj)
                 frameWidth, frameHeight = getSize(obj)
@@ -139,300 +187,347 @@ class ScPhotoBookLayoutMaker:
             frameHeight = posYmax - posYmin
 
         # generated frame(s) measures
-        newFrameW = (self.scale * frameWidth - (self.gap * (self.cols - 1))) / self.cols
-        if self.captionh > 0:
-            newFrameH = (self.scale * frameHeight - self.gap * (self.rows - 1) - self.captionh * self.rows) / self.rows
+        imageFiles, infos, unreadable = [], [], []
+        timer = self.timer
+        if self.layout == 'Justified rows':
+            try:
+                with timer.time('layout', 'read headers'):
+                    imageFiles, infos, unreadable = self.readImages()
+            except OSError as err:
+                return 'Cannot read images folder: %s' % err
+            if not imageFiles:
+                return 'No images (.jpg, .png, .tif) in the images folder.'
+            aspects = [info.aspect() for info in infos]
+            with timer.time('layout', 'geometry'):
+                plan = justifiedLayout((frameX, frameY, frameWidth, frameHeight), aspects,
+                    self.gap, self.scale, self.alignh, self.alignv, self.captionh)
         else:
-            newFrameH = (self.scale * frameHeight - (self.gap * (self.rows - 1))) / self.rows
-        newAspectR = newFrameW / newFrameH
-
-        # aspect ratio
-        if self.aspectratio == 0.0:
-            pass
-        else:
-            if self.aspectratio < newAspectR:
-                newFrameW = newFrameH * self.aspectratio
+            with timer.time('layout', 'geometry'):
+                plan = gridLayout((frameX, frameY, frameWidth, frameHeight), self.cols,
+                    self.rows, self.gap, self.aspectratio, self.scale, self.alignh,
+                    self.alignv, self.captionh)
+        err = plan.problems()
+        if err is not None:
+            return err
+
+        with DocumentBatch() as batch:
+            # draw the frames
+            with timer.time('layout', 'draw'):
+                newFrames = self.drawLayout(plan)
+            timer.addSince('(run)', 'first frame', self.runStart)
+            if imageFiles:
+                with timer.time('layout', 'load images'):
+                    self.loadImages(plan, newFrames, imageFiles, infos)
+
+            # remove source items
+            if self.removeframe:
+                for i in range (0, len(selectionList)):
+                    deleteObject(selectionList[i])
             else:
-                newFrameH = newFrameW / self.aspectratio
-
-        # alignment
-        if self.alignh == "Center":
-            offsetX =  frameX + (frameWidth - newFrameW * self.cols - self.gap * (self.cols - 1))/2
-        elif self.alignh == "Right":
-            offsetX =  frameX + frameWidth - newFrameW * self.cols - self.gap * (self.cols - 1)
-        else:
-            offsetX = frameX
-        if self.alignv == "Center":
-            if self.captionh > 0:
-                offsetY =  frameY + (frameHeight - (newFrameH + self.captionh) * self.rows - self.gap * (self.rows - 1))/2
-            else:
-                offsetY =  frameY + (frameHeight - newFrameH * self.rows - self.gap * (self.rows - 1))/2
-        elif self.alignv == "Bottom":
-            if self.captionh > 0:
-                offsetY =  frameY + frameHeight - (newFrameH + self.captionh) * self.rows - self.gap * (self.rows - 1)
-            else:
-                offsetY =  frameY + frameHeight - newFrameH * self.rows - self.gap * (self.rows - 1)
-        else:
-            offsetY = frameY
-
-        # border style
-        if self.alternateborder:
-            frameBorderLineStyle = self.frameBorderLineStyle2
-        else:
-            frameBorderLineStyle = self.frameBorderLineStyle1
-
-        # draw the frames
-        for i in range (1,  self.cols + 1):
-            resetY = offsetY
-            for j in range (1, self.rows + 1):
-                newFrame = createImage(offsetX, offsetY, newFrameW, newFrameH)
-                setFillColor("frameFillColor", newFrame)
-                setCustomLineStyle(frameBorderLineStyle, newFrame)
-                # draw caption text (if needed):
-                if self.captionh != 0:
-                    if self.captionh > 0:
-                        captionTxt = createText(offsetX, offsetY + newFrameH, newFrameW, self.captionh)
-                        offsetY = offsetY + self.captionh
-                    else:    #self.captionh < 0
-                        captionTxt = createText(offsetX, offsetY + newFrameH + self.captionh,
-                            newFrameW, - self.captionh)
-                    setText(newFrame, captionTxt)
-                    selectObject(captionTxt)
-                    setParagraphStyle(self.pStyleCaption, captionTxt)
-                    setTextVerticalAlignment(ALIGNV_CENTERED, captionTxt)
-                offsetY = offsetY + self.gap + newFrameH
-            offsetX = offsetX + self.gap + newFrameW
-            j = 1
-            offsetY = resetY
-
-        # remove source items
-        if self.removeframe:
-            for i in range (0, len(selectionList)):
-                deleteObject(selectionList[i])
-        else:
-            pass
+                pass
+            batch.changed()
 
+        if unreadable:
+            messageBox('Warning', self.unreadableText(unreadable), ICON_WARNING)
         return None
 
-##################################################
-class TkPhotoBookLayoutMaker(Frame):
-    """ GUI interface for PhotoBook Layout Maker with Tkinter"""
-
-    def __init__(self, master=None):
-        """ Setup the dialog """
-        Frame.__init__(self, master)
-        self.grid()
-        self.master.resizable(0, 0)
-        self.master.title('Scribus PhotoBook Layout Maker')
-
-        # define variables
-        self.statusVar = StringVar(self, value='Enter Values and Options and press OK.')
-        self.statusLabel = Label(self, fg="red", textvariable=self.statusVar)
-        self.colsVar = StringVar()
-        self.colsLabel = Label(self, text='Split/merge rectangle of selected item(s)\n\
-        or area within page margins in columns:')
-        self.colsEntry = Entry(self, textvariable=self.colsVar, width=9)
-        self.rowsVar = StringVar()
-        self.rowsLabel = Label(self, text=' and rows:')
-        self.rowsEntry = Entry(self, textvariable=self.rowsVar, width=9)
-        self.gapVar = DoubleVar()
-        self.gapLabel = Label(self, text='Gap in document units:')
-        self.gapEntry = Entry(self, textvariable=self.gapVar, width=9)
-        self.aspectwidthVar = StringVar()
-        self.aspectLabel = Label(self, text='New frame(s) aspect ratio (0=maximum area)')
-        self.aspectwidthLabel = Label(self, text='width:')
-        self.aspectwidthEntry = Entry(self, textvariable=self.aspectwidthVar, width=9)
-        self.aspectheightVar = StringVar()
-        self.aspectheightLabel = Label(self, text='  to height:')
-        self.aspectheightEntry = Entry(self, textvariable=self.aspectheightVar, width=9)
-        self.scaleVar = DoubleVar()
-        self.scaleLabel = Label(self, text='New frame(s) scaling in % of selected rectangle:')
-        self.scaleEntry = Entry(self, textvariable=self.scaleVar, width=9)
-        self.alignhLabel = Label(self, text='New frame(s) alignment - horizontal:')
-        self.alignhVar = ttk.Combobox(self, values = ["Left", "Center", "Right"], width=6)
-        self.alignvLabel = Label(self, text=' vertical:')
-        self.alignvVar = ttk.Combobox(self, values = ["Top", "Center", "Bottom"], width=6)
-        self.captionVar = IntVar()
-        self.captionLabel = Label(self, text='Text caption below image frame:')
-        self.captionCheck = Checkbutton(self, variable=self.captionVar)
-        self.captionhVar = DoubleVar()
-        self.captionhLabel = Label(self, text='Caption height\n in document units:')
-        self.captionhEntry = Entry(self, textvariable=self.captionhVar, width=9)
-        self.removeframeVar = IntVar()
-        self.removeframeLabel = Label(self, text='Remove source items:')
-        self.removeframeCheck = Checkbutton(self, variable=self.removeframeVar)
-        self.alternateborderVar = IntVar()
-        self.alternateborderLabel = Label(self, text='Alternative border style for new frame(s):')
-        self.alternateborderCheck = Checkbutton(self, variable=self.alternateborderVar)
-        self.saveparamsVar = IntVar()
-        self.saveparamsLabel = Label(self, text='Save above parameters for future use:')
-        self.saveparamsCheck = Checkbutton(self, variable=self.saveparamsVar)
-
-        self.okButton = Button(self, text="OK", width=6, command=self.okButton_pressed)
-        self.cancelButton = Button(self, text="Cancel", command=self.quit)
-
-        # open 'PhotoBookLayoutMaker.cfg' - parameters file and read values
-        self.config = ConfigParser()
-        self.configFile = (os.path.join(os.path.dirname(__file__), 'PhotoBookLayoutMaker.cfg'))
-        self.config.read(self.configFile)
-        self.configItems = self.config.items('DEFAULT')
-        self.colsVar.set(self.configItems[0][1])
-        self.rowsVar.set(self.configItems[1][1])
-        self.gapVar.set(self.configItems[2][1])
-        self.aspectwidthVar.set(self.configItems[3][1])
-        self.aspectheightVar.set(self.configItems[4][1])
-        self.scaleVar.set(self.configItems[5][1])
-        self.alignhVar.set(self.configItems[6][1])
-        self.alignvVar.set(self.configItems[7][1])
-        self.captionVar.set(self.configItems[8][1])
-        if (self.configItems[8][1] == '1'):
-            self.captionCheck.select()
-        self.captionhVar.set(self.configItems[9][1])
-        self.removeframeVar.set(self.configItems[10][1])
-        if (self.configItems[10][1]) == '1':
-            self.removeframeCheck.select()
-        self.alternateborderVar.set(self.configItems[11][1])
-        if (self.configItems[11][1]) == '1':
-            self.alternateborderCheck.select()
-        #self.saveparamsCheck.select()
-
-        # make interface layout
-        self.columnconfigure(0, pad=6)
-        currRow = 0
-        self.statusLabel.grid(column=0, row=currRow, columnspan=4)
-        currRow += 1
-        self.colsLabel.grid(column=0, row=currRow, sticky=S+E)
-        self.colsEntry.grid(column=1, row=currRow, sticky=S+W)
-        self.rowsLabel.grid(column=2, row=currRow, sticky=S+E)
-        self.rowsEntry.grid(column=3, row=currRow, sticky=S+W, padx=5)
-        currRow += 1
-        self.gapLabel.grid(column=0, row=currRow, sticky=S+E)
-        self.gapEntry.grid(column=1, row=currRow, sticky=S+W)
-        currRow += 1
-        self.aspectLabel.grid(column=0, row=currRow, sticky=S+E)
-        currRow += 1
-        self.aspectwidthLabel.grid(column=0, row=currRow, sticky=S+E)
-        self.aspectwidthEntry.grid(column=1, row=currRow, sticky=S+W)
-        self.aspectheightLabel.grid(column=2, row=currRow, sticky=S+E)
-        self.aspectheightEntry.grid(column=3, row=currRow, sticky=S+W, padx=5)
-        currRow += 1
-        self.scaleLabel.grid(column=0, row=currRow, sticky=S+E)
-        self.scaleEntry.grid(column=1, row=currRow, sticky=S+W)
-        currRow += 1
-        self.alignhLabel.grid(column=0, row=currRow, sticky=S+E)
-        self.alignhVar.grid(column=1, row=currRow, sticky=S+W)
-        self.alignvLabel.grid(column=2, row=currRow, sticky=S+E)
-        self.alignvVar.grid(column=3, row=currRow, sticky=S+W, padx=5)
-        currRow += 1
-        self.captionLabel.grid(column=0, row=currRow, sticky=S+E)
-        self.captionCheck.grid(column=1, row=currRow, sticky=S+W)
-        self.captionhLabel.grid(column=2, row=currRow, sticky=S+E)
-        self.captionhEntry.grid(column=3, row=currRow, sticky=S+W, padx=5)
-        currRow += 1
-        self.removeframeLabel.grid(column=0, row=currRow, sticky=S+E)
-        self.removeframeCheck.grid(column=1, row=currRow, sticky=S+W)
-        currRow += 1
-        self.alternateborderLabel.grid(column=0, row=currRow, sticky=S+E)
-        self.alternateborderCheck.grid(column=1, row=currRow, sticky=S+W)
-        currRow += 1
-        self.saveparamsLabel.grid(column=0, row=currRow, sticky=S+E)
-        self.saveparamsCheck.grid(column=1, row=currRow, sticky=S+W)
-        currRow += 1
-        self.rowconfigure(currRow, pad=6)
-        self.okButton.grid(column=1, row=currRow, sticky=E)
-        self.cancelButton.grid(column=2, row=currRow, sticky=W) 
-
-    def okButton_pressed(self):
-        """ User variables testing and preparing """
-        # create PhotoBook Layout
-
-        # checks for input errors
-        if (self.colsVar.get().isdigit() == False or self.colsVar.get().isdigit() == False
-            or int(self.colsVar.get()) == 0 or int(self.rowsVar.get()) == 0):
-            self.statusVar.set('Columns and Rows must be integers > 0.')
-            return
-
-        if (self.aspectwidthVar.get().isdigit() == False 
-            or self.aspectheightVar.get().isdigit() == False):
-            self.statusVar.set('Aspect ratio figures must be integers.')
-            return
-        if int(self.aspectheightVar.get()) == 0:
-            aspectratio = 0	# fill entire frame
-        else:
-            aspectratio = int(self.aspectwidthVar.get()) / int(self.aspectheightVar.get())
+    def createBook(self):
+        """ Lay out all images of the images folder over the pages from the
+        current page on, one page template per page (see paginate)."""
+        timer = self.timer
+        try:
+            with timer.time('book', 'read headers'):
+                imageFiles, infos, unreadable = self.readImages()
+        except OSError as err:
+            return 'Cannot read images folder: %s' % err
+        if not imageFiles:
+            return 'No images (.jpg, .png, .tif) in the images folder.'
+        order = sorted(range(len(infos)), key=lambda k: (infos[k].sortTime(), imageFiles[k]))
+        imageFiles = [imageFiles[k] for k in order]
+        infos = [infos[k] for k in order]
+
+        # templates on the current page (other pages may only differ in margins)
+        firstPage = currentPage()
+        plans = []
+        for cols, rows in self.templates:
+            plan = gridLayout(self.pageArea(firstPage), cols, rows, self.gap, self.aspectratio,
+                self.scale, self.alignh, self.alignv, self.captionh)
+            err = plan.problems()
+            if err is not None:
+                return '%dx%d: %s' % (cols, rows, err)
+            plans.append(plan.readingOrder())
+        templateAspects = [[frame[2] / frame[3] for frame, caption in plan.cells()]
+            for plan in plans]
+        with timer.time('book', 'paginate'):
+            pages = paginate([info.aspect() for info in infos], templateAspects,
+                self.bookPages or None)
+        if pages is None:
+            return 'The images cannot be laid out with these page templates.'
+
+        with DocumentBatch() as batch:
+            for i in range(firstPage + len(pages) - 1 - pageCount()):
+                newPage(-1)
+            try:
+                for n in range(len(pages)):
+                    t, first, last = pages[n]
+                    page = firstPage + n
+                    item = 'page %d' % page
+                    gotoPage(page)
+                    cols, rows = self.templates[t]
+                    with timer.time(item, 'geometry'):
+                        plan = gridLayout(self.pageArea(page), cols, rows, self.gap,
+                            self.aspectratio, self.scale, self.alignh, self.alignv,
+                            self.captionh).readingOrder().subset(range(last - first))
+                    with timer.time(item, 'draw'):
+                        newFrames = self.drawCells(plan, self.borderLineStyle())
+                    timer.addSince('(run)', 'first frame', self.runStart)
+                    with timer.time(item, 'load images'):
+                        self.loadImages(plan, newFrames, imageFiles[first:last],
+                            infos[first:last])
+            finally:
+                gotoPage(firstPage)
+            batch.changed()
+
+        text = '%d images on %d pages (%d-%d).' % (len(imageFiles), len(pages), firstPage,
+            firstPage + len(pages) - 1)
+        if self.bookPages and len(pages) > self.bookPages:
+            text += '\nThe images do not fit on %d pages with these templates.' % self.bookPages
+        if unreadable:
+            text += '\n' + self.unreadableText(unreadable)
+        messageBox('PhotoBook Layout Maker', text, ICON_INFORMATION)
+        return None
 
-        if int(self.removeframeVar.get()) == 0:
-            removeframe = 0
-        else:
-            removeframe = 1
+    def createFromSpec(self):
+        """ Lay out the pages of the document with the grids of the spec
+        file (see PhotoBookLayoutSpec.py), each within the page margins."""
+        timer = self.timer
+        try:
+            spec = LayoutSpec(self.specFile, CONFIG_FILE)
+            pagesByLayout = spec.pagesByLayout(pageCount())
+            makers = {}
+            for layout in pagesByLayout:
+                makers[layout], err = createLayoutMaker(spec.values(layout))
+                if err is not None:
+                    return 'Spec file, layout "%s": %s' % (layout, err)
+        except (OSError, ValueError) as problem:
+            return 'Spec file: %s' % problem
+        if not pagesByLayout:
+            return 'Spec file: no layout for any page of the document.'
+
+        # the geometry of all pages of a layout in one call
+        plans = []    # (page, plan, layout maker), in page order
+        for layout, pages in pagesByLayout.items():
+            maker = makers[layout]
+            with timer.time('spec', 'geometry'):
+                plan = gridLayout([self.pageArea(page) for page in pages], maker.cols,
+                    maker.rows, maker.gap, maker.aspectratio, maker.scale, maker.alignh,
+                    maker.alignv, maker.captionh)
+            err = plan.problems()
+            if err is not None:
+                return 'Spec file, layout "%s": %s' % (layout, err)
+            cellsPerPage = maker.cols * maker.rows
+            for k, page in enumerate(pages):
+                plans.append((page, plan.subset(range(k * cellsPerPage,
+                    (k + 1) * cellsPerPage)), maker))
+        plans.sort(key=lambda plan: plan[0])
+
+        nbrFrames = 0
+        current = currentPage()
+        progressTotal(len(plans))
+        with DocumentBatch() as batch:
+            try:
+                for n, (page, plan, maker) in enumerate(plans):
+                    gotoPage(page)
+                    with timer.time('page %d' % page, 'draw'):
+                        nbrFrames += len(maker.drawCells(plan, maker.borderLineStyle()))
+                    timer.addSince('(run)', 'first frame', self.runStart)
+                    progressSet(n + 1)
+            finally:
+                gotoPage(current)
+            batch.changed()
+
+        text = '%d frames on %d pages:' % (nbrFrames, len(plans))
+        for layout, pages in pagesByLayout.items():
+            text += '\n%s: %d pages' % (layout, len(pages))
+        messageBox('PhotoBook Layout Maker', text, ICON_INFORMATION)
+        return None
 
-        if int(self.alternateborderVar.get()) == 0:
-            alternateborder = 0
-        else:
-            alternateborder = 1
-
-        if self.saveparamsVar.get() == 1:    # save parameters to 'PhotoBookLayoutMaker.cfg'
-            self.config = ConfigParser()
-            self.configFile = (os.path.join(os.path.dirname(__file__), 'PhotoBookLayoutMaker.cfg'))
-            self.config.read(self.configFile)
-            self.configItems = self.config.items('DEFAULT')
-            self.config.set('DEFAULT', self.configItems[0][0], self.colsVar.get())
-            self.config.set('DEFAULT', self.configItems[1][0], self.rowsVar.get())
-            self.config.set('DEFAULT', self.configItems[2][0], str(self.gapVar.get()))
-            self.config.set('DEFAULT', self.configItems[3][0], self.aspectwidthVar.get())
-            self.config.set('DEFAULT', self.configItems[4][0], self.aspectheightVar.get())
-            self.config.set('DEFAULT', self.configItems[5][0], str(self.scaleVar.get()))
-            self.config.set('DEFAULT', self.configItems[6][0], self.alignhVar.get())
-            self.config.set('DEFAULT', self.configItems[7][0], self.alignvVar.get())
-            self.config.set('DEFAULT', self.configItems[8][0], str(self.captionVar.get()))
-            self.config.set('DEFAULT', self.configItems[9][0], str(self.captionhVar.get()))
-            self.config.set('DEFAULT', self.configItems[10][0], str(removeframe))
-            self.config.set('DEFAULT', self.configItems[11][0], str(alternateborder))
-            with open(self.configFile, 'w') as configfile:
-                self.config.write(configfile)    # converts all items to lowercase !
-            #self.configItems = self.config.items('DEFAULT') 
-            #msg = messagebox.showinfo("INFO:", self.configItems) #################
-
-        if not int(self.captionVar.get()) == 1:
-            self.captionhVar.set("0.0")
-
-        spblm = ScPhotoBookLayoutMaker(int(self.colsVar.get()), int(self.rowsVar.get()),
-            float(self.gapVar.get()), float(aspectratio), float(self.scaleVar.get()),
-            self.alignhVar.get(), self.alignvVar.get(), float(self.captionhVar.get()),
-            removeframe, alternateborder)
-        self.master.withdraw()
-        err = spblm.createLayout()
-
-        if err != None:
-            self.master.deiconify()
-            self.statusVar.set(err)
+    def pageArea(self, page):
+        """ The area within the page margins (x, y, width, height)."""
+        pageWidth, pageHeight = getPageNSize(page)
+        marginTop, marginLeft, marginRight, marginBottom = getPageNMargins(page)
+        return (marginLeft, marginTop, pageWidth - marginLeft - marginRight,
+            pageHeight - marginTop - marginBottom)
+
+    def readImages(self):
+        """ Return (image files, their ImageInfo, names of unreadable files)
+        of the images folder. Raises OSError if the folder cannot be read."""
+        imageFiles, infos, unreadable = [], [], []
+        for imageFile in listImageFiles(self.imageFolder):
+            try:
+                infos.append(imageInfo(imageFile))
+                imageFiles.append(imageFile)
+            except OSError:
+                unreadable.append(os.path.basename(imageFile))
+        return imageFiles, infos, unreadable
+
+    def unreadableText(self, unreadable):
+        return ('These images could not be read and were left out:\n'
+            + '\n'.join(unreadable[:10]) + ('\n...' if len(unreadable) > 10 else ''))
+
+    def loadImages(self, plan, newFrames, imageFiles, infos):
+        """ Load the images in the new frames, filling them (see fitImage)."""
+        unit = [pt, mm, inch, p, cm, c][getUnit()]    # document units per point
+        for frame, newFrame, imageFile, info in zip(plan.cells(), newFrames, imageFiles, infos):
+            loadImage(imageFile, newFrame)
+            frameSize = (frame[0][2] / unit, frame[0][3] / unit)    # points
+            imageScale, offset = fitImage(frameSize, scaleToFrame(frameSize, info))
+            setImageScale(imageScale, imageScale, newFrame)
+            setImageOffset(offset[0] * unit, offset[1] * unit, newFrame)
+
+    def drawLayout(self, plan):
+        """ Create the image frames (and caption text frames) of a LayoutPlan
+        on the current page. Returns the names of the new image frames."""
+        return self.drawCells(plan, self.borderLineStyle())
+
+    def borderLineStyle(self):
+        """ The border style of the new frames."""
+        if self.alternateborder:
+            return self.frameBorderLineStyle2
         else:
-            self.quit()
-
-    def quit(self):
-        self.master.destroy()
+            return self.frameBorderLineStyle1
+
+    def drawCells(self, plan, frameBorderLineStyle):
+        """ Create the frames of a LayoutPlan on the current page.
+        Returns the names of the new image frames."""
+        newFrames = []
+        for frame, caption in plan.cells():
+            newFrame = createImage(*frame)
+            newFrames.append(newFrame)
+            setFillColor("frameFillColor", newFrame)
+            setCustomLineStyle(frameBorderLineStyle, newFrame)
+            # draw caption text (if needed):
+            if caption is not None:
+                captionTxt = createText(*caption)
+                setText(newFrame, captionTxt)
+                setParagraphStyle(self.pStyleCaption, captionTxt)
+                setTextVerticalAlignment(ALIGNV_CENTERED, captionTxt)
+        return newFrames
+
+def createLayoutMaker(values):
+    """ Return (ScPhotoBookLayoutMaker, None) for the options (dict of
+    texts, with the keys of 'PhotoBookLayoutMaker.cfg'), or (None, the
+    problem as text)."""
+    layout = values.get('layout', LAYOUTS[0])
+    if layout not in LAYOUTS:
+        return None, 'Layout must be one of: ' + ', '.join(LAYOUTS) + '.'
+    imageFolder = values.get('imagefolder', '')
+    bookPages = values.get('bookpages', '0')
+    templates = None
+    specFile = values.get('specfile', '')
+    if layout == 'Spec file':
+        if not os.path.isfile(specFile):
+            return None, 'Spec file not found.'
+        cols = rows = 1    # not used
+    elif layout in ('Justified rows', 'Book'):
+        if not os.path.isdir(imageFolder):
+            return None, 'Images folder not found.'
+        if layout == 'Book':
+            try:
+                templates = parseTemplates(values.get('templates', '1x1 2x1 1x2 2x2'))
+            except ValueError:
+                return None, 'Page templates must be like: 1x1 2x1 1x2 2x2'
+            if not bookPages.isdigit():
+                return None, 'Book pages must be an integer >= 0.'
+        cols = rows = 1    # not used
+    elif (values['cols'].isdigit() == False or values['rows'].isdigit() == False
+        or int(values['cols']) == 0 or int(values['rows']) == 0):
+        return None, 'Columns and Rows must be integers > 0.'
+    else:
+        cols, rows = int(values['cols']), int(values['rows'])
+
+    if values['aspectwidth'].isdigit() == False or values['aspectheight'].isdigit() == False:
+        return None, 'Aspect ratio figures must be integers.'
+    if int(values['aspectheight']) == 0:
+        aspectratio = 0	# fill entire frame
+    else:
+        aspectratio = int(values['aspectwidth']) / int(values['aspectheight'])
+    try:
+        gap, scale = float(values['gap']), float(values['scale'])
+        captionh = float(values['captionh']) if values.get('caption') == '1' else 0.0
+    except ValueError:
+        return None, 'Gap, scaling and caption height must be numbers.'
+    removeframe = 0 if values.get('removeframe', '0').strip() in ('', '0') else 1
+    alternateborder = 0 if values.get('alternateborder', '0').strip() in ('', '0') else 1
+
+    return ScPhotoBookLayoutMaker(cols, rows, gap, float(aspectratio), scale,
+        values['alignh'], values['alignv'], captionh, removeframe, alternateborder,
+        layout, imageFolder, templates, int(bookPages) if bookPages.isdigit() else 0,
+        specFile), None
+
+def runPreset(preset):
+    """ Make the layout of a preset of 'PhotoBookLayoutMaker.cfg' without
+    the dialog; a problem is shown in a message box."""
+    try:
+        values = readPreset(CONFIG_FILE, preset)
+    except ValueError as problem:
+        values, err = None, str(problem)
+    if values is not None:
+        spblm, err = createLayoutMaker(values)
+        if spblm is not None:
+            spblm.timer.add('(run)', 'startup', spblm.runStart - START_TIME)
+            with Profiler():
+                err = spblm.createLayout()
+            spblm.timer.writeReport()
+    if err is not None:
+        scribus.messageBox('PhotoBook Layout Maker', err, ICON_WARNING, BUTTON_OK)
 
+##################################################
 ##################################################
 # Start program
 
-def main():
+def runDialog():
+    """ Run with the dialog (see PhotoBookLayoutMakerDialog.py): tkinter is
+    only imported here, a preset run does not need it."""
+    try:
+        from tkinter import Tk
+    except ImportError:
+        print("This script requires Python Tkinter properly installed.")
+        messageBox('Script failed',
+                   'This script requires Python Tkinter properly installed.',
+                   ICON_CRITICAL)
+        return
+    from PhotoBookLayoutMakerDialog import TkPhotoBookLayoutMaker
+    root = Tk()
+    app = TkPhotoBookLayoutMaker(root, CONFIG_FILE, LAYOUTS, createLayoutMaker, START_TIME)
+    root.mainloop()
+
+def main(preset=None):
+    """ Run with the dialog, or without it with a preset (a section of
+    'PhotoBookLayoutMaker.cfg', see presetArgument)."""
     if scribus.haveDoc() == 0:
         scribus.messageBox("Error: No document open",
             "Please, create (or open) a document before running this script ...",
             scribus.ICON_WARNING,scribus.BUTTON_OK)
         return
     
+    index = openDocumentImageIndex()    # image headers of earlier runs
     try:
         scribus.statusMessage('Running script...')
         scribus.progressReset()
         unit = scribus.getUnit()
-        root = Tk()
-        app = TkPhotoBookLayoutMaker(root)
-        root.mainloop()
+        if preset is None:
+            preset = presetArgument()
+        if preset is None:
+            runDialog()
+        else:
+            runPreset(preset)
     finally:
         if scribus.haveDoc():
             scribus.redrawAll()
         scribus.setUnit(unit)
+        if index is not None:
+            index.close()
         scribus.statusMessage('Done.')
         scribus.progressReset()
 
@@ -0,0 +1,266 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+VERSION: 1.0 of 2026-10-17
+AUTHOR: Rafferty River.
+LICENSE: GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY.
+
+DESCRIPTION & USAGE:
+This module is the Tk dialog of 'PhotoBookLayoutMaker.py', which imports
+it only when it shows the dialog: a run with a preset does not import
+tkinter. It is not a script to run by itself.
+"""
+##################################################
+# imports
+import os, time
+from configparser import ConfigParser
+
+from tkinter import * # python 3 syntax
+from tkinter import ttk # for ComboBox
+from tkinter import filedialog
+
+from PhotoBookTiming import Profiler
+
+##################################################
+class TkPhotoBookLayoutMaker(Frame):
+    """ GUI interface for PhotoBook Layout Maker with Tkinter"""
+
+    def __init__(self, master, configFile, layouts, createLayoutMaker, startTime):
+        """ Setup the dialog: configFile, layouts, createLayoutMaker and
+        startTime (the start of the script, for the timing report) come
+        from PhotoBookLayoutMaker.py """
+        Frame.__init__(self, master)
+        self.createLayoutMaker = createLayoutMaker
+        self.startTime = startTime
+        self.grid()
+        self.master.resizable(0, 0)
+        self.master.title('Scribus PhotoBook Layout Maker')
+
+        # define variables
+        self.statusVar = StringVar(self, value='Enter Values and Options and press OK.')
+        self.statusLabel = Label(self, fg="red", textvariable=self.statusVar)
+        self.layoutLabel = Label(self, text='Layout:')
+        self.layoutVar = ttk.Combobox(self, values = layouts, width=14)
+        self.imageFolderVar = StringVar()
+        self.imageFolderLabel = Label(self, text='Images folder (justified rows, book):')
+        self.imageFolderEntry = Entry(self, textvariable=self.imageFolderVar, width=30)
+        self.imageFolderButton = Button(self, text="Browse...", command=self.browseImageFolder)
+        self.templatesVar = StringVar()
+        self.templatesLabel = Label(self, text='Book page templates (cols x rows):')
+        self.templatesEntry = Entry(self, textvariable=self.templatesVar, width=30)
+        self.bookPagesVar = StringVar()
+        self.bookPagesLabel = Label(self, text='Book pages (0 = no limit):')
+        self.bookPagesEntry = Entry(self, textvariable=self.bookPagesVar, width=9)
+        self.specFileVar = StringVar()
+        self.specFileLabel = Label(self, text='Spec file (layout spec file):')
+        self.specFileEntry = Entry(self, textvariable=self.specFileVar, width=30)
+        self.specFileButton = Button(self, text="Browse...", command=self.browseSpecFile)
+        self.colsVar = StringVar()
+        self.colsLabel = Label(self, text='Split/merge rectangle of selected item(s)\n\
+        or area within page margins in columns:')
+        self.colsEntry = Entry(self, textvariable=self.colsVar, width=9)
+        self.rowsVar = StringVar()
+        self.rowsLabel = Label(self, text=' and rows:')
+        self.rowsEntry = Entry(self, textvariable=self.rowsVar, width=9)
+        self.gapVar = DoubleVar()
+        self.gapLabel = Label(self, text='Gap in document units:')
+        self.gapEntry = Entry(self, textvariable=self.gapVar, width=9)
+        self.aspectwidthVar = StringVar()
+        self.aspectLabel = Label(self, text='New frame(s) aspect ratio (0=maximum area)')
+        self.aspectwidthLabel = Label(self, text='width:')
+        self.aspectwidthEntry = Entry(self, textvariable=self.aspectwidthVar, width=9)
+        self.aspectheightVar = StringVar()
+        self.aspectheightLabel = Label(self, text='  to height:')
+        self.aspectheightEntry = Entry(self, textvariable=self.aspectheightVar, width=9)
+        self.scaleVar = DoubleVar()
+        self.scaleLabel = Label(self, text='New frame(s) scaling in % of selected rectangle:')
+        self.scaleEntry = Entry(self, textvariable=self.scaleVar, width=9)
+        self.alignhLabel = Label(self, text='New frame(s) alignment - horizontal:')
+        self.alignhVar = ttk.Combobox(self, values = ["Left", "Center", "Right"], width=6)
+        self.alignvLabel = Label(self, text=' vertical:')
+        self.alignvVar = ttk.Combobox(self, values = ["Top", "Center", "Bottom"], width=6)
+        self.captionVar = IntVar()
+        self.captionLabel = Label(self, text='Text caption below image frame:')
+        self.captionCheck = Checkbutton(self, variable=self.captionVar)
+        self.captionhVar = DoubleVar()
+        self.captionhLabel = Label(self, text='Caption height\n in document units:')
+        self.captionhEntry = Entry(self, textvariable=self.captionhVar, width=9)
+        self.removeframeVar = IntVar()
+        self.removeframeLabel = Label(self, text='Remove source items:')
+        self.removeframeCheck = Checkbutton(self, variable=self.removeframeVar)
+        self.alternateborderVar = IntVar()
+        self.alternateborderLabel = Label(self, text='Alternative border style for new frame(s):')
+        self.alternateborderCheck = Checkbutton(self, variable=self.alternateborderVar)
+        self.saveparamsVar = IntVar()
+        self.saveparamsLabel = Label(self, text='Save above parameters for future use:')
+        self.saveparamsCheck = Checkbutton(self, variable=self.saveparamsVar)
+
+        self.okButton = Button(self, text="OK", width=6, command=self.okButton_pressed)
+        self.cancelButton = Button(self, text="Cancel", command=self.quit)
+
+        # open 'PhotoBookLayoutMaker.cfg' - parameters file and read values
+        self.config = ConfigParser()
+        self.configFile = configFile
+        self.config.read(self.configFile)
+        config = self.config
+        self.colsVar.set(config.get('DEFAULT', 'cols', fallback='2'))
+        self.rowsVar.set(config.get('DEFAULT', 'rows', fallback='1'))
+        self.gapVar.set(config.get('DEFAULT', 'gap', fallback='5.0'))
+        self.aspectwidthVar.set(config.get('DEFAULT', 'aspectwidth', fallback='0'))
+        self.aspectheightVar.set(config.get('DEFAULT', 'aspectheight', fallback='0'))
+        self.scaleVar.set(config.get('DEFAULT', 'scale', fallback='100.0'))
+        self.alignhVar.set(config.get('DEFAULT', 'alignh', fallback='Center'))
+        self.alignvVar.set(config.get('DEFAULT', 'alignv', fallback='Center'))
+        self.captionVar.set(config.get('DEFAULT', 'caption', fallback='0'))
+        if self.captionVar.get() == 1:
+            self.captionCheck.select()
+        self.captionhVar.set(config.get('DEFAULT', 'captionh', fallback='5.0'))
+        self.removeframeVar.set(config.get('DEFAULT', 'removeframe', fallback='1'))
+        if self.removeframeVar.get() == 1:
+            self.removeframeCheck.select()
+        self.alternateborderVar.set(config.get('DEFAULT', 'alternateborder', fallback='0'))
+        if self.alternateborderVar.get() == 1:
+            self.alternateborderCheck.select()
+        self.layoutVar.set(config.get('DEFAULT', 'layout', fallback=layouts[0]))
+        self.imageFolderVar.set(config.get('DEFAULT', 'imagefolder', fallback=''))
+        self.templatesVar.set(config.get('DEFAULT', 'templates', fallback='1x1 2x1 1x2 2x2'))
+        self.bookPagesVar.set(config.get('DEFAULT', 'bookpages', fallback='0'))
+        self.specFileVar.set(config.get('DEFAULT', 'specfile', fallback=''))
+        #self.saveparamsCheck.select()
+
+        # make interface layout
+        self.columnconfigure(0, pad=6)
+        currRow = 0
+        self.statusLabel.grid(column=0, row=currRow, columnspan=4)
+        currRow += 1
+        self.layoutLabel.grid(column=0, row=currRow, sticky=S+E)
+        self.layoutVar.grid(column=1, row=currRow, sticky=S+W)
+        currRow += 1
+        self.imageFolderLabel.grid(column=0, row=currRow, sticky=S+E)
+        self.imageFolderEntry.grid(column=1, row=currRow, columnspan=2, sticky=S+W)
+        self.imageFolderButton.grid(column=3, row=currRow, sticky=S+W, padx=5)
+        currRow += 1
+        self.templatesLabel.grid(column=0, row=currRow, sticky=S+E)
+        self.templatesEntry.grid(column=1, row=currRow, columnspan=2, sticky=S+W)
+        currRow += 1
+        self.bookPagesLabel.grid(column=0, row=currRow, sticky=S+E)
+        self.bookPagesEntry.grid(column=1, row=currRow, sticky=S+W)
+        currRow += 1
+        self.specFileLabel.grid(column=0, row=currRow, sticky=S+E)
+        self.specFileEntry.grid(column=1, row=currRow, columnspan=2, sticky=S+W)
+        self.specFileButton.grid(column=3, row=currRow, sticky=S+W, padx=5)
+        currRow += 1
+        self.colsLabel.grid(column=0, row=currRow, sticky=S+E)
+        self.colsEntry.grid(column=1, row=currRow, sticky=S+W)
+        self.rowsLabel.grid(column=2, row=currRow, sticky=S+E)
+        self.rowsEntry.grid(column=3, row=currRow, sticky=S+W, padx=5)
+        currRow += 1
+        self.gapLabel.grid(column=0, row=currRow, sticky=S+E)
+        self.gapEntry.grid(column=1, row=currRow, sticky=S+W)
+        currRow += 1
+        self.aspectLabel.grid(column=0, row=currRow, sticky=S+E)
+        currRow += 1
+        self.aspectwidthLabel.grid(column=0, row=currRow, sticky=S+E)
+        self.aspectwidthEntry.grid(column=1, row=currRow, sticky=S+W)
+        self.aspectheightLabel.grid(column=2, row=currRow, sticky=S+E)
+        self.aspectheightEntry.grid(column=3, row=currRow, sticky=S+W, padx=5)
+        currRow += 1
+        self.scaleLabel.grid(column=0, row=currRow, sticky=S+E)
+        self.scaleEntry.grid(column=1, row=currRow, sticky=S+W)
+        currRow += 1
+        self.alignhLabel.grid(column=0, row=currRow, sticky=S+E)
+        self.alignhVar.grid(column=1, row=currRow, sticky=S+W)
+        self.alignvLabel.grid(column=2, row=currRow, sticky=S+E)
+        self.alignvVar.grid(column=3, row=currRow, sticky=S+W, padx=5)
+        currRow += 1
+        self.captionLabel.grid(column=0, row=currRow, sticky=S+E)
+        self.captionCheck.grid(column=1, row=currRow, sticky=S+W)
+        self.captionhLabel.grid(column=2, row=currRow, sticky=S+E)
+        self.captionhEntry.grid(column=3, row=currRow, sticky=S+W, padx=5)
+        currRow += 1
+        self.removeframeLabel.grid(column=0, row=currRow, sticky=S+E)
+        self.removeframeCheck.grid(column=1, row=currRow, sticky=S+W)
+        currRow += 1
+        self.alternateborderLabel.grid(column=0, row=currRow, sticky=S+E)
+        self.alternateborderCheck.grid(column=1, row=currRow, sticky=S+W)
+        currRow += 1
+        self.saveparamsLabel.grid(column=0, row=currRow, sticky=S+E)
+        self.saveparamsCheck.grid(column=1, row=currRow, sticky=S+W)
+        currRow += 1
+        self.rowconfigure(currRow, pad=6)
+        self.okButton.grid(column=1, row=currRow, sticky=E)
+        self.cancelButton.grid(column=2, row=currRow, sticky=W) 
+        self.openTime = time.perf_counter()    # for the timing report
+
+    def browseImageFolder(self):
+        """ Choose the images folder """
+        folder = filedialog.askdirectory(initialdir=self.imageFolderVar.get() or None,
+            title='Images folder')
+        if folder:
+            self.imageFolderVar.set(folder)
+
+    def browseSpecFile(self):
+        """ Choose the spec file """
+        specFile = filedialog.askopenfilename(title='Spec file',
+            initialdir=os.path.dirname(self.specFileVar.get()) or None)
+        if specFile:
+            self.specFileVar.set(specFile)
+
+    def okButton_pressed(self):
+        """ User variables testing and preparing """
+        # create PhotoBook Layout
+        values = {
+            'cols': self.colsVar.get(),
+            'rows': self.rowsVar.get(),
+            'gap': str(self.gapVar.get()),
+            'aspectwidth': self.aspectwidthVar.get(),
+            'aspectheight': self.aspectheightVar.get(),
+            'scale': str(self.scaleVar.get()),
+            'alignh': self.alignhVar.get(),
+            'alignv': self.alignvVar.get(),
+            'caption': str(self.captionVar.get()),
+            'captionh': str(self.captionhVar.get()),
+            'removeframe': str(self.removeframeVar.get()),
+            'alternateborder': str(self.alternateborderVar.get()),
+            'layout': self.layoutVar.get(),
+            'imagefolder': self.imageFolderVar.get(),
+            'templates': self.templatesVar.get(),
+            'bookpages': self.bookPagesVar.get(),
+            'specfile': self.specFileVar.get(),
+        }
+        spblm, err = self.createLayoutMaker(values)
+        if spblm is None:
+            self.statusVar.set(err)
+            return
+
+        if self.saveparamsVar.get() == 1:    # save parameters to 'PhotoBookLayoutMaker.cfg'
+            self.config = ConfigParser()
+            self.config.read(self.configFile)
+            values['removeframe'] = str(spblm.removeframe)
+            values['alternateborder'] = str(spblm.alternateborder)
+            for key, value in values.items():
+                self.config.set('DEFAULT', key, value)
+            with open(self.configFile, 'w') as configfile:
+                self.config.write(configfile)    # converts all items to lowercase !
+
+        if not int(self.captionVar.get()) == 1:
+            self.captionhVar.set("0.0")
+
+        spblm.timer.add('(run)', 'startup', self.openTime - self.startTime)
+        spblm.timer.add('(run)', 'dialog', spblm.runStart - self.openTime)
+        self.master.withdraw()
+        with Profiler():
+            err = spblm.createLayout()
+        spblm.timer.writeReport()
+
+        if err != None:
+            self.master.deiconify()
+            self.statusVar.set(err)
+        else:
+            self.quit()
+
+    def quit(self):
+        self.master.destroy()
@@ -0,0 +1,147 @@
+#! /usr/bin/env python
+#-*- coding: utf-8 -*-
+'''
+VERSION: 1.0 of 2026-10-17
+AUTHOR: Rafferty River.
+LICENSE: GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY.
+
+DESCRIPTION & USAGE:
+This module reads the spec file of layout 'Spec file' of the script
+'PhotoBookLayoutMaker.py': which grid layout goes on which pages, so one
+run lays out a whole document. It is not a script to run by itself; it
+does not need Scribus.
+
+A spec file is an INI file. Its section [pages] maps page patterns to
+layouts, one per line; when several lines match a page, the last one wins:
+
+    [pages]
+    all = 2x2
+    1 = 1x1
+    2-199 even = grid 2x2
+    2-199 odd = 3x2
+    200- = none
+
+Page patterns: 'all', a page (5), a range (2-199, or 50- up to the last
+page), or a list of them (1, 5, 9-12); 'odd' or 'even' after it keeps
+only the odd or even page numbers (right or left pages when the book
+starts on a right page).
+Layouts: a preset, i.e. a section of the spec file or else of
+'PhotoBookLayoutMaker.cfg' (what it leaves out comes from [DEFAULT] of
+the spec file, then of 'PhotoBookLayoutMaker.cfg'); 'CxR' (e.g. 3x2) for
+that grid with the [DEFAULT] options; 'DEFAULT' for those; 'none' to leave a page as it is.
+Only grids can be used: 'Justified rows' and 'Book' need an images folder
+of their own.
+'''
+##################################################
+# imports
+import os
+from collections import OrderedDict
+from configparser import ConfigParser, Error as ConfigError
+
+from PhotoBookLayoutGeometry import parseTemplates
+
+PAGES_SECTION = 'pages'
+NO_LAYOUT = 'none'
+DEFAULT_SECTION = 'DEFAULT'
+
+##################################################
+def parsePagePattern(text):
+    """ Return ([(first, last or None for the last page)], parity) of a
+    page pattern like '2-199 even' (parity 1 for odd, 0 for even pages,
+    None for all). Raises ValueError for a bad pattern."""
+    words = text.strip().lower().split()
+    parity = None
+    if words and words[-1] in ('odd', 'even'):
+        parity = 1 if words.pop() == 'odd' else 0
+    text = ' '.join(words)
+    if text in ('', 'all'):
+        return [(1, None)], parity
+    ranges = []
+    for part in text.split(','):
+        if '-' in part:
+            first, last = part.split('-', 1)
+            first, last = int(first), int(last) if last.strip() else None
+        else:
+            first = last = int(part)
+        if first < 1 or (last is not None and last < first):
+            raise ValueError('bad page range %s' % part.strip())
+        ranges.append((first, last))
+    return ranges, parity
+
+class LayoutSpec:
+    """ The page patterns and layouts of a spec file."""
+
+    def __init__(self, specFile, configFile):
+        """ Read the spec file (configFile: 'PhotoBookLayoutMaker.cfg').
+        Raises OSError if the spec file cannot be read, ValueError if it
+        is not a valid spec (or either file is not a valid INI file)."""
+        self.specFile = specFile
+        # [DEFAULT] read as a section of its own: a preset only has its own options
+        self.spec = ConfigParser(default_section=None, interpolation=None)
+        self.config = ConfigParser(default_section=None, interpolation=None)
+        try:
+            with open(specFile) as specText:
+                self.spec.read_file(specText)
+            self.config.read(configFile)
+        except ConfigError as err:    # e.g. a duplicate option, no section header
+            raise ValueError(err.message)
+        if not self.spec.has_section(PAGES_SECTION):
+            raise ValueError('no section [%s] in %s' % (PAGES_SECTION,
+                os.path.basename(specFile)))
+        self.rules = []    # ([(first, last)], parity, layout), in file order
+        for pattern, layout in self.spec.items(PAGES_SECTION):
+            try:
+                ranges, parity = parsePagePattern(pattern)
+            except ValueError:
+                raise ValueError('bad page pattern "%s"' % pattern)
+            self.rules.append((ranges, parity, layout.strip()))
+
+    def layoutOf(self, page):
+        """ Return the layout (name) of a page, or None."""
+        layout = None
+        for ranges, parity, name in self.rules:
+            if parity is not None and page % 2 != parity:
+                continue
+            for first, last in ranges:
+                if first <= page and (last is None or page <= last):
+                    layout = name
+        return None if layout == NO_LAYOUT else layout
+
+    def pagesByLayout(self, nbrPages):
+        """ Return OrderedDict(layout -> [page numbers]) of the pages 1..nbrPages,
+        in the order of their first page."""
+        pages = OrderedDict()
+        for page in range(1, nbrPages + 1):
+            layout = self.layoutOf(page)
+            if layout is not None:
+                pages.setdefault(layout, []).append(page)
+        return pages
+
+    def values(self, layout):
+        """ Return the options (dict of texts, with the keys of
+        'PhotoBookLayoutMaker.cfg') of a layout of the spec. Raises
+        ValueError for an unknown layout or one that is not a grid."""
+        values = {}
+        for parser in (self.config, self.spec):
+            if parser.has_section(DEFAULT_SECTION):
+                values.update(parser.items(DEFAULT_SECTION))
+        if layout == PAGES_SECTION:
+            raise ValueError('unknown layout "%s"' % layout)
+        if layout == DEFAULT_SECTION:
+            pass
+        elif self.spec.has_section(layout):
+            values.update(self.spec.items(layout))
+        elif self.config.has_section(layout):
+            values.update(self.config.items(layout))
+        else:
+            try:
+                [(cols, rows)] = parseTemplates(layout)
+            except ValueError:
+                raise ValueError('unknown layout "%s"' % layout)
+            values.update({'cols': str(cols), 'rows': str(rows), 'layout': 'Grid'})
+        if values.get('layout', 'Grid') not in ('Grid', 'Spec file'):
+            raise ValueError('layout "%s" is not a grid' % layout)
+        values['layout'] = 'Grid'
+        return values
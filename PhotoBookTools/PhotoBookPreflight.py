@@ -0,0 +1,164 @@
+#! /usr/bin/env python
+#-*- coding: utf-8 -*-
+'''
+VERSION: 1.0 of 2026-10-17
+AUTHOR: Rafferty River.
+LICENSE: GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY.
+
+DESCRIPTION & USAGE:
+This module is the preflight of 'PhotoBookImageCropResize.py' (button
+'Preflight') and of 'PhotoBookSlaBatch.py --preflight': it tells, before
+cropping anything, what Crop and Resize would do with each frame. It
+is not a script to run by itself; it does not need Scribus.
+
+Only the image file headers are read (in a thread pool, and through the
+image index, see PhotoBookImageInfo.scanImages); with the frame geometry
+of the CropJobs this gives per frame:
+- the effective resolution: image pixels per inch of the page (the
+  lowest of both directions when the image is stretched);
+- the crop box and the new image size at the chosen resolution, as
+  Crop and Resize would make it (PhotoBookCropEngine.cropBox/outputSize);
+- the projected size of the "_cropped" file: exact for TIFF (Pillow
+  writes it uncompressed), an estimate for JPEG (bits per pixel of the
+  source JPEG, or JPEG_ESTIMATE_BPP, at most the JPEG target) and PNG;
+- a flag: 'under-resolved' below LOW_DPI_PART of the resolution (Crop
+  and Resize keeps the resolution of the image, it does not enlarge
+  it), 'oversized' above HIGH_DPI_PART of it (cropping saves much),
+  'unreadable', or else 'ok'.
+A frame showing a "_cropped" file is measured with its original image.
+'''
+##################################################
+# imports
+import os, csv
+
+from PhotoBookCropEngine import cropBox, outputSize
+from PhotoBookImageInfo import scanImages
+
+# flags: effective DPI below LOW_DPI_PART (above HIGH_DPI_PART) of the resolution
+LOW_DPI_PART = 0.8
+HIGH_DPI_PART = 1.5
+FLAGS = ['under-resolved', 'oversized', 'unreadable', 'ok']
+
+# projected file size: bits per pixel of a JPEG made from a non-JPEG source,
+# and PNG size as part of the raw pixel data (photos)
+JPEG_ESTIMATE_BPP = 2.0
+PNG_ESTIMATE_PART = 0.6
+
+# bits per pixel of the raw pixel data of the output modes
+MODE_BITS = {'RGB': 24, 'CMYK': 32, 'L': 8, '1': 1}
+
+# frames listed per flag in the summary
+LISTED_FRAMES = 10
+
+##################################################
+class FramePreflight:
+    """ What Crop and Resize would do with the image of one frame."""
+
+    def __init__(self, job, info=None):
+        """ Setup basic things; without info (ImageInfo) the image is
+        unreadable."""
+        self.job = job
+        self.sourceBytes = info.fileSize if info is not None else None
+        self.effectiveDpi = None    # image pixels per inch in the frame (lowest direction)
+        self.box = None             # crop box in pixels of the stored image
+        self.newSize = None         # (width, height) of the "_cropped" file
+        self.projectedBytes = None  # (estimated) size of the "_cropped" file
+        if info is None:
+            self.flag = 'unreadable'
+            return
+        imageSize = info.size
+        if info.orientation in (5, 6, 7, 8):    # the engine crops the stored image
+            imageSize = (imageSize[1], imageSize[0])
+        # Scribus imageX/YScale: points of the page per image pixel
+        self.effectiveDpi = 72.0 / max(abs(job.imageScale[0]), abs(job.imageScale[1]))
+        self.box = cropBox(imageSize, job.frameSizePoints, job.imageOffset, job.imageScale)
+        if self.box[2] <= self.box[0] or self.box[3] <= self.box[1]:
+            self.flag = 'unreadable'    # the image is not in the frame: nothing to crop
+            return
+        self.newSize = outputSize(self.box, job.frameSizeInches, job.resolution)
+        self.projectedBytes = projectedBytes(job, info, self.newSize)
+        if self.effectiveDpi < job.resolution * LOW_DPI_PART:
+            self.flag = 'under-resolved'
+        elif self.effectiveDpi > job.resolution * HIGH_DPI_PART:
+            self.flag = 'oversized'
+        else:
+            self.flag = 'ok'
+
+def projectedBytes(job, info, newSize):
+    """ Return the (estimated) file size of the "_cropped" file of a job
+    with new image size newSize; info is the ImageInfo of the source."""
+    pixels = newSize[0] * newSize[1]
+    rawBytes = pixels * MODE_BITS.get(job.mode, 24) // 8
+    ext = os.path.splitext(job.newImageFile)[1].lower()
+    if ext == '.tif':
+        return rawBytes
+    if ext == '.png':
+        return int(rawBytes * PNG_ESTIMATE_PART)
+    bpp = JPEG_ESTIMATE_BPP
+    if (os.path.splitext(info.path)[1].lower() in ('.jpg', '.jpeg') and info.fileSize
+        and info.size[0] * info.size[1]):
+        bpp = info.fileSize * 8.0 / (info.size[0] * info.size[1])
+    estimate = min(int(pixels * bpp / 8), rawBytes)
+    targetBytes = job.jpeg.targetBytes(newSize)
+    return min(estimate, targetBytes) if targetBytes else estimate
+
+def preflightJobs(jobs, workers=8):
+    """ Return the FramePreflight of every CropJob, reading the headers of
+    the source files in a thread pool."""
+    infos = scanImages(sorted(set(job.imgFile for job in jobs)), workers)
+    return [FramePreflight(job, infos.get(job.imgFile)) for job in jobs]
+
+def preflightSummary(results, resolution):
+    """ Return the summary of a preflight as a list of text lines: the
+    number of frames per flag, the size of the image files now and after
+    Crop and Resize (each file counted once; frames sharing a "_cropped"
+    file: the last one wins, as in a crop run) and the worst frames."""
+    counts = dict((flag, 0) for flag in FLAGS)
+    sources = {}
+    outputs = {}
+    for result in results:
+        counts[result.flag] += 1
+        if result.sourceBytes is not None:
+            sources[os.path.normcase(result.job.imgFile)] = result.sourceBytes
+        outputs[os.path.normcase(result.job.newImageFile)] = result
+    before = sum(sources.values())
+    after = sum(result.projectedBytes or 0 for result in outputs.values())
+    lines = ['%d image frame(s): %d under-resolved (below %d DPI), %d oversized '
+        '(above %d DPI), %d unreadable, %d ok.' % (len(results), counts['under-resolved'],
+        resolution * LOW_DPI_PART, counts['oversized'], resolution * HIGH_DPI_PART,
+        counts['unreadable'], counts['ok'])]
+    lines.append('Image files: %.1f MB now, about %.1f MB after Crop and Resize (%d%%).'
+        % (before / 1e6, after / 1e6, round(100.0 * after / before) if before else 100))
+    low = sorted((result for result in results if result.flag == 'under-resolved'),
+        key=lambda result: result.effectiveDpi)
+    if low:
+        lines.append('Lowest resolution:')
+        lines.extend('%s: %d DPI (%s)' % (result.job.imageFrame, result.effectiveDpi,
+            os.path.basename(result.job.imgFile)) for result in low[:LISTED_FRAMES])
+        if len(low) > LISTED_FRAMES:
+            lines.append('... and %d more.' % (len(low) - LISTED_FRAMES))
+    unreadable = [result for result in results if result.flag == 'unreadable']
+    if unreadable:
+        lines.append('Unreadable (or not in the frame):')
+        lines.extend('%s: %s' % (result.job.imageFrame, result.job.imgFile)
+            for result in unreadable[:LISTED_FRAMES])
+        if len(unreadable) > LISTED_FRAMES:
+            lines.append('... and %d more.' % (len(unreadable) - LISTED_FRAMES))
+    return lines
+
+def writePreflight(path, results):
+    """ Write one row per frame to a .csv file."""
+    with open(path, 'w', newline='') as reportFile:
+        writer = csv.writer(reportFile)
+        writer.writerow(['frame', 'image', 'flag', 'effective dpi', 'crop box',
+            'new width', 'new height', 'source bytes', 'projected bytes'])
+        for result in results:
+            writer.writerow([result.job.imageFrame, result.job.imgFile, result.flag,
+                '' if result.effectiveDpi is None else '%.1f' % result.effectiveDpi,
+                '' if result.box is None else ' '.join(str(v) for v in result.box),
+                result.newSize[0] if result.newSize else '',
+                result.newSize[1] if result.newSize else '',
+                '' if result.sourceBytes is None else result.sourceBytes,
+                '' if result.projectedBytes is None else result.projectedBytes])
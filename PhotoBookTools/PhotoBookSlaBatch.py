@@ -0,0 +1,343 @@
+#! /usr/bin/env python
+#-*- coding: utf-8 -*-
+'''
+VERSION: 1.0 of 2026-10-17
+AUTHOR: Rafferty River.
+LICENSE: GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY.
+
+DESCRIPTION & USAGE:
+This is NOT a Scribus script: run it with Python 3 from the command line,
+e.g. on a build server. It does the work of 'PhotoBookImageCropResize.py'
+on a saved Scribus document (.sla) without running Scribus:
+for all image frames that are not empty, it will crop and resize a COPY
+of the image file and add the suffix "_cropped" to it. Then it writes a
+copy of the document with the frames linked to the "_cropped" files.
+As there, an image at or below the resolution is only cropped, or copied
+as is when shown whole (see PhotoBookCropEngine.choosePath).
+
+    python PhotoBookSlaBatch.py book.sla -o book_cropped.sla --resolution 300
+
+A big book can be split over several machines (sharing the image folders)
+with --shard i/n (i = 1..n); each shard crops the images of 1/n of the
+source files and writes no document. When all shards are done, run once
+more without --shard: every "_cropped" file is then up to date (see
+PhotoBookCropManifest.py), so it only writes the new document.
+
+JPEG files can get explicit encoder settings (--jpeg-quality, --progressive,
+--optimize, --subsampling) and a target size per file (--jpeg-target 800kB,
+or 1.5bpp for bits per pixel), see PhotoBookCropEngine.JpegProfile.
+With --mode CMYK --cmyk-profile FILE.icc the colors are converted with ICC
+profiles (see PhotoBookCropEngine.IccConversion).
+--timing FILE.json (or .csv) writes the time of each stage per image
+(decode, crop, resize, convert, encode, write) and its path, --profile FILE.prof
+profiles the run with cProfile (see PhotoBookTiming.py).
+--preflight crops nothing: from the image file headers only, it prints
+the effective resolution of the frames, the frames that are under-resolved
+or oversized and the projected size of the "_cropped" files (with a file
+name, also one row per frame to that .csv file; see PhotoBookPreflight.py).
+
+IMPORTANT REMARK: this script needs the Pillow (PIL) package
+to be installed in Python (https://python-pillow.org).
+'''
+##################################################
+# imports
+import sys, os, argparse, zlib
+import xml.etree.ElementTree as ET
+from xml.sax import parse as saxParse
+from xml.sax.saxutils import XMLFilterBase, XMLGenerator
+from xml.sax.xmlreader import AttributesImpl
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from PhotoBookCropEngine import CropJob, ImageCache, JpegProfile, IccConversion, \
+    processJobs, parseJpegTarget, pathSummary, RESAMPLE_FILTERS, DEFAULT_CACHE_MB, \
+    DEFAULT_MAX_IMAGE_MB, JPEG_SUBSAMPLING, RENDERING_INTENTS
+from PhotoBookCropManifest import CropManifest, CropOutputs, croppedGeometry, \
+    originalGeometry, linkCounts
+from PhotoBookImageInfo import imageInfo
+from PhotoBookTiming import StageTimer, Profiler
+from PhotoBookPreflight import preflightJobs, preflightSummary, writePreflight
+
+IMAGE_FRAME = '2'    # PTYPE of an image frame
+
+##################################################
+def readImageFrames(slaFile):
+    """ Stream-parse a .sla file and return a list with the attributes
+    (dict) of every PAGEOBJECT image frame with an image, in document order."""
+    frames = []
+    for event, elem in ET.iterparse(slaFile, events=('start', 'end')):
+        if event == 'start':
+            # PAGEOBJECTs may be nested (groups): take the attributes at the start
+            if (elem.tag == 'PAGEOBJECT' and elem.get('PTYPE') == IMAGE_FRAME
+                and elem.get('PFILE')):
+                frames.append(dict(elem.attrib))
+        else:
+            elem.clear()    # keep memory low
+    return frames
+
+def shardOf(path, nbrShards):
+    """ Return the shard (0..nbrShards-1) of a source file. Frames with the
+    same source file are always in the same shard."""
+    return zlib.crc32(os.path.normcase(path).encode('utf-8')) % nbrShards
+
+##################################################
+class SlaPhotoBookImageCropResize:
+    """ PhotoBookImageCropResize for a .sla file, without Scribus."""
+
+    def __init__(self, slaFile, resolution='300', mode='RGB', fileFormat='.jpg',
+        resample='BICUBIC', workers=1, quality='Best', cacheMB=DEFAULT_CACHE_MB,
+        maxImageMB=DEFAULT_MAX_IMAGE_MB, jpeg=None, icc=None):
+        """ Setup basic things """
+        self.slaFile = slaFile
+        self.slaDir = os.path.dirname(os.path.abspath(slaFile))
+        self.resolution = resolution
+        if mode == 'B&W':
+            self.mode = '1'
+        elif mode == 'Grey scale':
+            self.mode = 'L'
+        else:
+            self.mode = mode
+        self.fileFormat = fileFormat
+        self.resample = resample
+        self.workers = max(1, int(workers))
+        self.quality = quality
+        self.manifest = CropManifest()
+        self.cache = ImageCache(int(cacheMB) * 1024 * 1024)
+        self.maxImageMB = int(maxImageMB)
+        self.jpeg = jpeg or JpegProfile()
+        self.icc = icc or IccConversion()
+        self.timer = StageTimer()    # seconds per stage per "_cropped" file
+
+    def imagePath(self, pfile):
+        """ Return the path of a PFILE value (relative to the .sla folder)."""
+        return os.path.normpath(os.path.join(self.slaDir, pfile))
+
+    def createJob(self, index, attrs):
+        """ Return the CropJob of a frame, from its .sla attributes
+        (all in points). A frame showing an up-to-date "_cropped" file is
+        mapped back to the original image."""
+        imgFile = self.imagePath(attrs['PFILE'])
+        frameSizePoints = (float(attrs['WIDTH']), float(attrs['HEIGHT']))
+        frameSizeInches = (frameSizePoints[0] / 72, frameSizePoints[1] / 72)
+        imageOffset = (float(attrs.get('LOCALX', 0)), float(attrs.get('LOCALY', 0)))
+        imageScale = (float(attrs.get('LOCALSCX', 1)), float(attrs.get('LOCALSCY', 1)))
+        entry = self.manifest.originalOf(imgFile)
+        if entry is not None:
+            imgFile = entry['source']
+            imageOffset, imageScale = originalGeometry(entry, imageOffset, imageScale)
+        name,ext = os.path.splitext(imgFile)
+        newImageFile = (name + '_cropped'+ self.fileFormat)
+        return CropJob(index, imgFile, newImageFile, frameSizeInches, frameSizePoints,
+            imageOffset, imageScale, self.resolution, self.mode, self.resample, self.quality,
+            self.maxImageMB, self.jpeg, self.icc)
+
+    def cropImages(self, frames, shard=None):
+        """ Crop and resize the images of the frames (of one shard: (i, n)
+        with i = 0..n-1). Returns (jobs, number of errors)."""
+        jobs = []
+        outputs = {}
+        cropOutputs = CropOutputs(self.manifest, linkCounts(self.imagePath(frame['PFILE'])
+            for frame in frames if frame.get('PFILE')))
+        errors = 0
+        for index in range(len(frames)):
+            try:
+                job = self.createJob(index, frames[index])
+                # each distinct crop of an image gets a "_cropped" file of its own
+                cropOutputs.assign(job, imageInfo(job.imgFile).storedSize(),
+                    self.imagePath(frames[index]['PFILE']))
+            except (KeyError, ValueError, OSError) as err:
+                print('%s: skipped (%s)' % (frames[index].get('PFILE'), err), file=sys.stderr)
+                errors += 1
+                continue
+            jobs.append(job)
+            # frames with the same crop share one "_cropped" file
+            outputs[job.newImageFile] = job
+
+        todo = []
+        for job in outputs.values():
+            if shard is not None and shardOf(job.imgFile, shard[1]) != shard[0]:
+                continue
+            if not self.manifest.isUpToDate(job):
+                todo.append(job)
+
+        done = 0
+        paths = {}
+        try:
+            for job, err in processJobs(todo, self.workers, self.cache):
+                done += 1
+                self.timer.addAll(job.newImageFile, job.timings)
+                if err is None:
+                    self.manifest.record(job)
+                    self.timer.tag(job.newImageFile, 'path', job.path)
+                    paths[job.path] = paths.get(job.path, 0) + 1
+                    print('[%d/%d] %s (%s)' % (done, len(todo), job.newImageFile, job.path))
+                else:
+                    errors += 1
+                    print('[%d/%d] %s: skipped (%s)' % (done, len(todo),
+                        job.imgFile, err), file=sys.stderr)
+        finally:
+            self.manifest.save()
+            self.cache.clear()
+        print(pathSummary(paths))
+        print(self.manifest.sizeSummary(outputs))
+        print(self.cache.summary())
+        return jobs, errors
+
+    def preflight(self, frames, reportFile=None):
+        """ Print what cropImages would do with the frames (see
+        PhotoBookPreflight.py), and write it to a .csv reportFile.
+        Returns the number of frames that are not 'ok'."""
+        jobs = []
+        errors = 0
+        for index in range(len(frames)):
+            try:
+                jobs.append(self.createJob(index, frames[index]))
+            except (KeyError, ValueError) as err:
+                print('%s: skipped (%s)' % (frames[index].get('PFILE'), err), file=sys.stderr)
+                errors += 1
+        results = preflightJobs(jobs)
+        for line in preflightSummary(results, int(self.resolution)):
+            print(line)
+        if reportFile:
+            writePreflight(reportFile, results)
+        return errors + len([result for result in results if result.flag != 'ok'])
+
+    def relinks(self, frames, jobs):
+        """ Return {frame index: new PAGEOBJECT attributes} for the frames
+        whose "_cropped" file is up to date."""
+        relinks = {}
+        for job in jobs:
+            if not self.manifest.isUpToDate(job):
+                continue
+            entry = self.manifest.lookup(job.newImageFile)
+            imageOffset, imageScale = croppedGeometry(entry, job.imageOffset, job.imageScale)
+            if os.path.isabs(frames[job.imageFrame]['PFILE']):
+                pfile = job.newImageFile
+            else:
+                pfile = os.path.relpath(job.newImageFile, self.slaDir).replace(os.sep, '/')
+            relinks[job.imageFrame] = {
+                'PFILE': pfile,
+                'LOCALX': '%.10g' % imageOffset[0],
+                'LOCALY': '%.10g' % imageOffset[1],
+                'LOCALSCX': '%.10g' % imageScale[0],
+                'LOCALSCY': '%.10g' % imageScale[1],
+            }
+        return relinks
+
+    def writeSla(self, newSlaFile, relinks):
+        """ Stream-copy the .sla file to newSlaFile with the relinked frames."""
+        with open(newSlaFile, 'w', encoding='utf-8') as out:
+            saxParse(self.slaFile, _RelinkFilter(XMLGenerator(out, 'utf-8',
+                short_empty_elements=True), relinks))
+
+##################################################
+class _RelinkFilter(XMLFilterBase):
+    """ SAX filter that replaces attributes of image frames (counted in the
+    same order as readImageFrames)."""
+
+    def __init__(self, handler, relinks):
+        XMLFilterBase.__init__(self)
+        self.setContentHandler(handler)
+        self.relinks = relinks
+        self.index = -1
+
+    def startElement(self, name, attrs):
+        if name == 'PAGEOBJECT' and attrs.get('PTYPE') == IMAGE_FRAME and attrs.get('PFILE'):
+            self.index += 1
+            if self.index in self.relinks:
+                newAttrs = dict(attrs.items())
+                newAttrs.update(self.relinks[self.index])
+                attrs = AttributesImpl(newAttrs)
+        XMLFilterBase.startElement(self, name, attrs)
+
+##################################################
+# Start program
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Crop and resize the images of a '
+        'Scribus document (.sla) without Scribus, like PhotoBookImageCropResize.')
+    parser.add_argument('slaFile', help='Scribus document (.sla)')
+    parser.add_argument('-o', '--output', help='new document '
+        '(default: <slaFile>_cropped.sla)')
+    parser.add_argument('--resolution', default='300')
+    parser.add_argument('--mode', default='RGB', choices=['RGB', 'CMYK', 'B&W', 'Grey scale'])
+    parser.add_argument('--format', dest='fileFormat', default='.jpg',
+        choices=['.jpg', '.png', '.tif'])
+    parser.add_argument('--resample', default='BICUBIC', choices=sorted(RESAMPLE_FILTERS))
+    parser.add_argument('--quality', default='Best', choices=['Best', 'Fast'])
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--cache-mb', dest='cacheMB', type=int, default=DEFAULT_CACHE_MB,
+        help='memory for decoded source images (MB)')
+    parser.add_argument('--max-image-mb', dest='maxImageMB', type=int,
+        default=DEFAULT_MAX_IMAGE_MB, help='bigger source images (decoded) take '
+        'the low memory path (MB, 0 = no limit)')
+    parser.add_argument('--jpeg-quality', dest='jpegQuality', type=int, default=75,
+        help='JPEG quality (1-100; the highest with --jpeg-target)')
+    parser.add_argument('--progressive', action='store_true', help='progressive JPEG')
+    parser.add_argument('--optimize', action='store_true', help='optimal JPEG Huffman tables')
+    parser.add_argument('--subsampling', default='Default', choices=list(JPEG_SUBSAMPLING))
+    parser.add_argument('--jpeg-target', dest='jpegTarget', default='',
+        help='target size per JPEG file, e.g. 800kB or 1.5bpp (bits per pixel)')
+    parser.add_argument('--cmyk-profile', dest='cmykProfile', default='',
+        help='ICC profile for --mode CMYK (default: plain conversion)')
+    parser.add_argument('--rgb-profile', dest='rgbProfile', default='',
+        help='ICC profile of RGB images without embedded profile (default: sRGB)')
+    parser.add_argument('--intent', default='Perceptual', choices=list(RENDERING_INTENTS))
+    parser.add_argument('--ignore-embedded', dest='useEmbedded', action='store_false',
+        help='use --rgb-profile also for images with an embedded profile')
+    parser.add_argument('--shard', help='i/n: only crop shard i (1..n) of n, '
+        'do not write the document')
+    parser.add_argument('--preflight', nargs='?', const='', metavar='CSV',
+        help='crop nothing, only report the resolution and projected size per frame '
+        '(also to this .csv file)')
+    parser.add_argument('--timing', help='write the time of each stage per image '
+        'to this .json or .csv file')
+    parser.add_argument('--profile', help='profile the run with cProfile, stats to this file')
+    args = parser.parse_args(argv)
+
+    shard = None
+    if args.shard:
+        try:
+            i, n = [int(v) for v in args.shard.split('/')]
+        except ValueError:
+            parser.error('--shard must be i/n, e.g. 2/4')
+        if not 1 <= i <= n:
+            parser.error('--shard i/n needs 1 <= i <= n')
+        shard = (i - 1, n)
+    if not 1 <= args.jpegQuality <= 100:
+        parser.error('--jpeg-quality must be within 1-100')
+    try:
+        targetKB, targetBpp = parseJpegTarget(args.jpegTarget)
+    except ValueError:
+        parser.error('--jpeg-target must be e.g. 800kB or 1.5bpp')
+    jpeg = JpegProfile(args.jpegQuality, args.progressive, args.optimize, args.subsampling,
+        targetKB, targetBpp)
+    icc = IccConversion(args.cmykProfile, args.rgbProfile, args.intent, args.useEmbedded)
+    try:
+        icc.check()
+    except ValueError as err:
+        parser.error(str(err))
+
+    slpbicr = SlaPhotoBookImageCropResize(args.slaFile, args.resolution, args.mode,
+        args.fileFormat, args.resample, args.workers, args.quality, args.cacheMB,
+        args.maxImageMB, jpeg, icc)
+    timer = slpbicr.timer
+    with Profiler(args.profile):
+        with timer.time('(run)', 'read sla'):
+            frames = readImageFrames(args.slaFile)
+        if args.preflight is not None:
+            return 1 if slpbicr.preflight(frames, args.preflight) else 0
+        jobs, errors = slpbicr.cropImages(frames, shard)
+        if shard is None:
+            newSlaFile = args.output or os.path.splitext(args.slaFile)[0] + '_cropped.sla'
+            with timer.time('(run)', 'write sla'):
+                relinks = slpbicr.relinks(frames, jobs)
+                slpbicr.writeSla(newSlaFile, relinks)
+            print('%s: %d of %d image frames linked to "_cropped" files.'
+                % (newSlaFile, len(relinks), len(jobs)))
+    timer.writeReport(args.timing)
+    return 1 if errors else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
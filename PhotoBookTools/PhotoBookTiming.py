@@ -0,0 +1,192 @@
+#! /usr/bin/env python
+#-*- coding: utf-8 -*-
+'''
+VERSION: 1.0 of 2026-10-17
+AUTHOR: Rafferty River.
+LICENSE: GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY.
+
+DESCRIPTION & USAGE:
+This module times the stages of a run of the PhotoBook Tools per item
+(image frame or page): e.g. decode, crop, resize, convert, encode and
+write of an image, scribus.loadImage, or the time spent in an overwrite
+dialog. It is not a script to run by itself; it does not need Scribus.
+
+The scripts always keep the times (a few clock readings per frame).
+They write a report when the environment variable PHOTOBOOK_TIMING holds
+a file name, e.g. PHOTOBOOK_TIMING=/tmp/book-timing.json (or .csv) when
+starting Scribus:
+- JSON: per stage the total, count, mean, median, 90th and 99th
+  percentile and maximum (seconds), the slowest items and all items;
+- CSV: one row per item with the seconds of each stage and the total.
+Items can have tags besides their times, e.g. the path an image took
+in Crop and Resize (resample, crop or copy): in the items of the JSON
+report, and as columns after the total in the CSV report.
+With PHOTOBOOK_PROFILE=/tmp/book.prof the whole run is profiled with
+cProfile (python -m pstats /tmp/book.prof to read it). Only the Scribus
+process is profiled, not the worker processes of a parallel crop.
+cProfile profiles one thread (up to Python 3.11): a Crop and Resize run
+from the dialog reads and relinks the frames in the Tk thread
+(/tmp/book.prof) and crops in a background thread, profiled to
+/tmp/book-worker.prof. From Python 3.12 on, /tmp/book.prof has both.
+PhotoBookSlaBatch.py has --timing and --profile for the same.
+'''
+##################################################
+# imports
+import os, json, csv, math, time, cProfile
+from collections import OrderedDict
+
+TIMING_ENV = 'PHOTOBOOK_TIMING'
+PROFILE_ENV = 'PHOTOBOOK_PROFILE'
+
+# number of slowest items in the JSON report
+SLOWEST_ITEMS = 10
+
+##################################################
+def percentile(values, part):
+    """ Return the nearest-rank percentile (part 0..1) of sorted values."""
+    if not values:
+        return 0.0
+    rank = min(max(1, int(math.ceil(part * len(values)))), len(values))
+    return values[rank - 1]
+
+class StageTimer:
+    """ Seconds per stage of each item of a run, in the order of first use."""
+
+    def __init__(self):
+        """ Setup basic things """
+        self.items = OrderedDict()    # item -> OrderedDict(stage -> seconds)
+        self.stages = []              # stage names, in the order of first use
+        self.tags = OrderedDict()     # item -> {tag name: text}
+        self.tagNames = []            # tag names, in the order of first use
+
+    def add(self, item, stage, seconds):
+        """ Add seconds to a stage of an item."""
+        stages = self.items.setdefault(str(item), OrderedDict())
+        stages[stage] = stages.get(stage, 0.0) + seconds
+        if stage not in self.stages:
+            self.stages.append(stage)
+
+    def addAll(self, item, timings):
+        """ Add the seconds of several stages ({stage: seconds}) of an item,
+        e.g. measured in a worker process."""
+        for stage, seconds in timings.items():
+            self.add(item, stage, seconds)
+
+    def addSince(self, item, stage, start):
+        """ Add the seconds since start (a time.perf_counter() value) to a
+        stage of an item, unless that stage has a time already (e.g. the
+        time to the first frame done)."""
+        if stage not in self.items.get(str(item), {}):
+            self.add(item, stage, time.perf_counter() - start)
+
+    def tag(self, item, name, value):
+        """ Set a tag (text) of an item."""
+        self.items.setdefault(str(item), OrderedDict())
+        self.tags.setdefault(str(item), {})[name] = value
+        if name not in self.tagNames:
+            self.tagNames.append(name)
+
+    def time(self, item, stage):
+        """ Return a context manager that adds its time to a stage of an item."""
+        return _Stage(self, item, stage)
+
+    def report(self):
+        """ Return the report (dict): totals and percentiles per stage,
+        the slowest items and all items."""
+        stages = OrderedDict()
+        for stage in self.stages:
+            values = sorted(itemStages[stage] for itemStages in self.items.values()
+                if stage in itemStages)
+            total = sum(values)
+            stages[stage] = {
+                'total': total,
+                'count': len(values),
+                'mean': total / len(values) if values else 0.0,
+                'p50': percentile(values, 0.5),
+                'p90': percentile(values, 0.9),
+                'p99': percentile(values, 0.99),
+                'max': values[-1] if values else 0.0,
+            }
+        totals = [(sum(itemStages.values()), item) for item, itemStages in self.items.items()]
+        totals.sort(key=lambda total: -total[0])
+        return {
+            'total': sum(total for total, item in totals),
+            'stages': stages,
+            'slowest': [dict(self.items[item], item=item, total=total,
+                **self.tags.get(item, {})) for total, item in totals[:SLOWEST_ITEMS]],
+            'items': [dict(itemStages, item=item, **self.tags.get(item, {}))
+                for item, itemStages in self.items.items()],
+        }
+
+    def write(self, path):
+        """ Write the report to a .json file or, as one row per item, to a
+        .csv file."""
+        if os.path.splitext(path)[1].lower() == '.csv':
+            with open(path, 'w', newline='') as reportFile:
+                writer = csv.writer(reportFile)
+                writer.writerow(['item'] + self.stages + ['total'] + self.tagNames)
+                for item, stages in self.items.items():
+                    tags = self.tags.get(item, {})
+                    writer.writerow([item] + ['%.6f' % stages.get(stage, 0.0)
+                        for stage in self.stages] + ['%.6f' % sum(stages.values())]
+                        + [tags.get(name, '') for name in self.tagNames])
+        else:
+            with open(path, 'w') as reportFile:
+                json.dump(self.report(), reportFile, indent=1)
+
+    def writeReport(self, path=None):
+        """ Write the report to path, or else to the file named by the
+        environment variable PHOTOBOOK_TIMING (if set). Returns the path
+        written, or None."""
+        path = path or os.environ.get(TIMING_ENV)
+        if path:
+            self.write(path)
+        return path
+
+class _Stage:
+    """ Context manager of StageTimer.time."""
+
+    def __init__(self, timer, item, stage):
+        self.timer = timer
+        self.item = item
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.timer.add(self.item, self.stage, time.perf_counter() - self.start)
+        return False
+
+##################################################
+class Profiler:
+    """ Context manager: run a block under cProfile and dump the stats to
+    path, or else to the file named by the environment variable
+    PHOTOBOOK_PROFILE. Does nothing without a file name."""
+
+    def __init__(self, path=None, part=None):
+        """ Setup basic things (part: e.g. 'worker' for the profile of
+        another thread, dumped to book-worker.prof next to book.prof)"""
+        self.path = path or os.environ.get(PROFILE_ENV)
+        if self.path and part:
+            root, ext = os.path.splitext(self.path)
+            self.path = '%s-%s%s' % (root, part, ext)
+        self.profile = None
+
+    def __enter__(self):
+        if self.path:
+            self.profile = cProfile.Profile()
+            try:
+                self.profile.enable()
+            except ValueError:    # Python 3.12+: the profiler of another thread sees this one
+                self.profile = None
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        if self.profile is not None:
+            self.profile.disable()
+            self.profile.dump_stats(self.path)
+        return False
@@ -0,0 +1,69 @@
+#! /usr/bin/env python
+#-*- coding: utf-8 -*-
+'''
+Synthetic image corpus for the PhotoBook Tools benchmarks.
+
+The images look a bit like photos to the codecs (smooth gradients, fine
+texture, sharp edges), so JPEG/PNG/TIFF decode and encode times are
+realistic. They are made from fixed seeds with Python's random module
+(not Pillow's effect_noise, which uses the C library rand()), so every run
+on every machine draws the same pixels; the encoded files may still differ
+slightly between codec versions. Images already in the corpus folder are
+reused.
+'''
+import os, random
+
+from PIL import Image, ImageDraw, ImageFilter
+
+# width, height in pixels
+CORPUS_SIZES = {
+    'small': (3000, 2000),        # 6 MP
+    'realistic': (6000, 4000),    # 24 MP, a camera original
+}
+CORPUS_FORMATS = ['.jpg', '.png', '.tif']
+
+def noise(width, height, sigma, rng):
+    """ Return an 'L' image of Gaussian noise around 128 (like
+    Image.effect_noise), drawn from rng (a random.Random)."""
+    gauss = rng.gauss
+    return Image.frombytes('L', (width, height), bytes(min(255, max(0, int(gauss(128, sigma))))
+        for n in range(width * height)))
+
+def photo(width, height, seed):
+    """ Return a photo-like RGB image."""
+    rng = random.Random(seed)
+    bands = []
+    for band in range(3):
+        gradient = Image.linear_gradient('L').rotate(rng.uniform(0, 360), expand=False)
+        bands.append(gradient.resize((width, height), Image.BICUBIC))
+    image = Image.merge('RGB', bands)
+    texture = noise(width // 6, height // 6, 48, rng).resize((width, height),
+        Image.BICUBIC).convert('RGB')
+    image = Image.blend(image, texture, 0.3)
+    draw = ImageDraw.Draw(image)
+    for shape in range(40):
+        x0, y0 = rng.randrange(width), rng.randrange(height)
+        x1, y1 = x0 + rng.randrange(width // 4), y0 + rng.randrange(height // 4)
+        color = (rng.randrange(256), rng.randrange(256), rng.randrange(256))
+        if shape % 2:
+            draw.rectangle((x0, y0, x1, y1), fill=color)
+        else:
+            draw.ellipse((x0, y0, x1, y1), fill=color)
+    return image.filter(ImageFilter.GaussianBlur(1.0))
+
+def makeCorpus(folder, size='realistic', fileFormat='.jpg', count=8):
+    """ Return the paths of count corpus images (made if needed)."""
+    width, height = CORPUS_SIZES[size]
+    if not os.path.isdir(folder):
+        os.makedirs(folder)
+    paths = []
+    for i in range(count):
+        path = os.path.join(folder, 'photo_%s_%03d%s' % (size, i, fileFormat))
+        if not os.path.exists(path):
+            image = photo(width, height, seed=i)
+            if fileFormat == '.jpg':
+                image.save(path, quality=92, dpi=(72, 72))
+            else:
+                image.save(path, dpi=(72, 72))
+        paths.append(path)
+    return paths
@@ -0,0 +1,255 @@
+#! /usr/bin/env python
+#-*- coding: utf-8 -*-
+'''
+Benchmarks of the PhotoBook Tools, run outside Scribus with the fake
+'scribus' module in benchmarks/stub.
+
+    python benchmarks/run_benchmarks.py --output before.json
+    (change code, upgrade Pillow, ...)
+    python benchmarks/run_benchmarks.py --output after.json --compare before.json
+
+Scenarios:
+- crop-<format>-<quality>-w<workers>: ScPhotoBookImageCropResize.handleSelection
+  on image frames linked to a synthetic corpus (see corpus.py),
+- crop-shared-...: the same with 2 frames per source image (image cache),
+- fill: PhotoBookFillFramesCentered.py on a selection of image frames,
+- layout: ScPhotoBookLayoutMaker.createLayout on every page.
+
+Every scenario runs in its own Python process, so peak RSS (of the
+scenario process and of its pool workers) is measured per scenario.
+Each one is repeated (--repeat) and the best time is kept; the "_cropped"
+files and the manifests are removed before each repeat, so every repeat
+does the full work. Throughput is given in frames/s and, for cropping, in
+MP/s of source images. The JSON output holds the environment and the
+settings: --compare warns when they differ from the old results.
+'''
+import sys, os, json, time, argparse, platform, subprocess, runpy, resource, glob
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+STUB_DIR = os.path.join(BENCH_DIR, 'stub')
+TOOLS_DIR = os.path.join(os.path.dirname(BENCH_DIR), 'PhotoBookTools')
+DEFAULT_CORPUS = os.path.join(BENCH_DIR, '.corpus')
+
+PAGE_SIZE = (595.28, 841.89)    # A4 in points
+MARGIN = 40.0
+
+##################################################
+# scenarios
+
+def scenarios(args):
+    """ Return the list of scenarios (dicts) for the command line arguments."""
+    workerCounts = [1]
+    if (os.cpu_count() or 1) > 1:
+        workerCounts.append(os.cpu_count())
+    specs = []
+    for fileFormat in ['.jpg', '.png', '.tif']:
+        for quality in ['Best', 'Fast']:
+            for workers in workerCounts:
+                specs.append({'name': 'crop%s-%s-w%d' % (fileFormat.replace('.', '-'),
+                    quality, workers), 'kind': 'crop', 'fileFormat': fileFormat,
+                    'quality': quality, 'workers': workers, 'frames': args.images})
+    specs.append({'name': 'crop-shared-jpg-Best-w1', 'kind': 'crop', 'fileFormat': '.jpg',
+        'quality': 'Best', 'workers': 1, 'frames': 2 * args.images})
+    specs.append({'name': 'fill', 'kind': 'fill', 'fileFormat': '.jpg',
+        'frames': args.fillFrames})
+    specs.append({'name': 'layout', 'kind': 'layout', 'pages': args.layoutPages,
+        'cols': 4, 'rows': 3, 'frames': args.layoutPages * 12})
+    if args.only:
+        specs = [spec for spec in specs if args.only in spec['name']]
+    for spec in specs:
+        spec.update({'size': args.size, 'images': args.images, 'repeat': args.repeat,
+            'corpus': args.corpus})
+    return specs
+
+def addFrames(scribus, paths, nbrFrames):
+    """ Add nbrFrames image frames (4 per page) linked to the corpus images,
+    with different zooms, and select them."""
+    cols, rows = 2, 2
+    width = (PAGE_SIZE[0] - 2 * MARGIN - 10) / cols
+    height = (PAGE_SIZE[1] - 2 * MARGIN - 10) / rows
+    doc = scribus.newDocument((nbrFrames + 3) // 4, pageSize=PAGE_SIZE)
+    for i in range(nbrFrames):
+        col, row = i % cols, (i // cols) % rows
+        item = scribus.addImageFrame(MARGIN + col * (width + 10), MARGIN + row * (height + 10),
+            width, height, paths[i % len(paths)], page=i // 4 + 1, zoom=1.0 + 0.25 * (i % 3))
+        doc.selection.append(item.name)
+    return doc
+
+def cleanCorpus(corpus):
+    """ Remove the outputs of the crop scenarios."""
+    for path in glob.glob(os.path.join(corpus, '*_cropped*.*')):    # also "_cropped2", ...
+        os.remove(path)
+    for path in glob.glob(os.path.join(corpus, 'PhotoBookCropManifest.json*')):
+        os.remove(path)
+
+def runOnce(spec, scribus, paths):
+    """ Run a scenario once. Returns (seconds, megapixels, scribus calls,
+    repaints)."""
+    megapixels = 0.0
+    if spec['kind'] == 'crop':
+        from PhotoBookImageCropResize import ScPhotoBookImageCropResize
+        cleanCorpus(spec['corpus'])
+        doc = addFrames(scribus, paths, spec['frames'])
+        megapixels = sum(doc.items[name].imageSize[0] * doc.items[name].imageSize[1]
+            for name in doc.selection) / 1e6
+        scribus.calls.clear()
+        start = time.perf_counter()
+        ScPhotoBookImageCropResize(quality=spec['quality'],
+            workers=spec['workers']).handleSelection()
+        seconds = time.perf_counter() - start
+        cleanCorpus(spec['corpus'])
+    elif spec['kind'] == 'fill':
+        addFrames(scribus, paths, spec['frames'])
+        scribus.calls.clear()
+        start = time.perf_counter()
+        runpy.run_path(os.path.join(TOOLS_DIR, 'PhotoBookFillFramesCentered.py'),
+            run_name='__main__')
+        seconds = time.perf_counter() - start
+    else:
+        from PhotoBookLayoutMaker import ScPhotoBookLayoutMaker
+        scribus.newDocument(spec['pages'], pageSize=PAGE_SIZE,
+            margins=(MARGIN, MARGIN, MARGIN, MARGIN))
+        start = time.perf_counter()
+        for page in range(1, spec['pages'] + 1):
+            scribus.gotoPage(page)
+            ScPhotoBookLayoutMaker(spec['cols'], spec['rows'], 5.0, 0, 100.0,
+                'Center', 'Center', 5.0, 1, 0).createLayout()
+        seconds = time.perf_counter() - start
+    repaints = scribus.calls.pop('repaint', 0)
+    return seconds, megapixels, sum(scribus.calls.values()), repaints
+
+def peakRssMB(who):
+    """ Peak resident set size in MB (ru_maxrss is in kB, in bytes on macOS)."""
+    maxrss = resource.getrusage(who).ru_maxrss
+    return maxrss / (1024.0 * 1024.0 if sys.platform == 'darwin' else 1024.0)
+
+def runScenario(spec):
+    """ Run a scenario (in this process) and return its result."""
+    sys.path[:0] = [STUB_DIR, TOOLS_DIR]
+    import scribus
+    from corpus import makeCorpus
+    paths = makeCorpus(spec['corpus'], spec['size'], spec['fileFormat'],
+        spec['images']) if 'fileFormat' in spec else []
+    times = []
+    for i in range(spec['repeat']):
+        seconds, megapixels, calls, repaints = runOnce(spec, scribus, paths)
+        times.append(seconds)
+    seconds = min(times)
+    errors = [message for caption, message in scribus.messages
+        if 'skipped' in message or caption.startswith('Error')]
+    return {
+        'name': spec['name'],
+        'frames': spec['frames'],
+        'seconds': seconds,
+        'times': times,
+        'framesPerSecond': spec['frames'] / seconds,
+        'megapixelsPerSecond': megapixels / seconds if megapixels else None,
+        'scribusCalls': calls,
+        'repaints': repaints,
+        'peakRssMB': peakRssMB(resource.RUSAGE_SELF),
+        'peakRssWorkersMB': peakRssMB(resource.RUSAGE_CHILDREN),
+        'errors': errors,
+    }
+
+##################################################
+# results
+
+def environment():
+    """ What the results depend on, besides the code."""
+    try:
+        import PIL
+        pillow = PIL.__version__
+    except ImportError:
+        pillow = None
+    return {
+        'python': platform.python_version(),
+        'pillow': pillow,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpuCount': os.cpu_count(),
+    }
+
+def printResults(results):
+    print('%-26s %7s %9s %9s %9s %9s %9s %9s %9s' % ('scenario', 'frames', 'best s',
+        'frames/s', 'MP/s', 'RSS MB', 'wrk MB', 'calls', 'repaints'))
+    for result in results:
+        mps = result['megapixelsPerSecond']
+        print('%-26s %7d %9.3f %9.2f %9s %9.0f %9.0f %9d %9d' % (result['name'],
+            result['frames'], result['seconds'], result['framesPerSecond'],
+            '-' if mps is None else '%.1f' % mps, result['peakRssMB'],
+            result['peakRssWorkersMB'], result['scribusCalls'], result['repaints']))
+        for error in result['errors']:
+            print('    ' + error.replace('\n', '\n    '))
+
+def compare(results, oldFile):
+    """ Print the speed and memory of the results relative to old results."""
+    with open(oldFile, 'r') as f:
+        old = json.load(f)
+    for key in ['environment', 'settings']:
+        for name, value in results[key].items():
+            if old.get(key, {}).get(name) != value:
+                print('Warning: %s %s differs: %r (old %r)' % (key, name,
+                    value, old.get(key, {}).get(name)))
+    oldResults = dict((result['name'], result) for result in old['results'])
+    print('%-26s %12s %12s' % ('scenario', 'speed', 'RSS'))
+    for result in results['results']:
+        oldResult = oldResults.get(result['name'])
+        if oldResult is None:
+            continue
+        print('%-26s %11.2fx %+10.0fMB' % (result['name'],
+            result['framesPerSecond'] / oldResult['framesPerSecond'],
+            result['peakRssMB'] - oldResult['peakRssMB']))
+
+##################################################
+# Start program
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks of the PhotoBook Tools '
+        'with a fake scribus module.')
+    parser.add_argument('--size', default='realistic', choices=['small', 'realistic'],
+        help='corpus image size (small = 6 MP, realistic = 24 MP)')
+    parser.add_argument('--images', type=int, default=8, help='corpus images per format')
+    parser.add_argument('--fill-frames', dest='fillFrames', type=int, default=1000)
+    parser.add_argument('--layout-pages', dest='layoutPages', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--only', help='only the scenarios with this in their name')
+    parser.add_argument('--corpus', default=DEFAULT_CORPUS, help='corpus folder')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--compare', help='compare with the results in this JSON file')
+    parser.add_argument('--scenario', help=argparse.SUPPRESS)    # internal: run one scenario
+    args = parser.parse_args(argv)
+
+    if args.scenario:
+        print(json.dumps(runScenario(json.loads(args.scenario))))
+        return 0
+
+    # make the corpus first: its memory is not part of any scenario
+    from corpus import makeCorpus
+    specs = scenarios(args)
+    for fileFormat in sorted(set(spec['fileFormat'] for spec in specs if 'fileFormat' in spec)):
+        print('corpus %s ...' % fileFormat, file=sys.stderr)
+        makeCorpus(args.corpus, args.size, fileFormat, args.images)
+
+    results = []
+    for spec in specs:
+        print('%s ...' % spec['name'], file=sys.stderr)
+        output = subprocess.check_output([sys.executable, os.path.abspath(__file__),
+            '--scenario', json.dumps(spec)], cwd=BENCH_DIR)
+        results.append(json.loads(output.decode('utf-8').splitlines()[-1]))
+    results = {
+        'environment': environment(),
+        'settings': {'size': args.size, 'images': args.images, 'fillFrames': args.fillFrames,
+            'layoutPages': args.layoutPages, 'repeat': args.repeat},
+        'results': results,
+    }
+    printResults(results['results'])
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=1)
+    if args.compare:
+        compare(results, args.compare)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
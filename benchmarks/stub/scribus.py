@@ -0,0 +1,373 @@
+#! /usr/bin/env python
+#-*- coding: utf-8 -*-
+'''
+Fake 'scribus' module for running the PhotoBook Tools outside Scribus
+(benchmarks). Put this folder first on sys.path, then import or run the
+scripts as usual.
+
+It keeps a small document model: pages with margins and items (image
+frames, text frames, groups) with position and size in points, image
+file, image scale and offset. Only the calls used by the PhotoBook Tools
+are there; every call is counted in 'calls'. Dialogs return OK/Yes.
+
+Repaints are not simulated, only counted in 'calls["repaint"]': every
+call that changes the document while redraw is on (setRedraw) counts one,
+like redrawAll.
+
+Image frame geometry follows Scribus:
+- getProperty(item, 'imageXScale') is points per image pixel
+  (= user scale * 72 / image dpi), getImageScale() the user scale,
+- the image offset is kept in image pixels; setImageOffset() takes it
+  in document units.
+'''
+import sys, os
+from collections import Counter
+
+scribus = sys.modules[__name__]    # scripts call scribus.xxx after 'from scribus import *'
+
+# units
+UNIT_POINTS, UNIT_MILLIMETERS, UNIT_INCHES, UNIT_PICAS, UNIT_CENTIMETRES, UNIT_CICERO = range(6)
+pt, mm, inch, p, cm, c = 1.0, 25.4 / 72, 1 / 72, 1 / 12, 2.54 / 72, 1 / 12.840712
+_UNIT_FACTOR = [pt, mm, inch, p, cm, c]    # document units per point
+
+# dialogs
+ICON_NONE, ICON_INFORMATION, ICON_WARNING, ICON_CRITICAL = 0, 1, 2, 4
+BUTTON_NONE, BUTTON_OK, BUTTON_CANCEL, BUTTON_YES, BUTTON_NO = 0, 1024, 4194304, 16384, 65536
+ALIGN_LEFT, ALIGN_CENTERED, ALIGN_RIGHT = 0, 1, 2
+ALIGNV_TOP, ALIGNV_CENTERED, ALIGNV_BOTTOM = 0, 1, 2
+
+calls = Counter()
+# calls that change the document (and repaint it if redraw is on)
+_CHANGING = set(['loadImage', 'setImageScale', 'setImageOffset', 'setScaleImageToFrame',
+    'createImage', 'createText', 'deleteObject', 'setText', 'setFillColor',
+    'setCustomLineStyle', 'setParagraphStyle', 'setTextVerticalAlignment', 'selectObject',
+    'docChanged'])
+messages = []    # (caption, message) of every message box
+
+##################################################
+# document model
+
+class Item:
+    """ A page item."""
+
+    def __init__(self, name, objectType, x, y, width, height, page):
+        self.name = name
+        self.objectType = objectType
+        self.x, self.y, self.width, self.height = x, y, width, height
+        self.page = page
+        self.imageFile = ''
+        self.imageSize = (0, 0)    # pixels
+        self.dpi = 72.0
+        self.imageXScale = self.imageYScale = 1.0      # points per pixel
+        self.imageXOffset = self.imageYOffset = 0.0    # pixels
+        self.items = []    # group members
+        self.text = ''
+
+class Document:
+    """ Pages and items of the fake document."""
+
+    def __init__(self, nbrPages=1, pageSize=(595.28, 841.89), margins=(40, 40, 40, 40)):
+        self.pageSize = pageSize
+        self.margins = margins    # top, left, right, bottom
+        self.pages = [[] for i in range(nbrPages)]
+        self.items = {}
+        self.currentPage = 1
+        self.selection = []
+        self.unit = UNIT_POINTS
+        self.redraw = True
+        self.counter = 0
+        self.docName = ''    # not saved
+
+    def newName(self, prefix):
+        self.counter += 1
+        return '%s%d' % (prefix, self.counter)
+
+    def addItem(self, objectType, x, y, width, height, name=None, page=None):
+        name = name or self.newName(objectType)
+        item = Item(name, objectType, x, y, width, height, page or self.currentPage)
+        self.items[name] = item
+        self.pages[item.page - 1].append(name)
+        return item
+
+doc = None
+
+def newDocument(nbrPages=1, **kw):
+    """ Start a new fake document (the benchmark's setup)."""
+    global doc
+    doc = Document(nbrPages, **kw)
+    calls.clear()
+    del messages[:]
+    return doc
+
+def addImageFrame(x, y, width, height, imageFile='', page=None, name=None, zoom=1.0):
+    """ Add an image frame (in points) and load an image, scaled to fill
+    the frame (like PhotoBookFillFramesCentered) times zoom, centered."""
+    item = doc.addItem('ImageFrame', x, y, width, height, name, page)
+    if imageFile:
+        _loadImage(item, imageFile)
+        imageWidth, imageHeight = item.imageSize
+        scale = max(width / imageWidth, height / imageHeight) * zoom
+        item.imageXScale = item.imageYScale = scale
+        item.imageXOffset = (width / scale - imageWidth) / 2
+        item.imageYOffset = (height / scale - imageHeight) / 2
+    return item
+
+def _item(name=None):
+    if name is None or name == '':
+        if not doc.selection:
+            raise NoValidObjectError('No item selected.')
+        name = doc.selection[0]
+    try:
+        return doc.items[name]
+    except KeyError:
+        raise NoValidObjectError('Object not found: %s' % name)
+
+def _loadImage(item, imageFile):
+    from PIL import Image
+    with Image.open(imageFile) as image:
+        item.imageSize = image.size
+        item.dpi = float(image.info.get('dpi', (72, 72))[0]) or 72.0
+    item.imageFile = os.path.abspath(imageFile)
+    item.imageXScale = item.imageYScale = 72.0 / item.dpi
+    item.imageXOffset = item.imageYOffset = 0.0
+
+def _toPoints(value):
+    return value / _UNIT_FACTOR[doc.unit]
+
+def _fromPoints(value):
+    return value * _UNIT_FACTOR[doc.unit]
+
+class NoValidObjectError(Exception):
+    pass
+
+def _counted(function):
+    def wrapper(*args, **kw):
+        calls[function.__name__] += 1
+        if function.__name__ in _CHANGING and doc is not None and doc.redraw:
+            calls['repaint'] += 1
+        return function(*args, **kw)
+    wrapper.__name__ = function.__name__
+    return wrapper
+
+##################################################
+# scripter API (subset)
+
+@_counted
+def haveDoc():
+    return 1 if doc is not None else 0
+
+@_counted
+def getDocName():
+    return doc.docName
+
+@_counted
+def getUnit():
+    return doc.unit
+
+@_counted
+def setUnit(unit):
+    doc.unit = unit
+
+@_counted
+def pageCount():
+    return len(doc.pages)
+
+@_counted
+def currentPage():
+    return doc.currentPage
+
+@_counted
+def newPage(where, masterpage=None):
+    if where == -1:
+        doc.pages.append([])
+    else:    # page numbers of the items after it are not updated (not needed)
+        doc.pages.insert(where - 1, [])
+
+@_counted
+def gotoPage(page):
+    doc.currentPage = page
+
+@_counted
+def getPageItems():
+    types = {'ImageFrame': 2, 'TextFrame': 4, 'Group': 12}
+    return [(name, types.get(doc.items[name].objectType, 0), i)
+        for i, name in enumerate(doc.pages[doc.currentPage - 1])]
+
+@_counted
+def getPageNSize(page):
+    return tuple(_fromPoints(v) for v in doc.pageSize)
+
+@_counted
+def getPageNMargins(page):
+    return tuple(_fromPoints(v) for v in doc.margins)
+
+@_counted
+def getGroupItems(name=None, recursive=False, type=0):
+    return [(member, 0, i) for i, member in enumerate(_item(name).items)]
+
+@_counted
+def selectionCount():
+    return len(doc.selection)
+
+@_counted
+def getSelectedObject(nr=0):
+    return doc.selection[nr]
+
+@_counted
+def selectObject(name):
+    doc.selection.append(_item(name).name)
+
+@_counted
+def deselectAll():
+    doc.selection = []
+
+@_counted
+def getObjectType(name=None):
+    return _item(name).objectType
+
+@_counted
+def getPosition(name=None):
+    item = _item(name)
+    return (_fromPoints(item.x), _fromPoints(item.y))
+
+@_counted
+def getSize(name=None):
+    item = _item(name)
+    return (_fromPoints(item.width), _fromPoints(item.height))
+
+@_counted
+def getImageFile(name=None):
+    return _item(name).imageFile
+
+@_counted
+def loadImage(imageFile, name=None):
+    _loadImage(_item(name), imageFile)
+
+@_counted
+def getProperty(name, propertyName):
+    return getattr(_item(name), propertyName)
+
+@_counted
+def getImageScale(name=None):
+    item = _item(name)
+    return (item.imageXScale * item.dpi / 72.0, item.imageYScale * item.dpi / 72.0)
+
+@_counted
+def setImageScale(x, y, name=None):
+    item = _item(name)
+    item.imageXScale = x * 72.0 / item.dpi
+    item.imageYScale = y * 72.0 / item.dpi
+
+@_counted
+def getImageOffset(name=None):
+    item = _item(name)
+    return (_fromPoints(item.imageXOffset * item.imageXScale),
+        _fromPoints(item.imageYOffset * item.imageYScale))
+
+@_counted
+def setImageOffset(x, y, name=None):
+    item = _item(name)
+    item.imageXOffset = _toPoints(x) / item.imageXScale
+    item.imageYOffset = _toPoints(y) / item.imageYScale
+
+@_counted
+def setScaleImageToFrame(scaletoframe, proportional=None, name=None):
+    item = _item(name)
+    if scaletoframe and item.imageSize[0]:
+        scaleX = item.width / item.imageSize[0]
+        scaleY = item.height / item.imageSize[1]
+        if proportional:
+            scaleX = scaleY = min(scaleX, scaleY)
+        item.imageXScale, item.imageYScale = scaleX, scaleY
+        item.imageXOffset = item.imageYOffset = 0.0
+
+@_counted
+def createImage(x, y, width, height, name=''):
+    return doc.addItem('ImageFrame', _toPoints(x), _toPoints(y),
+        _toPoints(width), _toPoints(height), name or None).name
+
+@_counted
+def createText(x, y, width, height, name=''):
+    return doc.addItem('TextFrame', _toPoints(x), _toPoints(y),
+        _toPoints(width), _toPoints(height), name or None).name
+
+@_counted
+def deleteObject(name=None):
+    item = doc.items.pop(_item(name).name)
+    doc.pages[item.page - 1].remove(item.name)
+    if item.name in doc.selection:
+        doc.selection.remove(item.name)
+
+@_counted
+def setText(text, name=None):
+    _item(name).text = text
+
+@_counted
+def setFillColor(color, name=None):
+    _item(name)
+
+@_counted
+def setCustomLineStyle(style, name=None):
+    _item(name)
+
+@_counted
+def setParagraphStyle(style, name=None):
+    _item(name)
+
+@_counted
+def setTextVerticalAlignment(align, name=None):
+    _item(name)
+
+@_counted
+def defineColorCMYK(name, c, m, y, k):
+    pass
+
+@_counted
+def createCustomLineStyle(name, style):
+    pass
+
+@_counted
+def createCharStyle(name, **kw):
+    pass
+
+@_counted
+def createParagraphStyle(name, **kw):
+    pass
+
+@_counted
+def docChanged(changed):
+    pass
+
+@_counted
+def setRedraw(redraw):
+    doc.redraw = bool(redraw)
+
+@_counted
+def redrawAll():
+    calls['repaint'] += 1
+
+@_counted
+def messageBox(caption, message, icon=ICON_NONE, button1=BUTTON_OK, button2=BUTTON_NONE,
+    button3=BUTTON_NONE):
+    messages.append((caption, message))
+    return button1
+
+@_counted
+def valueDialog(caption, message, defaultValue=''):
+    return defaultValue
+
+@_counted
+def statusMessage(message):
+    pass
+
+@_counted
+def progressTotal(total):
+    pass
+
+@_counted
+def progressSet(value):
+    pass
+
+@_counted
+def progressReset():
+    pass
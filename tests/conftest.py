@@ -0,0 +1,6 @@
+# The PhotoBook Tools are scripts in one folder, not a package: their
+# Scribus-free modules are imported from there.
+import os, sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'PhotoBookTools'))
@@ -0,0 +1,24 @@
+import os, sys
+
+import pytest
+
+# PhotoBookCommon imports scribus: use the fake one of the benchmarks
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'benchmarks', 'stub'))
+
+from PhotoBookCommon import parsePageRange
+
+
+def test_page_ranges():
+    assert parsePageRange('all', 4) == [1, 2, 3, 4]
+    assert parsePageRange('', 2) == [1, 2]
+    assert parsePageRange('3', 5) == [3]
+    assert parsePageRange('2-4', 5) == [2, 3, 4]
+    # in the order given, each page once
+    assert parsePageRange('4, 1-2, 2-3', 5) == [4, 1, 2, 3]
+
+
+@pytest.mark.parametrize('text', ['0', '6', '4-2', '3-6', 'x', '1-', '2,,3'])
+def test_bad_page_ranges(text):
+    with pytest.raises(ValueError):
+        parsePageRange(text, 5)
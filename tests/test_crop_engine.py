@@ -0,0 +1,330 @@
+import hashlib, itertools, os, random, struct, subprocess, sys, threading
+
+import pytest
+
+Image = pytest.importorskip('PIL.Image')
+
+from PhotoBookCropEngine import CropJob, JpegProfile, cropBox, targetSize, outputSize, \
+    choosePath, cropResizeFast, cropResizeLowMemory, streamCropResize, parseJpegTarget, \
+    encodeJpeg, encodeToTarget, ImageCache, groupBySource, processJobs, IccConversion, \
+    colorTransform, convertToCmyk, PATH_RESAMPLE, PATH_CROP, PATH_COPY, EXIF_ORIENTATION, \
+    JPEG_MIN_TARGET_QUALITY
+import PhotoBookCropEngine
+
+
+def test_pillow_is_imported_on_first_use():
+    tools = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        'PhotoBookTools')
+    code = ("import sys; sys.path.insert(0, %r); import PhotoBookCropEngine; "
+        "print('PIL' in sys.modules)" % tools)
+    output = subprocess.check_output([sys.executable, '-c', code])
+    assert output.split() == [b'False']
+
+
+def test_crop_box_of_a_zoomed_view():
+    # 1000x800 image at 0.5 pt per pixel, shifted 100 px left and 50 px up
+    box = cropBox((1000, 800), (200, 150), (-100, -50), (0.5, 0.5))
+    assert box == (100, 50, 500, 350)
+
+
+def test_crop_box_is_limited_to_the_image():
+    # image moved into the frame: nothing left of or above the image
+    assert cropBox((400, 300), (300, 300), (20, 10), (0.5, 0.5)) == (0, 0, 400, 300)
+    # frame bigger than the image to the right and below
+    assert cropBox((400, 300), (300, 300), (-100, -100), (0.5, 0.5)) == (100, 100, 400, 300)
+
+
+def test_target_size_keeps_the_proportions_of_the_box():
+    # 2 x 1 inch frame at 300 dpi
+    assert targetSize((0, 0, 1000, 500), (2.0, 1.0), 300) == (600, 300)
+    # box of another shape than the frame: the larger of both scales
+    assert targetSize((0, 0, 500, 500), (2.0, 1.0), 300) == (600, 600)
+
+
+def test_output_size_never_enlarges():
+    # 2 x 1 inch frame at 300 dpi needs 600 x 300 pixels
+    assert outputSize((0, 0, 1200, 600), (2.0, 1.0), 300) == (600, 300)
+    assert outputSize((100, 50, 700, 350), (2.0, 1.0), 300) == (600, 300)
+    assert outputSize((0, 0, 400, 200), (2.0, 1.0), 300) == (400, 200)
+
+
+@pytest.fixture
+def photo(tmp_path):
+    path = str(tmp_path / 'photo.jpg')
+    Image.new('RGB', (400, 300), (200, 100, 50)).save(path)
+    return path
+
+
+def pathOf(imgFile, box, newSize, newImageFile='photo_cropped.jpg', mode='RGB', jpeg=None):
+    job = CropJob('Frame', imgFile, newImageFile, (4.0, 3.0), (288, 216), (0, 0), (0.72, 0.72),
+        mode=mode, jpeg=jpeg)
+    job.box, job.newSize = box, newSize
+    with Image.open(imgFile) as image:
+        return choosePath(job, image)
+
+
+def test_choose_path(photo):
+    whole = (0, 0, 400, 300)
+    assert pathOf(photo, whole, (200, 150)) == PATH_RESAMPLE
+    assert pathOf(photo, whole, (400, 300)) == PATH_COPY
+    assert pathOf(photo, (0, 0, 200, 300), (200, 300)) == PATH_CROP
+    assert pathOf(photo, whole, (400, 300), 'photo_cropped.png') == PATH_CROP
+    assert pathOf(photo, whole, (400, 300), mode='L') == PATH_CROP
+    assert pathOf(photo, whole, (400, 300), jpeg=JpegProfile(targetKB=100)) == PATH_CROP
+
+
+def test_choose_path_does_not_copy_a_rotated_image(tmp_path):
+    path = str(tmp_path / 'rotated.jpg')
+    exif = Image.Exif()
+    exif[EXIF_ORIENTATION] = 6
+    Image.new('RGB', (400, 300)).save(path, exif=exif)
+    assert pathOf(path, (0, 0, 400, 300), (400, 300)) == PATH_CROP
+
+
+def test_fast_path_is_close_to_the_best_path(tmp_path):
+    width, height = 1200, 800
+    gradient = Image.linear_gradient('L').resize((width, height))
+    image = Image.merge('RGB', (gradient, gradient.transpose(Image.FLIP_LEFT_RIGHT),
+        gradient.transpose(Image.FLIP_TOP_BOTTOM)))
+    path = tmp_path / 'source.jpg'
+    image.save(path, quality=95)
+    box, newSize = (100, 50, 1100, 750), (250, 175)
+
+    with Image.open(path) as source:
+        best = source.crop(box).resize(newSize, Image.BICUBIC)
+    with Image.open(path) as source:
+        fast = cropResizeFast(source, box, newSize, Image.BICUBIC, 'RGB')
+    assert fast.size == newSize
+    difference = [abs(a - b) for a, b in zip(best.tobytes(), fast.tobytes())]
+    assert sum(difference) / len(difference) < 1.0
+    assert max(difference) <= 12
+
+
+@pytest.fixture
+def noiseTiff(tmp_path):
+    rnd = random.Random(7)
+    width, height = 300, 1200
+    image = Image.frombytes('RGB', (width, height),
+        bytes(rnd.randrange(256) for n in range(width * height * 3)))
+    path = str(tmp_path / 'noise.tif')
+    image.save(path)    # uncompressed: row addressable
+    return image, path
+
+
+@pytest.mark.parametrize('resample', [Image.BILINEAR, Image.BICUBIC, Image.LANCZOS])
+def test_low_memory_paths_match_a_full_decode(noiseTiff, resample):
+    image, path = noiseTiff
+    box, newSize = (10, 35, 290, 1180), (100, 410)
+    full = image.crop(box).resize(newSize, resample)
+
+    # only the rows of the crop: exact
+    with Image.open(path) as source:
+        rows = cropResizeLowMemory(path, source, box, newSize, resample, 'RGB', 10 ** 9)
+    assert rows.tobytes() == full.tobytes()
+
+    # in bands of about 50 kB: at most 1 level off
+    streamed = streamCropResize(path, box, newSize, resample, 50000)
+    assert streamed.size == newSize
+    assert max(abs(a - b) for a, b in zip(full.tobytes(), streamed.tobytes())) <= 1
+
+
+def test_jpeg_targets():
+    assert parseJpegTarget('') == (0, 0.0)
+    assert parseJpegTarget('0') == (0, 0.0)
+    assert parseJpegTarget('800kB') == (800, 0.0)
+    assert parseJpegTarget(' 120 K ') == (120, 0.0)
+    assert parseJpegTarget('500') == (500, 0.0)
+    assert parseJpegTarget('1.5bpp') == (0, 1.5)
+    assert JpegProfile(targetKB=800).targetBytes((100, 100)) == 800 * 1024
+    assert JpegProfile(targetBpp=2.0).targetBytes((100, 50)) == 1250
+
+
+@pytest.mark.parametrize('text', ['x', '1.5kB', '-3kB', '0bpp', '25bpp', 'bpp', '800MB'])
+def test_bad_jpeg_targets(text):
+    with pytest.raises(ValueError):
+        parseJpegTarget(text)
+
+
+def test_jpeg_options_keep_a_quality_given():
+    profile = JpegProfile(90, subsampling='4:2:0')
+    assert profile.options() == {'quality': 90, 'progressive': False, 'optimize': False,
+        'subsampling': 2}
+    assert profile.options(40)['quality'] == 40
+    assert profile.options(0)['quality'] == 0
+
+
+@pytest.fixture
+def noise():
+    rnd = random.Random(3)
+    image = Image.frombytes('L', (40, 30), bytes(rnd.randrange(256) for n in range(1200)))
+    return image.resize((400, 300), Image.BICUBIC).convert('RGB')
+
+
+def qualityOf(data, image, profile):
+    for quality in range(1, profile.quality + 1):
+        if encodeJpeg(image, profile.options(quality), {}) == data:
+            return quality
+
+
+def test_encode_to_target_fits_the_target(noise):
+    profile = JpegProfile(95)
+    targetBytes = len(encodeJpeg(noise, profile.options(70), {})) + 100
+    data = encodeToTarget(noise, profile, targetBytes, {})
+    assert len(data) <= targetBytes
+    # the highest quality that fits
+    quality = qualityOf(data, noise, profile)
+    assert quality >= 70
+    assert len(encodeJpeg(noise, profile.options(quality + 1), {})) > targetBytes
+
+
+def test_encode_to_target_never_goes_below_the_lowest_quality(noise):
+    profile = JpegProfile(95)
+    data = encodeToTarget(noise, profile, 1000, {})
+    assert len(data) > 1000
+    assert qualityOf(data, noise, profile) == JPEG_MIN_TARGET_QUALITY
+
+
+def grey(size):
+    return Image.new('L', size, 128)
+
+
+def test_image_cache_evicts_the_least_recently_used():
+    cache = ImageCache(25000)    # room for two 100x100 grey images
+    assert cache.put('a.jpg', grey((100, 100)))
+    assert cache.put('b.jpg', grey((100, 100)))
+    assert cache.get('a.jpg') is not None
+    assert cache.put('c.jpg', grey((100, 100)))    # b is the least recently used
+    assert cache.get('b.jpg') is None
+    assert cache.get('a.jpg') is not None and cache.get('c.jpg') is not None
+    assert cache.nbytes == 20000
+    assert cache.stats() == (3, 1, 1)
+    assert cache.summary() == 'Image cache: 3 hit(s), 1 miss(es), 1 eviction(s).'
+
+
+def test_image_cache_keeps_to_its_budget():
+    cache = ImageCache(25000)
+    assert not cache.put('big.jpg', grey((200, 200)))    # bigger than the budget
+    assert cache.get('big.jpg') is None
+    assert cache.put('a.jpg', grey((100, 100)))
+    assert cache.put('a.jpg', grey((100, 100)))    # replaced, not counted twice
+    assert cache.nbytes == 10000
+    assert cache.put('rgb.jpg', Image.new('RGB', (50, 60)))    # 4 bytes per pixel
+    assert cache.nbytes == 22000
+    assert cache.put('b.jpg', grey((100, 100)))
+    assert cache.nbytes <= 25000 and cache.evictions == 1
+    cache.clear()
+    assert cache.nbytes == 0 and cache.get('b.jpg') is None
+
+
+def makeJobs(folder, sources, frames, outputFolder=None):
+    """ CropJobs of frames [(source index, imageOffset)], 100x75 pt, in
+    outputFolder (default: the folder of the sources)."""
+    outputFolder = outputFolder or folder
+    paths = []
+    for n, color in enumerate(sources):
+        path = os.path.join(folder, 'source%d.jpg' % n)
+        if not os.path.exists(path):
+            Image.new('RGB', (800, 600), color).save(path)
+        paths.append(path)
+    return [CropJob('Frame%d' % n, paths[source],
+        os.path.join(outputFolder, 'crop%d.jpg' % n), (100 / 72.0, 75 / 72.0), (100, 75),
+        offset, (0.25, 0.25), 150) for n, (source, offset) in enumerate(frames)]
+
+
+def test_jobs_of_a_source_are_grouped(tmp_path):
+    jobs = makeJobs(str(tmp_path), [(200, 0, 0), (0, 200, 0)],
+        [(0, (0, 0)), (1, (0, 0)), (0, (-200, -100))])
+    assert groupBySource(jobs) == [[jobs[0], jobs[2]], [jobs[1]]]
+    cache = ImageCache()
+    results = list(processJobs(jobs, cache=cache))
+    # the source of two frames is decoded once
+    assert [job.imageFrame for job, err in results] == ['Frame0', 'Frame2', 'Frame1']
+    assert all(err is None for job, err in results)
+    assert cache.stats() == (1, 2, 0)
+
+
+def md5s(folder):
+    return dict((name, hashlib.md5(open(os.path.join(folder, name), 'rb').read()).hexdigest())
+        for name in os.listdir(folder))
+
+
+def test_parallel_workers_write_the_same_files(tmp_path):
+    sources = [(200, 0, 0), (0, 200, 0), (0, 0, 200), (100, 100, 0)]
+    frames = [(n % 4, (-40.0 * n, -20.0 * n)) for n in range(8)]
+    for workers in (1, 3):
+        os.mkdir(str(tmp_path / str(workers)))
+        jobs = makeJobs(str(tmp_path), sources, frames, str(tmp_path / str(workers)))
+        results = list(processJobs(jobs, workers, ImageCache()))
+        assert sorted(job.imageFrame for job, err in results if err is None) == \
+            sorted(job.imageFrame for job in jobs)
+    assert md5s(str(tmp_path / '1')) == md5s(str(tmp_path / '3'))
+    assert len(md5s(str(tmp_path / '1'))) == 8
+
+
+def test_cancel_stops_the_run(tmp_path):
+    jobs = makeJobs(str(tmp_path), [(200, 0, 0), (0, 200, 0)],
+        [(n % 2, (-10.0 * n, 0)) for n in range(6)])
+    cancel = threading.Event()
+    results = []
+    for result in processJobs(jobs, cancel=cancel):
+        results.append(result)
+        cancel.set()    # Stop pressed after the first frame
+    assert len(results) == 1
+    assert sorted(os.listdir(str(tmp_path))) == ['crop0.jpg', 'source0.jpg', 'source1.jpg']
+    assert list(processJobs(jobs, cancel=cancel)) == []
+
+
+def writeCmykProfile(path):
+    """ Write a crude CMYK printer profile: grey only (K = 1 - L), enough
+    for LittleCMS to build transforms (Pillow has no CMYK profile)."""
+    def lut16(inputs, outputs, table):
+        data = b'mft2' + bytes(4) + bytes([inputs, outputs, 2, 0])
+        data += struct.pack('>9i', 65536, 0, 0, 0, 65536, 0, 0, 0, 65536)
+        data += struct.pack('>HH', 2, 2) + struct.pack('>%dH' % (2 * inputs), *[0, 65535] * inputs)
+        for corner in itertools.product((0, 1), repeat=inputs):
+            data += struct.pack('>%dH' % outputs, *table(corner))
+        return data + struct.pack('>%dH' % (2 * outputs), *[0, 65535] * outputs)
+    whitePoint = struct.pack('>3i', 63190, 65536, 54061)    # D50
+    text = b'Grey CMYK\0'
+    tags = [(b'desc', b'desc' + bytes(4) + struct.pack('>I', len(text)) + text + bytes(78)),
+        (b'wtpt', b'XYZ ' + bytes(4) + whitePoint),
+        (b'A2B0', lut16(4, 3, lambda cmyk: (0xFF00 * (1 - cmyk[3]), 0x8000, 0x8000))),
+        (b'B2A0', lut16(3, 4, lambda lab: (0, 0, 0, 65535 * (1 - lab[0]))))]
+    table, body = struct.pack('>I', len(tags)), b''
+    offset = 128 + 4 + 12 * len(tags)
+    for signature, data in tags:
+        body += bytes(-len(body) % 4)
+        table += signature + struct.pack('>II', offset + len(body), len(data))
+        body += data
+    header = (struct.pack('>I', 128 + len(table) + len(body)) + b'none' + bytes([2, 0x10, 0, 0])
+        + b'prtrCMYKLab ' + bytes(12) + b'acsp' + bytes(24) + struct.pack('>I', 0)
+        + whitePoint + bytes(48))
+    assert len(header) == 128
+    with open(path, 'wb') as profileFile:
+        profileFile.write(header + table + body)
+    return path
+
+
+def test_icc_conversion_to_cmyk(tmp_path, monkeypatch):
+    ImageCms = pytest.importorskip('PIL.ImageCms')
+    monkeypatch.setattr(PhotoBookCropEngine, '_transforms', {})
+    icc = IccConversion(writeCmykProfile(str(tmp_path / 'grey.icc')))
+    icc.check()
+    image = Image.new('RGB', (30, 20), (255, 255, 255))
+    image.paste((0, 0, 0), (0, 0, 10, 20))
+    # the embedded profile: Pillow's sRGB
+    sRGB = ImageCms.ImageCmsProfile(ImageCms.createProfile('sRGB')).tobytes()
+    cmyk = convertToCmyk(image, icc, sRGB)
+    assert cmyk.mode == 'CMYK' and cmyk.size == (30, 20)
+    assert cmyk.getpixel((0, 0))[3] > 240 and cmyk.getpixel((29, 0)) == (0, 0, 0, 0)
+    assert convertToCmyk(image.convert('L'), icc).mode == 'CMYK'
+    assert len(PhotoBookCropEngine._transforms) == 2    # embedded and 'sRGB'
+
+    # the next conversions reuse the transforms
+    def buildTransform(*args):
+        raise AssertionError('transform built again')
+    monkeypatch.setattr(ImageCms, 'buildTransform', buildTransform)
+    transform = colorTransform(icc, sRGB)
+    assert colorTransform(icc, sRGB) is transform
+    assert colorTransform(icc) is not transform
+    assert convertToCmyk(image, icc, sRGB).tobytes() == cmyk.tobytes()
@@ -0,0 +1,140 @@
+import os, json, multiprocessing
+
+import pytest
+
+Image = pytest.importorskip('PIL.Image')
+
+from PhotoBookCropEngine import CropJob, processJob
+from PhotoBookCropManifest import CropManifest, CropOutputs, originalGeometry, \
+    croppedGeometry, sameCrop, normPath, linkCounts, MANIFEST_FILENAME
+
+
+def makeJob(imgFile, frameSizePoints, imageOffset, imageScale, resolution=100):
+    name, ext = os.path.splitext(imgFile)
+    return CropJob(0, imgFile, name + '_cropped.jpg',
+        (frameSizePoints[0] / 72.0, frameSizePoints[1] / 72.0), frameSizePoints,
+        imageOffset, imageScale, resolution)
+
+
+def test_geometry_round_trip():
+    entry = {'box': [100, 50, 900, 650], 'newSize': [400, 300]}
+    offset, scale = (-150.0, -80.0), (0.3, 0.3)
+    croppedOffset, croppedScale = croppedGeometry(entry, offset, scale)
+    assert croppedScale == pytest.approx((0.6, 0.6))
+    assert croppedOffset == pytest.approx((-25.0, -15.0))
+    backOffset, backScale = originalGeometry(entry, croppedOffset, croppedScale)
+    assert backOffset == pytest.approx(offset)
+    assert backScale == pytest.approx(scale)
+
+
+def test_same_crop_allows_one_pixel_of_the_new_image():
+    # 2000 source pixels in 138 new pixels: one new pixel is 15 source pixels
+    crop = ((500, 0, 2500, 2000), (138, 138))
+    assert sameCrop(((500, 0, 2512, 2000), (139, 138)), crop)
+    assert not sameCrop(((500, 0, 2530, 2000), (138, 138)), crop)
+    assert not sameCrop(((500, 0, 2500, 2000), (140, 138)), crop)
+
+
+@pytest.fixture
+def source(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = str(tmp_path / 'photo.jpg')
+    Image.new('RGB', (3000, 2000), (90, 120, 150)).save(path)
+    return path
+
+
+def test_two_crops_of_one_source_get_their_own_files(source):
+    outputs = CropOutputs(CropManifest())
+    cover = makeJob(source, (300, 225), (-833, -500), (0.225, 0.225))
+    interior = makeJob(source, (100, 100), (-500, 0), (0.05, 0.05))
+    same = makeJob(source, (300, 225), (-833, -500), (0.225, 0.225))
+    assert outputs.assign(cover, (3000, 2000))
+    assert outputs.assign(interior, (3000, 2000))
+    assert not outputs.assign(same, (3000, 2000))
+    assert cover.newImageFile.endswith('photo_cropped.jpg')
+    assert interior.newImageFile.endswith('photo_cropped2.jpg')
+    assert same.newImageFile == cover.newImageFile
+
+    manifest = CropManifest()
+    for job in (cover, interior):
+        manifest.record(processJob(job))
+    with Image.open(cover.newImageFile) as image:
+        assert image.size == (416, 312)
+    with Image.open(interior.newImageFile) as image:
+        assert image.size == (138, 138)
+
+    # a re-run keeps each crop in its file
+    outputs = CropOutputs(manifest)
+    again = makeJob(source, (100, 100), (-500, 0), (0.05, 0.05))
+    assert outputs.assign(again, (3000, 2000))
+    assert again.newImageFile == interior.newImageFile
+    assert manifest.isUpToDate(again)
+
+
+def test_a_recorded_file_of_another_crop_is_not_overwritten(source):
+    manifest = CropManifest()
+    cover = makeJob(source, (300, 225), (-833, -500), (0.225, 0.225))
+    CropOutputs(manifest).assign(cover, (3000, 2000))
+    manifest.record(processJob(cover))
+    # next run, only another crop of the same image
+    interior = makeJob(source, (100, 100), (-500, 0), (0.05, 0.05))
+    CropOutputs(manifest).assign(interior, (3000, 2000))
+    assert interior.newImageFile.endswith('photo_cropped2.jpg')
+    # unless the frame shows it already
+    interior = makeJob(source, (100, 100), (-500, 0), (0.05, 0.05))
+    CropOutputs(manifest).assign(interior, (3000, 2000), cover.newImageFile)
+    assert interior.newImageFile == cover.newImageFile
+
+
+def test_a_file_other_frames_show_keeps_their_crop(source):
+    manifest = CropManifest()
+    cover = makeJob(source, (300, 225), (-833, -500), (0.225, 0.225))
+    CropOutputs(manifest).assign(cover, (3000, 2000))
+    manifest.record(processJob(cover))
+    links = linkCounts([cover.newImageFile, cover.newImageFile])
+    # one of the two frames zoomed in, a run on that frame only
+    zoomed = makeJob(source, (300, 225), (-1000, -600), (0.25, 0.25))
+    assert CropOutputs(manifest, links).assign(zoomed, (3000, 2000), cover.newImageFile)
+    assert zoomed.newImageFile.endswith('photo_cropped2.jpg')
+    processJob(zoomed)
+    with Image.open(cover.newImageFile) as image:
+        assert image.size == (416, 312)
+    # the same crop still shares the file
+    same = makeJob(source, (300, 225), (-833, -500), (0.225, 0.225))
+    CropOutputs(manifest, links).assign(same, (3000, 2000), cover.newImageFile)
+    assert same.newImageFile == cover.newImageFile
+    # and a file no other frame shows is cropped again
+    zoomed = makeJob(source, (300, 225), (-1000, -600), (0.25, 0.25))
+    CropOutputs(manifest, linkCounts([cover.newImageFile])).assign(zoomed, (3000, 2000),
+        cover.newImageFile)
+    assert zoomed.newImageFile == cover.newImageFile
+
+
+def test_a_shared_file_not_recorded_is_not_overwritten(source):
+    shared = os.path.splitext(source)[0] + '_cropped.jpg'
+    Image.new('RGB', (10, 10)).save(shared)
+    job = makeJob(source, (300, 225), (-833, -500), (0.225, 0.225))
+    CropOutputs(CropManifest(), linkCounts([shared] * 2)).assign(job, (3000, 2000), shared)
+    assert job.newImageFile.endswith('photo_cropped2.jpg')
+
+
+def saveEntries(folder, worker, count):
+    for n in range(count):
+        manifest = CropManifest()
+        path = os.path.join(folder, 'photo%d_%d_cropped.jpg' % (worker, n))
+        manifest.outputs(path)[normPath(path)] = {'source': path}
+        manifest.changed.add(os.path.dirname(normPath(path)))
+        manifest.save()
+
+
+def test_concurrent_saves_keep_every_entry(tmp_path):
+    folder = str(tmp_path)
+    workers = [multiprocessing.Process(target=saveEntries, args=(folder, worker, 20))
+        for worker in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    with open(os.path.join(folder, MANIFEST_FILENAME)) as manifestFile:
+        assert len(json.load(manifestFile)['outputs']) == 80
+    assert sorted(os.listdir(folder)) == [MANIFEST_FILENAME]
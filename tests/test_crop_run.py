@@ -0,0 +1,69 @@
+import os, sys, time
+
+import pytest
+
+# the dialog imports scribus (the fake one of the benchmarks), tkinter and Pillow
+pytest.importorskip('tkinter')
+Image = pytest.importorskip('PIL.Image')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'benchmarks', 'stub'))
+
+import scribus
+from PhotoBookImageCropResize import createCropResize, DEFAULT_OPTIONS
+from PhotoBookImageCropResizeDialog import CropRun, READ_FRAMES
+
+
+class EventLoop:
+    """ The after() callbacks of a dialog, run in time order."""
+
+    def __init__(self):
+        self.pending = []
+        self.finished = 0
+
+    def after(self, ms, callback):
+        self.pending.append((time.perf_counter() + ms / 1000.0, callback))
+
+    def finish(self):
+        self.finished += 1
+
+    def run(self, eachStep=None):
+        while self.pending:
+            self.pending.sort(key=lambda pending: pending[0])
+            due, callback = self.pending.pop(0)
+            time.sleep(max(0.0, due - time.perf_counter()))
+            callback()
+            if eachStep is not None:
+                eachStep()
+
+
+def startRun(tmp_path, nbrFrames):
+    doc = scribus.newDocument(1)
+    for n in range(nbrFrames):
+        path = str(tmp_path / ('photo%d.jpg' % n))
+        Image.new('RGB', (900, 600), (10 * n, 80, 120)).save(path)
+        doc.selection.append(scribus.addImageFrame(40, 40, 200, 150, path, zoom=1.5).name)
+    spbicr, err = createCropResize(dict(DEFAULT_OPTIONS, resolution='150'))
+    scan, err = spbicr.collectFrames('Selection')
+    run, loop, texts = CropRun(spbicr, scan), EventLoop(), []
+    run.start(loop.after, texts.append, loop.finish)
+    return doc, run, loop, texts
+
+
+def test_a_run_reads_the_frames_in_steps(tmp_path):
+    doc, run, loop, texts = startRun(tmp_path, READ_FRAMES + 2)
+    assert not doc.redraw    # one DocumentBatch for the whole run
+    loop.run()
+    assert texts[0] == 'Reading the frames: %d of %d...' % (READ_FRAMES, READ_FRAMES + 2)
+    assert run.done == READ_FRAMES + 2 and loop.finished == 1
+    assert all(item.imageFile.endswith('_cropped.jpg') for item in doc.items.values())
+    assert doc.redraw and run.scope is None
+    assert scribus.messages[-1][1].startswith('%d image frame(s) done.' % (READ_FRAMES + 2))
+
+
+def test_stop_while_reading_the_frames(tmp_path):
+    doc, run, loop, texts = startRun(tmp_path, READ_FRAMES + 2)
+    run.cancel()
+    loop.run()
+    assert run.read == 0 and loop.finished == 1 and doc.redraw
+    assert 'Stopped: %d frame(s) not done.' % (READ_FRAMES + 2) in scribus.messages[-1][1]
+    assert not any('_cropped' in item.imageFile for item in doc.items.values())
@@ -0,0 +1,38 @@
+import os, sys
+
+import pytest
+
+# the script imports scribus (the fake one of the benchmarks), tkinter and Pillow
+pytest.importorskip('tkinter')
+pytest.importorskip('PIL.Image')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'benchmarks', 'stub'))
+
+from PhotoBookFillFramesFromFolder import assignImages
+
+LANDSCAPE, PORTRAIT, SQUARE = 1.5, 0.75, 1.0
+
+
+def test_without_matching_the_images_go_in_order():
+    assert assignImages([LANDSCAPE] * 3, [PORTRAIT, LANDSCAPE, PORTRAIT],
+        matchOrientation=False) == [0, 1, 2]
+
+
+def test_a_frame_takes_the_next_image_of_its_orientation():
+    frames = [PORTRAIT, LANDSCAPE, LANDSCAPE, PORTRAIT]
+    images = [LANDSCAPE, LANDSCAPE, PORTRAIT, PORTRAIT]
+    assert assignImages(frames, images) == [2, 0, 1, 3]
+
+
+def test_square_matches_all():
+    assert assignImages([SQUARE, PORTRAIT], [LANDSCAPE, SQUARE]) == [0, 1]
+
+
+def test_without_a_match_in_the_window_the_next_image_is_used():
+    images = [LANDSCAPE, LANDSCAPE, LANDSCAPE, PORTRAIT]
+    assert assignImages([PORTRAIT], images, window=3) == [0]
+    assert assignImages([PORTRAIT], images, window=4) == [3]
+
+
+def test_frames_left_over_get_none():
+    assert assignImages([LANDSCAPE] * 3, [LANDSCAPE]) == [0, None, None]
@@ -0,0 +1,58 @@
+import random
+
+import pytest
+
+from PhotoBookImageHash import HashIndex, duplicateClusters, distance, dHash, hashImages
+
+
+def flip(bits, *positions):
+    for position in positions:
+        bits ^= 1 << position
+    return bits
+
+
+def test_index_finds_what_a_full_search_finds():
+    rng = random.Random(5)
+    base = [rng.getrandbits(64) for n in range(20)]
+    # near copies of the base hashes, 0..12 bits flipped
+    hashes = dict(('h%d' % n, flip(base[n % 20], *rng.sample(range(64), rng.randrange(13))))
+        for n in range(200))
+    index = HashIndex(8)
+    for key, bits in hashes.items():
+        index.add(bits, key)
+    for bits in base:
+        expected = sorted((distance(bits, other), key) for key, other in hashes.items()
+            if distance(bits, other) <= 8)
+        assert sorted(index.search(bits)) == expected
+
+
+def test_clusters_are_transitive():
+    a = 0
+    b = flip(a, *range(6))        # 6 bits from a
+    c = flip(b, *range(10, 16))   # 6 bits from b, 12 from a
+    far = flip(a, *range(20, 64))
+    hashes = {'a': a, 'far': far, 'b': b, 'c': c, 'copy': far}
+    assert duplicateClusters(hashes, 8) == [(6, ['a', 'b', 'c']), (0, ['far', 'copy'])]
+
+
+def test_no_clusters_without_duplicates():
+    assert duplicateClusters({'a': 0, 'b': (1 << 64) - 1}) == []
+
+
+def test_resized_copy_is_a_near_duplicate(tmp_path):
+    Image = pytest.importorskip('PIL.Image')
+    rng = random.Random(1)
+    photo = Image.new('L', (8, 6))
+    photo.putdata([rng.randrange(256) for n in range(48)])
+    photo = photo.resize((400, 300), Image.BICUBIC).convert('RGB')
+    paths = [str(tmp_path / name) for name in ('photo.jpg', 'small.png', 'other.jpg', 'bad.jpg')]
+    photo.save(paths[0], quality=90)
+    photo.resize((200, 150)).save(paths[1])
+    photo.transpose(Image.FLIP_LEFT_RIGHT).save(paths[2])
+    with open(paths[3], 'wb') as badFile:
+        badFile.write(b'not an image')
+    hashes = hashImages(paths, workers=2)
+    assert hashes[paths[3]] is None
+    assert distance(hashes[paths[0]], hashes[paths[1]]) <= 8
+    assert distance(hashes[paths[0]], hashes[paths[2]]) > 8
+    assert hashes[paths[0]] == dHash(paths[0])
@@ -0,0 +1,142 @@
+import os
+
+import pytest
+
+sqlite3 = pytest.importorskip('sqlite3')
+
+from PhotoBookImageInfo import ImageInfo
+from PhotoBookImageIndex import ImageIndex, INDEX_FILENAME, INDEX_VERSION, indexFileOf, \
+    normPath, main
+
+
+def writeFile(path, data=b'image'):
+    with open(path, 'wb') as imageFile:
+        imageFile.write(data)
+    return path
+
+
+def storeFile(index, path, size=(300, 200)):
+    st = os.stat(path)
+    index.store(ImageInfo(path, size, (300.0, 300.0), 6, (0.25, 0.5), '2024:05:01 10:00:00',
+        'RGB', st.st_size), st)
+    return st
+
+
+@pytest.fixture
+def photo(tmp_path):
+    return writeFile(str(tmp_path / 'photo.jpg'))
+
+
+def test_lookup_hit(tmp_path, photo):
+    index = ImageIndex(indexFileOf(str(tmp_path)))
+    st = storeFile(index, photo)
+    info = index.lookup(photo, st)
+    assert (info.path, info.size, info.dpi, info.orientation, info.focus) == \
+        (photo, (300, 200), (300.0, 300.0), 6, (0.25, 0.5))
+    assert (info.captureTime, info.mode, info.fileSize) == ('2024:05:01 10:00:00', 'RGB', 5)
+    assert index.lookup(writeFile(str(tmp_path / 'other.jpg')), st) is None
+    index.close()
+
+
+def test_miss_after_a_change(tmp_path, photo):
+    index = ImageIndex(indexFileOf(str(tmp_path)))
+    st = storeFile(index, photo)
+    os.utime(photo, ns=(st.st_atime_ns, st.st_mtime_ns + 1000000000))
+    assert index.lookup(photo, os.stat(photo)) is None
+    writeFile(photo, b'a larger image')
+    os.utime(photo, ns=(st.st_atime_ns, st.st_mtime_ns))    # same time, other size
+    assert index.lookup(photo, os.stat(photo)) is None
+    index.close()
+
+
+def test_entries_are_kept_for_the_next_run(tmp_path, photo):
+    index = ImageIndex(indexFileOf(str(tmp_path)))
+    st = storeFile(index, photo)
+    index.close()
+    assert os.path.exists(str(tmp_path / INDEX_FILENAME))
+    index = ImageIndex(indexFileOf(str(tmp_path)))
+    assert index.lookup(photo, st).size == (300, 200)
+    assert list(index.rows) == [normPath(photo)]
+    index.close()
+
+
+def test_a_file_that_is_no_index_is_started_over(tmp_path, photo):
+    indexFile = writeFile(str(tmp_path / INDEX_FILENAME), b'not a SQLite file' * 100)
+    index = ImageIndex(indexFile)
+    index.load()
+    assert index.rows == {}
+    st = storeFile(index, photo)
+    index.close()
+    index = ImageIndex(indexFile)
+    assert index.lookup(photo, st) is not None
+    index.close()
+
+
+def test_an_index_of_another_version_is_started_over(tmp_path, photo):
+    indexFile = str(tmp_path / INDEX_FILENAME)
+    connection = sqlite3.connect(indexFile)
+    with connection:
+        connection.execute('CREATE TABLE images (path TEXT PRIMARY KEY, size INTEGER)')
+        connection.execute('INSERT INTO images VALUES (?, 5)', (normPath(photo),))
+        connection.execute('PRAGMA user_version = %d' % (INDEX_VERSION - 1))
+    connection.close()
+    index = ImageIndex(indexFile)
+    index.load()
+    assert index.rows == {}
+    st = storeFile(index, photo)
+    index.close()
+    connection = sqlite3.connect(indexFile)
+    assert connection.execute('PRAGMA user_version').fetchone()[0] == INDEX_VERSION
+    connection.close()
+    index = ImageIndex(indexFile)
+    assert index.lookup(photo, st) is not None
+    index.close()
+
+
+def test_refresh(tmp_path):
+    Image = pytest.importorskip('PIL.Image')
+    Image.new('RGB', (40, 30)).save(str(tmp_path / 'a.jpg'), dpi=(150, 150))
+    Image.new('L', (20, 10)).save(str(tmp_path / 'b.png'))
+    writeFile(str(tmp_path / 'broken.jpg'))
+    index = ImageIndex(indexFileOf(str(tmp_path)))
+    assert index.refresh([str(tmp_path)], workers=2) == (2, 1)
+    a = str(tmp_path / 'a.jpg')
+    info = index.lookup(a, os.stat(a))
+    assert info.size == (40, 30) and info.dpi == (150.0, 150.0) and info.mode == 'RGB'
+    assert normPath(str(tmp_path / 'broken.jpg')) not in index.rows
+    index.close()
+
+
+def test_invalidate_and_prune(tmp_path, photo):
+    os.mkdir(str(tmp_path / 'sub'))
+    paths = [photo, writeFile(str(tmp_path / 'sub' / 'a.jpg')),
+        writeFile(str(tmp_path / 'sub' / 'b.jpg')), writeFile(str(tmp_path / 'gone.jpg'))]
+    index = ImageIndex(indexFileOf(str(tmp_path)))
+    for path in paths:
+        storeFile(index, path)
+    index.save()
+    assert index.invalidate([str(tmp_path / 'sub')]) == 2
+    assert sorted(index.rows) == sorted([normPath(photo), normPath(paths[3])])
+    os.remove(paths[3])
+    assert index.prune() == 1
+    assert list(index.rows) == [normPath(photo)]
+    assert index.invalidate() == 1
+    index.close()
+    index = ImageIndex(indexFileOf(str(tmp_path)))
+    index.load()
+    assert index.rows == {}
+    index.close()
+
+
+def test_command_line(tmp_path, photo, capsys):
+    index = ImageIndex(indexFileOf(str(tmp_path)))
+    storeFile(index, photo)
+    storeFile(index, writeFile(str(tmp_path / 'gone.jpg')))
+    index.close()
+    os.remove(str(tmp_path / 'gone.jpg'))
+    assert main([str(tmp_path), 'stats']) == 0
+    assert main([str(tmp_path), 'prune']) == 0
+    assert main([str(tmp_path / INDEX_FILENAME), 'invalidate', photo]) == 0
+    assert capsys.readouterr().out.splitlines() == [
+        '%s: 2 image(s).' % str(tmp_path / INDEX_FILENAME),
+        '1 image(s) forgotten (gone or changed).', '1 image(s) forgotten.']
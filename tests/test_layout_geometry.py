@@ -0,0 +1,67 @@
+import pytest
+
+from PhotoBookLayoutGeometry import linearPartition, paginate, parseTemplates
+
+
+def covers(rows, n):
+    """ True if rows [(first, last + 1)] are the images 0..n-1 in order."""
+    return [k for first, last in rows for k in range(first, last)] == list(range(n))
+
+
+def test_linear_partition_fills_rows_of_the_row_height():
+    # squares in a 300 wide row of height 100: 3 per row
+    rows = linearPartition([1.0] * 6, 300.0, 0.0, 100.0)
+    assert rows == [(0, 3), (3, 6)]
+
+
+def test_linear_partition_keeps_the_order_and_every_image():
+    aspects = [1.5, 0.67, 1.5, 1.5, 0.67, 0.67, 2.0, 1.0, 1.33]
+    rows = linearPartition(aspects, 600.0, 5.0, 150.0)
+    assert covers(rows, len(aspects))
+
+
+def test_linear_partition_edge_cases():
+    assert linearPartition([], 300.0, 0.0, 100.0) == []
+    assert linearPartition([1.5], 300.0, 0.0, 100.0) == [(0, 1)]
+    # a panorama alone is about as high as the row height
+    assert linearPartition([3.0, 1.0, 1.0, 1.0], 300.0, 0.0, 100.0) == [(0, 1), (1, 4)]
+
+
+def test_paginate_without_a_one_cell_template():
+    # used to raise TypeError: the first image alone fills no page
+    assert paginate([1.5] * 2, [[1.5, 1.5]]) == [(0, 0, 2)]
+    pages = paginate([1.5] * 7, [[1.5, 1.5], [1.5] * 4])
+    assert covers([(first, last) for t, first, last in pages], 7)
+
+
+def test_paginate_matches_orientations():
+    landscape, portrait = 1.5, 2 / 3.0
+    templates = [[landscape], [portrait, portrait]]
+    pages = paginate([landscape, portrait, portrait, landscape], templates)
+    assert pages == [(0, 0, 1), (1, 1, 3), (0, 3, 4)]
+
+
+def test_paginate_fills_every_page_but_the_last():
+    templates = [[1.0] * 4]
+    assert paginate([1.0] * 6, templates) == [(0, 0, 4), (0, 4, 6)]
+
+
+def test_paginate_with_max_pages():
+    templates = [[1.5], [1.5] * 4]
+    assert len(paginate([1.5] * 8, templates)) == 2
+    # a high cost of the cropped images: more pages, unless limited
+    aspects = [0.5] * 8
+    assert len(paginate(aspects, templates, maxPages=2)) == 2
+
+
+def test_paginate_edge_cases():
+    assert paginate([], [[1.0]]) == []
+    assert paginate([1.0, 1.0], []) is None
+
+
+def test_parse_templates():
+    assert parseTemplates('1x1, 2x1 2x2 2x1') == [(1, 1), (2, 1), (2, 2)]
+    with pytest.raises(ValueError):
+        parseTemplates('0x2')
+    with pytest.raises(ValueError):
+        parseTemplates('')
@@ -0,0 +1,65 @@
+import pytest
+
+from PhotoBookLayoutSpec import LayoutSpec, parsePagePattern
+
+
+def writeSpec(folder, text, name='book.spec'):
+    path = folder / name
+    path.write_text(text)
+    return str(path)
+
+
+def test_page_patterns():
+    assert parsePagePattern('all') == ([(1, None)], None)
+    assert parsePagePattern('odd') == ([(1, None)], 1)
+    assert parsePagePattern('5') == ([(5, 5)], None)
+    assert parsePagePattern('2-199 even') == ([(2, 199)], 0)
+    assert parsePagePattern('50-') == ([(50, None)], None)
+    assert parsePagePattern('1, 5, 9-12 Odd') == ([(1, 1), (5, 5), (9, 12)], 1)
+
+
+@pytest.mark.parametrize('pattern', ['0', '5-3', 'x', '-5', '1,,2', 'odd even'])
+def test_bad_page_patterns(pattern):
+    with pytest.raises(ValueError):
+        parsePagePattern(pattern)
+
+
+def test_the_last_matching_line_wins(tmp_path):
+    spec = LayoutSpec(writeSpec(tmp_path, '[pages]\n'
+        'all = 2x2\n1 = 1x1\n2-5 even = 3x2\n5- = none\n'), str(tmp_path / 'none.cfg'))
+    assert [spec.layoutOf(page) for page in range(1, 7)] == \
+        ['1x1', '3x2', '2x2', '3x2', None, None]
+    assert spec.pagesByLayout(4) == {'1x1': [1], '3x2': [2, 4], '2x2': [3]}
+
+
+def test_layout_values(tmp_path):
+    configFile = writeSpec(tmp_path, '[DEFAULT]\ngap = 5.0\ncols = 2\n\n'
+        '[grid 2x2]\ncols = 2\nrows = 2\n\n[rows]\nlayout = Justified rows\n',
+        'PhotoBookLayoutMaker.cfg')
+    spec = LayoutSpec(writeSpec(tmp_path, '[DEFAULT]\ngap = 3.0\n\n'
+        '[pages]\nall = 3x1\n\n[wide]\ncols = 4\n'), configFile)
+    assert spec.values('3x1') == {'gap': '3.0', 'cols': '3', 'rows': '1', 'layout': 'Grid'}
+    assert spec.values('wide')['cols'] == '4'
+    assert spec.values('grid 2x2')['rows'] == '2'
+    assert spec.values('DEFAULT') == {'gap': '3.0', 'cols': '2', 'layout': 'Grid'}
+    for layout in ('rows', 'pages', 'portrait 3x2'):
+        with pytest.raises(ValueError):
+            spec.values(layout)
+
+
+@pytest.mark.parametrize('text', [
+    'all = 2x2\n',                                  # no section header
+    '[pages]\nall = 2x2\nall = 3x2\n',              # duplicate option
+    '[pages]\nall = 2x2\nthis line has no value\n',    # parsing error
+    '[layouts]\nall = 2x2\n',                       # no [pages]
+    '[pages]\n2-1 = 2x2\n',                         # bad page pattern
+])
+def test_bad_spec_files_raise_value_error(tmp_path, text):
+    with pytest.raises(ValueError):
+        LayoutSpec(writeSpec(tmp_path, text), str(tmp_path / 'none.cfg'))
+
+
+def test_bad_config_file_raises_value_error(tmp_path):
+    configFile = writeSpec(tmp_path, 'cols = 2\n', 'PhotoBookLayoutMaker.cfg')
+    with pytest.raises(ValueError):
+        LayoutSpec(writeSpec(tmp_path, '[pages]\nall = 2x2\n'), configFile)
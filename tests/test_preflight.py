@@ -0,0 +1,79 @@
+import pytest
+
+from PhotoBookCropEngine import CropJob, JpegProfile
+from PhotoBookImageInfo import ImageInfo
+from PhotoBookPreflight import FramePreflight, projectedBytes, preflightSummary
+
+
+def makeJob(imageScale, imageOffset=(0, 0), imgFile='photo.jpg', newImageFile=None,
+    mode='RGB', jpeg=None, name='Frame'):
+    # a 2 x 1.5 inch frame at 300 DPI: 600 x 450 pixels
+    return CropJob(name, imgFile, newImageFile or imgFile[:-4] + '_cropped.jpg', (2.0, 1.5),
+        (144, 108), imageOffset, (imageScale, imageScale), 300, mode, jpeg=jpeg)
+
+
+def photo(path='photo.jpg', fileSize=1500000, orientation=1):
+    # 3000 x 2000 pixels, 2 bits per pixel
+    size = (2000, 3000) if orientation in (5, 6, 7, 8) else (3000, 2000)
+    return ImageInfo(path, size, (72.0, 72.0), orientation, fileSize=fileSize)
+
+
+@pytest.mark.parametrize('imageScale, flag, dpi', [
+    (0.24, 'ok', 300),
+    (0.5, 'under-resolved', 144),
+    (0.1, 'oversized', 720),
+])
+def test_flags(imageScale, flag, dpi):
+    result = FramePreflight(makeJob(imageScale), photo())
+    assert result.flag == flag
+    assert result.effectiveDpi == pytest.approx(dpi)
+
+
+def test_new_size_and_box():
+    result = FramePreflight(makeJob(0.24, (-100, -50)), photo())
+    assert result.box == (100, 50, 700, 500)
+    assert result.newSize == (600, 450)
+    assert result.sourceBytes == 1500000
+    # the engine crops the image as stored, before the EXIF orientation
+    assert FramePreflight(makeJob(0.24), photo(orientation=6)).box == (0, 0, 600, 450)
+
+
+def test_unreadable_and_not_in_the_frame():
+    result = FramePreflight(makeJob(0.24), None)
+    assert (result.flag, result.sourceBytes, result.projectedBytes) == ('unreadable', None, None)
+    result = FramePreflight(makeJob(0.24, (5000, 0)), photo())    # moved out of the frame
+    assert result.flag == 'unreadable' and result.newSize is None
+    assert result.sourceBytes == 1500000
+
+
+def test_projected_bytes():
+    newSize = (600, 450)
+    assert projectedBytes(makeJob(0.24, newImageFile='p_cropped.tif'), photo(), newSize) == \
+        600 * 450 * 3
+    assert projectedBytes(makeJob(0.24, newImageFile='p_cropped.tif', mode='CMYK'), photo(),
+        newSize) == 600 * 450 * 4
+    assert projectedBytes(makeJob(0.24, newImageFile='p_cropped.png'), photo(), newSize) == \
+        int(600 * 450 * 3 * 0.6)
+    # JPEG: bits per pixel of the source JPEG (1 here), else 2
+    assert projectedBytes(makeJob(0.24), photo(fileSize=750000), newSize) == 600 * 450 // 8
+    assert projectedBytes(makeJob(0.24, 'x.png'), photo('x.png', 750000), newSize) == \
+        600 * 450 * 2 // 8
+    # at most the JPEG target
+    jpeg = JpegProfile(targetKB=20)
+    assert projectedBytes(makeJob(0.24, jpeg=jpeg), photo(fileSize=750000), newSize) == 20480
+
+
+def test_summary_counts_a_shared_file_once():
+    results = [FramePreflight(makeJob(0.24, name='Frame1'), photo()),
+        FramePreflight(makeJob(0.24, name='Frame2'), photo()),
+        FramePreflight(makeJob(0.5, imgFile='low.jpg', name='Frame3'), photo('low.jpg')),
+        FramePreflight(makeJob(0.24, imgFile='gone.jpg', name='Frame4'), None)]
+    lines = preflightSummary(results, 300)
+    assert lines[0] == ('4 image frame(s): 1 under-resolved (below 240 DPI), 0 oversized '
+        '(above 450 DPI), 1 unreadable, 2 ok.')
+    # photo.jpg and low.jpg: 1.5 MB each now; Frame1 and Frame2 share photo_cropped.jpg
+    after = results[0].projectedBytes + results[2].projectedBytes
+    assert lines[1] == 'Image files: 3.0 MB now, about %.1f MB after Crop and Resize (%d%%).' \
+        % (after / 1e6, round(100.0 * after / 3000000))
+    assert lines[2:] == ['Lowest resolution:', 'Frame3: 144 DPI (low.jpg)',
+        'Unreadable (or not in the frame):', 'Frame4: gone.jpg']
@@ -0,0 +1,83 @@
+import os, sys
+
+import pytest
+
+# the script imports scribus (the fake one of the benchmarks) and Pillow
+Image = pytest.importorskip('PIL.Image')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'benchmarks', 'stub'))
+
+import scribus
+from PhotoBookImageCropResize import createCropResize, DEFAULT_OPTIONS, PROXY_FOLDER
+
+
+def newDocument(folder):
+    """ Frames of 200 x 150 pt with 3000 x 2000 images (960, 640 and 480 DPI),
+    zoomed and moved in their frames."""
+    os.mkdir(folder)
+    doc = scribus.newDocument(1)
+    for n, zoom in enumerate((1.0, 1.5, 2.0)):
+        path = os.path.join(folder, 'photo%d.jpg' % n)
+        Image.new('RGB', (3000, 2000), (60 * n, 100, 140)).save(path)
+        item = scribus.addImageFrame(40, 40 + 160 * n, 200, 150, path, zoom=zoom)
+        item.imageXOffset -= 100 * n
+        doc.selection.append(item.name)
+    return doc
+
+
+def views(doc):
+    return [(item.imageFile, item.imageXScale, item.imageYScale, item.imageXOffset,
+        item.imageYOffset) for item in doc.items.values()]
+
+
+def assertSameViews(views, expected):
+    for view, other in zip(views, expected):
+        assert view[0] == other[0]
+        assert view[1:] == pytest.approx(other[1:])
+
+
+def cropResize():
+    spbicr, err = createCropResize(dict(DEFAULT_OPTIONS, resolution='150'))
+    return spbicr
+
+
+def test_proxies_map_back_to_the_original_view(tmp_path):
+    doc = newDocument(str(tmp_path / 'book'))
+    originals = views(doc)
+    cropResize().proxySelection('Whole document')
+    proxies = views(doc)
+    assert [os.path.basename(os.path.dirname(view[0])) for view in proxies] == [PROXY_FOLDER] * 3
+    assert [os.path.basename(view[0]) for view in proxies] == \
+        ['photo0_proxy8.jpg', 'photo1_proxy4.jpg', 'photo2_proxy4.jpg']
+    # the frames show the same part of the (smaller) image
+    for proxy, original in zip(proxies, originals):
+        with Image.open(proxy[0]) as image:
+            factor = 3000.0 / image.size[0]
+        assert proxy[1] == pytest.approx(original[1] * factor, rel=0.01)
+        assert proxy[3] == pytest.approx(original[3] / factor, abs=0.5)
+
+    # a run maps each proxy back to its original image and view
+    spbicr = cropResize()
+    for name, original in zip(doc.items, originals):
+        job = spbicr.createJob(name)
+        assert job.imgFile == original[0]
+        assert job.imageScale == pytest.approx(original[1:3])
+        assert job.imageOffset == pytest.approx(original[3:], abs=0.5)
+
+    # proxies again: nothing to do
+    cropResize().proxySelection('Whole document')
+    assertSameViews(views(doc), proxies)
+
+
+def test_crop_and_resize_of_proxies_is_that_of_the_originals(tmp_path):
+    direct = newDocument(str(tmp_path / 'direct'))
+    cropResize().handleSelection('Whole document')
+    expected = [(os.path.basename(view[0]),) + view[1:] for view in views(direct)]
+
+    doc = newDocument(str(tmp_path / 'proxies'))
+    cropResize().proxySelection('Whole document')
+    cropResize().handleSelection('Whole document')
+    swapped = [(os.path.basename(view[0]),) + view[1:] for view in views(doc)]
+    assert [view[0] for view in swapped] == \
+        ['photo0_cropped.jpg', 'photo1_cropped.jpg', 'photo2_cropped.jpg']
+    assertSameViews(swapped, expected)
@@ -0,0 +1,89 @@
+import csv, json, os, pstats, threading
+
+import pytest
+
+from PhotoBookTiming import StageTimer, Profiler, percentile
+
+
+def test_percentile_is_nearest_rank():
+    values = [1.0, 2.0, 3.0, 4.0]
+    assert percentile(values, 0.5) == 2.0
+    assert percentile(values, 0.9) == 4.0
+    assert percentile(values, 0.0) == 1.0
+    assert percentile([], 0.5) == 0.0
+
+
+def test_report_per_stage_and_item():
+    timer = StageTimer()
+    timer.add('frame1', 'decode', 1.0)
+    timer.add('frame1', 'decode', 0.5)
+    timer.addAll('frame1', {'encode': 0.5})
+    timer.add('frame2', 'decode', 3.0)
+    timer.tag('frame2', 'path', 'crop')
+    report = timer.report()
+    assert list(report['stages']) == ['decode', 'encode']
+    decode = report['stages']['decode']
+    assert (decode['total'], decode['count'], decode['mean'], decode['max']) == \
+        (4.5, 2, 2.25, 3.0)
+    assert report['stages']['encode']['count'] == 1
+    assert report['total'] == 5.0
+    assert [item['item'] for item in report['slowest']] == ['frame2', 'frame1']
+    assert report['slowest'][0] == {'decode': 3.0, 'item': 'frame2', 'total': 3.0,
+        'path': 'crop'}
+    assert report['items'][0] == {'decode': 1.5, 'encode': 0.5, 'item': 'frame1'}
+
+
+def test_add_since_keeps_the_first_time():
+    timer = StageTimer()
+    timer.add('(run)', 'first frame', 1.0)
+    timer.addSince('(run)', 'first frame', 0.0)
+    assert timer.items['(run)']['first frame'] == 1.0
+
+
+@pytest.mark.parametrize('name', ['timing.json', 'timing.csv'])
+def test_write_report(tmp_path, monkeypatch, name):
+    timer = StageTimer()
+    timer.add('frame1', 'decode', 0.25)
+    timer.tag('frame1', 'path', 'copy')
+    monkeypatch.setenv('PHOTOBOOK_TIMING', str(tmp_path / name))
+    assert timer.writeReport() == str(tmp_path / name)
+    with open(str(tmp_path / name), newline='') as reportFile:
+        if name.endswith('.json'):
+            assert json.load(reportFile)['stages']['decode']['total'] == 0.25
+        else:
+            assert list(csv.reader(reportFile)) == [['item', 'decode', 'total', 'path'],
+                ['frame1', '0.250000', '0.250000', 'copy']]
+
+
+def test_no_report_without_a_file_name(monkeypatch):
+    monkeypatch.delenv('PHOTOBOOK_TIMING', raising=False)
+    assert StageTimer().writeReport() is None
+
+
+def busy():
+    return sum(i * i for i in range(10000))
+
+
+def test_profiler_of_a_second_thread_has_a_file_of_its_own(tmp_path):
+    path = str(tmp_path / 'book.prof')
+    def work():
+        with Profiler(path, part='worker'):
+            busy()
+    with Profiler(path):
+        thread = threading.Thread(target=work)
+        thread.start()
+        thread.join()
+    assert os.path.exists(path)
+    workerPath = str(tmp_path / 'book-worker.prof')
+    if os.path.exists(workerPath):    # up to Python 3.11: one thread per profile
+        functions = [name for (_, _, name) in pstats.Stats(workerPath).stats]
+    else:                             # Python 3.12+: one profile sees all threads
+        functions = [name for (_, _, name) in pstats.Stats(path).stats]
+    assert 'busy' in functions
+
+
+def test_profiler_without_a_file_name_does_nothing(monkeypatch):
+    monkeypatch.delenv('PHOTOBOOK_PROFILE', raising=False)
+    with Profiler(part='worker') as profiler:
+        busy()
+    assert profiler.path is None and profiler.profile is None